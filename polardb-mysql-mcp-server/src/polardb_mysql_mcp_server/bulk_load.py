@@ -0,0 +1,113 @@
+import csv
+import json
+import os
+
+DEFAULT_BULK_LOAD_BATCH_ROWS = 1000
+BULK_LOAD_FORMATS = ("csv", "jsonl")
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def _env_bool(name, default="false"):
+    return os.getenv(name, default).lower() == "true"
+
+
+def get_bulk_load_settings():
+    """Get bulk_load settings from environment variables. Files can only be
+    loaded from the import directory, so without one bulk_load is disabled.
+    LOAD DATA LOCAL INFILE also needs local_infile=ON on the server, so it is
+    opt-in."""
+    directory = os.getenv("POLARDB_MYSQL_IMPORT_DIR") or None
+    return {
+        "directory": os.path.realpath(directory) if directory else None,
+        "batch_rows": int(os.getenv("POLARDB_MYSQL_BULK_LOAD_BATCH_ROWS", str(DEFAULT_BULK_LOAD_BATCH_ROWS))),
+        "load_data_local": _env_bool("POLARDB_MYSQL_LOAD_DATA_LOCAL"),
+    }
+
+
+class LoadWarnings(Exception):
+    """LOAD DATA LOCAL implies IGNORE: duplicate keys and bad values become
+    warnings and skipped or truncated rows instead of errors."""
+
+
+def import_path(directory, name):
+    """Absolute path of file name in the import directory, refusing names
+    that resolve outside of it, through symlinks or otherwise."""
+    if directory is None:
+        raise ValueError("Loading files needs POLARDB_MYSQL_IMPORT_DIR to be set")
+    if not name or not isinstance(name, str):
+        raise ValueError(f"Invalid file name: {name!r}")
+    path = os.path.realpath(os.path.join(directory, name))
+    if os.path.commonpath([directory, path]) != directory or path == directory:
+        raise ValueError(f"File {name!r} is outside of the import directory")
+    if not os.path.isfile(path):
+        raise ValueError(f"No such file in the import directory: {name!r}")
+    return path
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        if fmt not in BULK_LOAD_FORMATS:
+            raise ValueError(f"Invalid format: {fmt!r}, expected one of {', '.join(BULK_LOAD_FORMATS)}")
+        return fmt
+    fmt = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path!r} from its extension, pass format")
+    return fmt
+
+
+def read_csv_header(path):
+    """Column names from the header row of a CSV file, and the line
+    terminator it uses."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        line = f.readline()
+    if not line.strip():
+        raise ValueError(f"{path} has no header row")
+    return next(csv.reader([line])), "\r\n" if line.endswith("\r\n") else "\n"
+
+
+def _csv_rows(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if row:
+                # empty fields load as NULL, as with LOAD DATA and COPY csv
+                yield tuple(value if value != "" else None for value in row)
+
+
+def _json_value(value):
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+
+
+def _jsonl_rows(path, columns):
+    expected = set(columns)
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or not set(record) <= expected:
+                raise ValueError(f"Line {line_number} of {path} is not an object with the columns of the first line")
+            yield tuple(_json_value(record.get(column)) for column in columns)
+
+
+def read_rows(path, fmt):
+    """(columns, rows) of a CSV file with a header row, or of a JSON lines
+    file whose first object names the columns. rows is an iterator of tuples
+    read lazily from the file."""
+    if fmt == "csv":
+        return read_csv_header(path)[0], _csv_rows(path)
+    with open(path, encoding="utf-8") as f:
+        first = next((line for line in f if line.strip()), None)
+    if first is None:
+        raise ValueError(f"{path} has no rows")
+    record = json.loads(first)
+    if not isinstance(record, dict) or not record:
+        raise ValueError(f"The first line of {path} is not a JSON object")
+    columns = list(record)
+    return columns, _jsonl_rows(path, columns)
+
+
+def load_summary(rows, table, elapsed, method):
+    rate = f"{rows / elapsed:.0f} rows/s" if elapsed > 0 else "n/a"
+    return f"Loaded {rows} rows into {table} with {method} in {elapsed:.2f} s ({rate})"
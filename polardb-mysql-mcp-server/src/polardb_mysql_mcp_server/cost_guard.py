@@ -0,0 +1,278 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger("polardb-mysql-mcp-server")
+
+GUARD_MODES = ("off", "reject", "limit", "imci")
+DEFAULT_GUARD_MAX_ROWS = 1000000
+DEFAULT_GUARD_LIMIT = 1000
+DEFAULT_GUARD_CACHE_TTL = 300
+_GUARD_CACHE_SIZE = 1024
+
+# literals and whitespace do not change the shape of a plan enough to matter
+_FINGERPRINT_RE = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|\b\d+(?:\.\d+)?(?:e[+-]?\d+)?\b|\s+",
+    re.IGNORECASE,
+)
+_LEADING_COMMENTS_RE = re.compile(r"^(?:\s+|/\*.*?\*/|(?:--|#)[^\n]*\n?)*", re.DOTALL)
+_GUARDED_RE = re.compile(r"(?:\(\s*)*(?:select|with)\b", re.IGNORECASE)
+_LIMIT_TOKEN_RE = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`|/\*.*?\*/|(?:--\s|#)[^\n]*|\s+"
+    r"|(?P<open>\()|(?P<close>\))|(?P<word>[A-Za-z_][\w$]*)|(?P<number>\d+(?![\w.$]))|(?P<other>.)",
+    re.DOTALL,
+)
+# a LIMIT cannot be added to statements that write, lock or store their rows
+_UNLIMITABLE_WORDS = {"into", "for", "lock", "procedure"}
+_WRITE_WORDS = {"insert", "update", "delete", "replace"}
+
+
+def get_cost_guard_settings():
+    """Get cost guard settings from environment variables. A max of 0 disables that check."""
+    mode = os.getenv("POLARDB_MYSQL_COST_GUARD", "off").strip().lower() or "off"
+    if mode not in GUARD_MODES:
+        raise ValueError(f"Invalid POLARDB_MYSQL_COST_GUARD {mode!r}, expected one of {list(GUARD_MODES)}")
+    return {
+        "mode": mode,
+        "max_rows": float(os.getenv("POLARDB_MYSQL_COST_GUARD_MAX_ROWS", str(DEFAULT_GUARD_MAX_ROWS))),
+        "max_cost": float(os.getenv("POLARDB_MYSQL_COST_GUARD_MAX_COST", "0")),
+        "limit": int(os.getenv("POLARDB_MYSQL_COST_GUARD_LIMIT", str(DEFAULT_GUARD_LIMIT))),
+        "ttl": float(os.getenv("POLARDB_MYSQL_COST_GUARD_CACHE_TTL", str(DEFAULT_GUARD_CACHE_TTL))),
+    }
+
+
+def fingerprint(query):
+    """Digest of query with literals replaced and whitespace collapsed."""
+    def replace(m):
+        return " " if m.group(0).isspace() else "?"
+    normalized = _FINGERPRINT_RE.sub(replace, query.strip().rstrip(";")).lower()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def is_guarded_query(query):
+    """Whether query is a plain SELECT/WITH the guard should look at. polar4ai
+    statements go to the AI node, which cannot EXPLAIN them."""
+    if "/*polar4ai*/" in query.lower():
+        return False
+    body = _LEADING_COMMENTS_RE.sub("", query, count=1)
+    return bool(_GUARDED_RE.match(body))
+
+
+def _table_rows(table):
+    try:
+        return float(table.get("rows_examined_per_scan", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _rows_examined(node):
+    """Estimated rows read by an EXPLAIN FORMAT=JSON (sub)plan. Each table of a
+    nested loop is scanned once per row produced by the tables joined before it."""
+    if isinstance(node, list):
+        return sum(_rows_examined(item) for item in node)
+    if not isinstance(node, dict):
+        return 0.0
+    total = 0.0
+    for key, value in node.items():
+        if key == "nested_loop" and isinstance(value, list):
+            prefix = 1.0
+            for item in value:
+                table = item.get("table", {}) if isinstance(item, dict) else {}
+                total += prefix * _table_rows(table) + _rows_examined(
+                    {k: v for k, v in table.items() if k != "rows_examined_per_scan"})
+                try:
+                    prefix = max(float(table.get("rows_produced_per_join", prefix)), 1.0)
+                except (TypeError, ValueError):
+                    pass
+        elif key == "table" and isinstance(value, dict):
+            total += _table_rows(value) + _rows_examined(value)
+        elif isinstance(value, (dict, list)):
+            total += _rows_examined(value)
+    return total
+
+
+def _top_level_tokens(query):
+    """(kind, text, start, end) of the tokens of query outside parentheses,
+    literals and comments, or None if a word in _WRITE_WORDS appears anywhere."""
+    tokens = []
+    depth = 0
+    for m in _LIMIT_TOKEN_RE.finditer(query):
+        kind = m.lastgroup
+        if kind is None:
+            continue
+        if kind == "word" and m.group(0).lower() in _WRITE_WORDS:
+            return None
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+        elif depth == 0:
+            tokens.append((kind, m.group(0).lower(), m.start(), m.end()))
+    return tokens
+
+
+def limit_query(query, limit):
+    """query with its top-level LIMIT set to at most limit rows, adding one if
+    it has none, or None when that cannot be done safely: the statement writes,
+    locks rows, stores its result with INTO or has a LIMIT that is not made of
+    plain numbers. The query is never wrapped in a derived table, which would
+    fail on duplicate column names such as the id of both sides of a join."""
+    body = query.strip().rstrip(";").rstrip()
+    if "/*!" in body:
+        return None
+    tokens = _top_level_tokens(body)
+    if tokens is None or any(
+        (kind == "word" and text in _UNLIMITABLE_WORDS) or text == ";" for kind, text, _, _ in tokens
+    ):
+        return None
+    starts = [i for i, (kind, text, _, _) in enumerate(tokens) if kind == "word" and text == "limit"]
+    if not starts:
+        return f"{body}\nLIMIT {int(limit)}"
+    clause = tokens[starts[-1] + 1:]
+    shape = [text if kind != "number" else "n" for kind, text, _, _ in clause]
+    # LIMIT count, LIMIT offset, count and LIMIT count OFFSET offset
+    if shape == ["n"] or shape == ["n", "offset", "n"]:
+        count = clause[0]
+    elif shape == ["n", ",", "n"]:
+        count = clause[2]
+    else:
+        return None
+    _, text, start, end = count
+    return body[:start] + str(min(int(text), int(limit))) + body[end:]
+
+
+class CostEstimate:
+    def __init__(self, rows, cost):
+        self.rows = rows
+        self.cost = cost
+
+    @classmethod
+    def from_explain_json(cls, plan_text):
+        """Build from the single EXPLAIN FORMAT=JSON cell."""
+        plan = json.loads(plan_text)
+        block = plan.get("query_block", {})
+        try:
+            cost = float(block.get("cost_info", {}).get("query_cost", 0))
+        except (TypeError, ValueError):
+            cost = 0.0
+        return cls(_rows_examined(block), cost)
+
+
+class GuardVerdict:
+    """What to do with a query: action is "allow", "reject", "limit" or "imci";
+    query is the statement to run instead for limit/imci."""
+
+    def __init__(self, action, query, estimate=None, reason=""):
+        self.action = action
+        self.query = query
+        self.estimate = estimate
+        self.reason = reason
+
+    def message(self):
+        if self.action == "reject":
+            return (
+                f"Query rejected by the cost guard: {self.reason}. "
+                f"Add a selective WHERE clause, use indexed columns or a LIMIT"
+            )
+        if self.action == "limit":
+            return f"Cost guard: {self.reason}, the result was limited"
+        if self.action == "imci":
+            return f"Cost guard: {self.reason}, the query was routed to the column store"
+        return ""
+
+
+class CostGuard:
+    """Pre-flight check of SELECTs against row and cost thresholds.
+
+    Plan estimates are cached by query fingerprint for ``ttl`` seconds, so a
+    repeated query shape costs one EXPLAIN round trip per ttl. Over a
+    threshold, the query is rejected, given a LIMIT (rejected when one cannot
+    be added safely) or sent to the IMCI column store with a /*force_imci*/
+    hint, depending on ``mode``.
+    """
+
+    def __init__(self, mode="off", max_rows=DEFAULT_GUARD_MAX_ROWS, max_cost=0, limit=DEFAULT_GUARD_LIMIT,
+                 ttl=DEFAULT_GUARD_CACHE_TTL, cache_size=_GUARD_CACHE_SIZE):
+        self.mode = mode
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.limit = limit
+        self.ttl = ttl
+        self.cache_size = cache_size
+        # fingerprint -> (CostEstimate, stored_at)
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def applies_to(self, query):
+        return self.enabled and is_guarded_query(query)
+
+    def cached_estimate(self, query):
+        key = fingerprint(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl:
+                self._counters["explains"] += 1
+                return None
+            self._cache.move_to_end(key)
+            self._counters["cache_hits"] += 1
+            return entry[0]
+
+    def store_estimate(self, query, estimate):
+        key = fingerprint(query)
+        with self._lock:
+            self._cache[key] = (estimate, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def explain_sql(self, query):
+        return f"EXPLAIN FORMAT=JSON {query.strip().rstrip(';')}"
+
+    def decide(self, query, estimate) -> GuardVerdict:
+        reasons = []
+        if self.max_rows and estimate.rows > self.max_rows:
+            reasons.append(f"estimated {estimate.rows:.0f} rows examined exceeds max_rows={self.max_rows:.0f}")
+        if self.max_cost and estimate.cost > self.max_cost:
+            reasons.append(f"estimated cost {estimate.cost:.1f} exceeds max_cost={self.max_cost:.1f}")
+        if not reasons:
+            return GuardVerdict("allow", query, estimate)
+        reason = "; ".join(reasons)
+        with self._lock:
+            self._counters[self.mode] += 1
+        logger.info(f"Cost guard {self.mode}: {reason}")
+        body = query.strip().rstrip(";")
+        if self.mode == "limit":
+            limited = limit_query(body, self.limit)
+            if limited is None:
+                return GuardVerdict("reject", query, estimate, f"{reason}; a LIMIT cannot be added to this statement")
+            return GuardVerdict("limit", limited, estimate, f"{reason}; at most {int(self.limit)} rows are returned")
+        if self.mode == "imci":
+            return GuardVerdict("imci", f"/*force_imci*/ {body}", estimate, reason)
+        return GuardVerdict("reject", query, estimate, reason)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, mode=self.mode, cached_plans=len(self._cache))
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_cost_guard() -> CostGuard:
+    """Return the process-wide cost guard configured from the environment."""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = CostGuard(**get_cost_guard_settings())
+        return _guard
@@ -0,0 +1,100 @@
+import json
+from urllib.parse import parse_qs, urlencode
+
+DEFAULT_DATA_LIMIT = 50
+MAX_DATA_LIMIT = 1000
+SAMPLE_METHODS = ("bernoulli", "system")
+_PARAMS = ("columns", "limit", "after", "sample", "sample_method")
+
+
+class DataQuery:
+    """Options of a table data resource read, taken from the URI query string.
+
+    columns:       comma separated column projection, all columns if omitted
+    limit:         rows to return, 1..MAX_DATA_LIMIT
+    after:         keyset cursor, the primary key of the last row already seen;
+                   a JSON array for composite keys
+    sample:        percentage of rows to sample, 0 < sample <= 100
+    sample_method: bernoulli (rows picked independently) or system (blocks of
+                   adjacent rows, cheaper on large tables)
+    """
+
+    def __init__(self, columns=None, limit=DEFAULT_DATA_LIMIT, after=None, sample=None,
+                 sample_method=SAMPLE_METHODS[0]):
+        self.columns = columns
+        self.limit = limit
+        self.after = after
+        self.sample = sample
+        self.sample_method = sample_method
+
+    def next_page(self, cursor) -> str:
+        """Query string of the page following the row whose key is cursor."""
+        params = {}
+        if self.columns:
+            params["columns"] = ",".join(self.columns)
+        params["limit"] = self.limit
+        params["after"] = cursor
+        return urlencode(params)
+
+
+def parse_data_query(query_string) -> DataQuery:
+    """Parse and range-check the query string; identifiers are left to the caller."""
+    params = {}
+    for name, values in parse_qs(query_string or "", keep_blank_values=True).items():
+        if name not in _PARAMS:
+            raise ValueError(f"Unknown parameter {name!r}, expected one of {list(_PARAMS)}")
+        params[name] = values[-1]
+    query = DataQuery()
+    if params.get("columns"):
+        query.columns = [c.strip() for c in params["columns"].split(",") if c.strip()]
+        if not query.columns:
+            raise ValueError("Empty column list")
+    if "limit" in params:
+        try:
+            query.limit = int(params["limit"])
+        except ValueError:
+            raise ValueError(f"Invalid limit: {params['limit']!r}")
+        if not 0 < query.limit <= MAX_DATA_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_DATA_LIMIT}")
+    if params.get("after"):
+        query.after = params["after"]
+    if params.get("sample"):
+        try:
+            query.sample = float(params["sample"])
+        except ValueError:
+            raise ValueError(f"Invalid sample: {params['sample']!r}")
+        if not 0 < query.sample <= 100:
+            raise ValueError("sample must be a percentage between 0 and 100")
+    if params.get("sample_method"):
+        if params["sample_method"] not in SAMPLE_METHODS:
+            raise ValueError(f"Invalid sample_method, expected one of {list(SAMPLE_METHODS)}")
+        query.sample_method = params["sample_method"]
+    if query.sample is not None and query.after is not None:
+        raise ValueError("after cannot be combined with sample")
+    return query
+
+
+def decode_cursor(after, key_size):
+    """Return the key values of an after cursor for a key of key_size columns."""
+    if after.startswith("["):
+        try:
+            values = json.loads(after)
+        except json.JSONDecodeError:
+            raise ValueError(f"Invalid cursor: {after!r}")
+    elif key_size == 1:
+        values = [after]
+    else:
+        raise ValueError(f"Cursor for a {key_size} column key must be a JSON array")
+    if not isinstance(values, list) or len(values) != key_size:
+        raise ValueError(f"Cursor must have {key_size} values")
+    return values
+
+
+def encode_cursor(values) -> str:
+    """Inverse of decode_cursor."""
+    if len(values) == 1 and not str(values[0]).startswith("["):
+        return str(values[0])
+    return json.dumps(
+        [v if isinstance(v, (int, float, str)) or v is None else str(v) for v in values],
+        ensure_ascii=False,
+    )
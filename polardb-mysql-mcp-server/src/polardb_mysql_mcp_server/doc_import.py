@@ -1,14 +1,60 @@
 
+from concurrent.futures import ProcessPoolExecutor
 from langchain.text_splitter import MarkdownTextSplitter
 import mammoth
-from mysql.connector import connect, Error
+from mysql.connector import Error
+from polardb_mysql_mcp_server.pool import get_pool
+from polardb_mysql_mcp_server.embedding_cache import get_embedding_cache
+import collections
+import fnmatch
+import hashlib
 import logging
+import multiprocessing
 import os
 import re
 import time
 import json
 logger = logging.getLogger("polardb-mysql-mcp-server")
 DEFAULT_TABLE_NAME = "default_knowledge_base"
+DEFAULT_IMPORT_BATCH_SIZE = 32
+DEFAULT_IMPORT_PATTERNS = ("*.docx", "*.md")
+
+
+def get_import_batch_size():
+    """Number of chunks embedded per predict call and inserted per INSERT."""
+    return max(1, int(os.getenv("POLARDB_MYSQL_IMPORT_BATCH_SIZE", str(DEFAULT_IMPORT_BATCH_SIZE))))
+
+
+def get_import_workers():
+    """Number of processes parsing documents, 1 parses in the calling thread."""
+    default = min(4, os.cpu_count() or 1)
+    return max(1, int(os.getenv("POLARDB_MYSQL_IMPORT_WORKERS", str(default))))
+
+
+def _convert_image(image):
+    return []
+
+
+def _doc_to_markdown(file_path) -> str:
+    if file_path.endswith(".docx"):
+        with open(file_path, "rb") as doc_file:
+            result = mammoth.convert_to_markdown(doc_file, convert_image=_convert_image)
+            return result.value
+    with open(file_path, 'r', encoding='utf-8') as doc_file:
+        return doc_file.read()
+
+
+_splitters = {}
+
+
+def _split_file(file_path, chunk_size, chunk_overlap):
+    """Convert and split one document. Module level so worker processes can run it."""
+    splitter = _splitters.get((chunk_size, chunk_overlap))
+    if splitter is None:
+        splitter = MarkdownTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        _splitters[(chunk_size, chunk_overlap)] = splitter
+    return splitter.split_text(_doc_to_markdown(file_path))
+
 
 _IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
 
@@ -37,27 +83,100 @@ def _escape_sql_string(value):
 
 
 _VECTOR_RE = re.compile(r'^[\[\]\d.,eE+\-\s]+$')
+# rows of one import directory; rows stored before source_dir existed are
+# claimed by the first directory that imports a file of the same name
+_SOURCE_SCOPE = "(source_dir = %s or source_dir is null)"
+
+
+def _chunk_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _match_embeddings(rows, count):
+    """Vectors of (chunk_index, vector) rows, in either column order, placed
+    by chunk_index. None unless every index 0..count-1 appears exactly once."""
+    vects = [None] * count
+    for row in rows:
+        if len(row) != 2:
+            return None
+        key, vec = row if isinstance(row[1], str) and row[1].lstrip().startswith("[") else row[::-1]
+        try:
+            index = int(key)
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= index < count or vects[index] is not None or not isinstance(vec, str):
+            return None
+        vects[index] = vec
+    return vects if None not in vects else None
+
+
 class DocImport:
     def __init__(self,db_config,chunk_size_ =500,chunk_overlap_=50):
         self.text_splitter = MarkdownTextSplitter(chunk_size=chunk_size_, chunk_overlap=chunk_overlap_)
+        self.chunk_size = chunk_size_
+        self.chunk_overlap = chunk_overlap_
         self.config = db_config
+        self.embedding_cache = get_embedding_cache()
     def split_documents(self,file_path):
         texts = self.text_splitter.split_text(self.doc_to_markdown(file_path))
         return texts
     def _convert_image(self,image):
         return []
     def doc_to_markdown(self,file_path) -> str:
-        if file_path.endswith(".docx"):
-            with open(file_path, "rb") as doc_file:
-                result = mammoth.convert_to_markdown(doc_file, convert_image=self._convert_image)
-                markdown_text = result.value
-                return markdown_text
-        else:
-            with open(file_path, 'r', encoding='utf-8') as doc_file:
-                contents = doc_file.read()
-                return contents
+        return _doc_to_markdown(file_path)
+
+    def iter_chunks(self, docs, workers=None):
+        """Yield (file_name, texts) per document in order. With more than one
+        worker, documents are converted and split in a process pool with at most
+        two pending files per worker, so the caller can embed and insert the
+        chunks of one file while later files are still being parsed. Files that
+        fail to parse are logged and skipped."""
+        if workers is None:
+            workers = get_import_workers()
+        if workers <= 1 or len(docs) <= 1:
+            for file_path, file_name in docs:
+                try:
+                    yield file_name, self.split_documents(file_path)
+                except Exception as e:
+                    logger.error(f"Error parsing '{file_path}': {e}")
+            return
+        pending = collections.deque()
+        remaining = iter(docs)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            def submit_next():
+                doc = next(remaining, None)
+                if doc is not None:
+                    file_path, _ = doc
+                    pending.append((doc, executor.submit(
+                        _split_file, file_path, self.chunk_size, self.chunk_overlap)))
+            for _ in range(workers * 2):
+                submit_next()
+            while pending:
+                (file_path, file_name), future = pending.popleft()
+                submit_next()
+                try:
+                    texts = future.result()
+                except Exception as e:
+                    logger.error(f"Error parsing '{file_path}': {e}")
+                    continue
+                yield file_name, texts
+
+    def _cache_key(self, text):
+        scope = f"{self.config.get('host')}:{self.config.get('port')}/_polar4ai_text2vec"
+        return self.embedding_cache.make_key(scope, text)
 
     def text_to_vect(self, text):
+        key = self._cache_key(text)
+        vec = self.embedding_cache.get(key)
+        if vec is not None:
+            return vec
+        vec = self._embed(text)
+        if vec != "":
+            self.embedding_cache.put(key, vec)
+        return vec
+
+    def _embed(self, text):
         safe_text = _escape_sql_string(text)
         query_sql = f"/*polar4ai*/SELECT * FROM predict(model _polar4ai_text2vec, SELECT '{safe_text}') with();"
         rows, ok = self.exec_sql(query_sql)
@@ -69,13 +188,95 @@ class DocImport:
                 vec = rows[0][0]
                 return vec
         else:
-            return ""    
-    def exec_sql(self, sql):
+            return ""
+
+    def texts_to_vects(self, texts):
+        """Embed several texts, answering from the embedding cache where possible
+        and embedding the rest with a single predict call."""
+        keys = [self._cache_key(text) for text in texts]
+        vects = [self.embedding_cache.get(key) for key in keys]
+        missing = [i for i, vec in enumerate(vects) if vec is None]
+        if missing:
+            for i, vec in zip(missing, self._embed_many([texts[i] for i in missing])):
+                vects[i] = vec
+                if vec != "":
+                    self.embedding_cache.put(keys[i], vec)
+        return vects
+
+    def _embed_many(self, texts):
+        """Each input row carries its position as primary key, and vectors are
+        matched back on it since the rows of a UNION come back in no guaranteed
+        order. Falls back to one predict call per text if the result cannot be
+        matched to the inputs."""
+        if len(texts) == 1:
+            return [self._embed(texts[0])]
+        selects = " UNION ALL ".join(
+            f"SELECT {i} AS chunk_index, '{_escape_sql_string(text)}' AS chunk_content"
+            for i, text in enumerate(texts)
+        )
+        query_sql = (
+            f"/*polar4ai*/SELECT * FROM predict(model _polar4ai_text2vec, {selects}) "
+            f"with(x_cols='chunk_content', primary_key='chunk_index');"
+        )
+        rows, ok = self.exec_sql(query_sql)
+        vects = _match_embeddings(rows, len(texts)) if ok else None
+        if vects is not None:
+            return vects
+        logger.warning(
+            f"Batched embedding of {len(texts)} chunks returned "
+            f"{len(rows) if ok else 'an error'} rows that could not be matched, embedding one by one"
+        )
+        return [self._embed(text) for text in texts]
+
+    def insert_chunks(self, quoted_table, chunks):
+        """Insert (chunk_content, file_name, vec, file_mtime, chunk_hash, source_dir)
+        tuples with one multi-row INSERT in a single transaction. Returns the number
+        of rows inserted."""
+        values = ", ".join(["(%s, %s, string_to_vector(%s), %s, %s, %s)"] * len(chunks))
+        insert_sql = (
+            f"insert into {quoted_table} (chunk_content, file_name, vecs, file_mtime, chunk_hash, source_dir) "
+            f"values {values}"
+        )
+        params = [value for chunk in chunks for value in chunk]
+        try:
+            with get_pool(self.config).connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(insert_sql, params)
+                conn.commit()
+                return len(chunks)
+        except Error as e:
+            logger.error(f"Error inserting {len(chunks)} chunks into {quoted_table}: {e}")
+            return 0
+
+    def _import_batch(self, quoted_table, batch, source_dir):
+        """Embed and insert a list of (text, file_name, file_mtime, chunk_hash)
+        read from source_dir. Returns (rows inserted, names of files with chunks
+        that were not inserted)."""
+        vects = self.texts_to_vects([text for text, _, _, _ in batch])
+        chunks = []
+        failed = set()
+        for (text, file_name, mtime, chunk_hash), vec in zip(batch, vects):
+            if vec == "":
+                failed.add(file_name)
+                continue
+            if not _VECTOR_RE.match(vec):
+                logger.error("Refusing to insert non-numeric vector literal")
+                failed.add(file_name)
+                continue
+            chunks.append((text, file_name, vec, mtime, chunk_hash, source_dir))
+        if not chunks:
+            return 0, failed
+        inserted = self.insert_chunks(quoted_table, chunks)
+        if not inserted:
+            failed.update(chunk[1] for chunk in chunks)
+        return inserted, failed
+
+    def exec_sql(self, sql, params=None):
         rows=[]
         try:
-            with connect(**self.config) as conn:
+            with get_pool(self.config).connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute(sql)
+                    cursor.execute(sql, params)
                     if cursor.description is not None:
                         return cursor.fetchall(),True
                     else:
@@ -85,13 +286,90 @@ class DocImport:
             logger.error(f"Error executing SQL '{sql}': {e}")
             return rows,False
 
-    def get_all_docxs(self, dir):
+    def exec_in_transaction(self, statements):
+        """Run (sql, params) statements in one transaction. Returns the total
+        number of affected rows, or None if anything failed and was rolled back."""
+        try:
+            with get_pool(self.config).connection() as conn:
+                affected = 0
+                with conn.cursor() as cursor:
+                    for sql, params in statements:
+                        cursor.execute(sql, params)
+                        affected += max(cursor.rowcount, 0)
+                conn.commit()
+                return affected
+        except Error as e:
+            logger.error(f"Error executing {len(statements)} statements in a transaction: {e}")
+            return None
+
+    def ensure_manifest_columns(self, quoted_table, table_name):
+        """Add the file_mtime/chunk_hash/source_dir columns to knowledge bases
+        created before incremental import existed."""
+        rows, ok = self.exec_sql(
+            "select COLUMN_NAME from information_schema.COLUMNS "
+            "where TABLE_SCHEMA = DATABASE() and TABLE_NAME = %s",
+            (table_name,),
+        )
+        if not ok:
+            return False
+        columns = {row[0].lower() for row in rows}
+        additions = []
+        if "file_mtime" not in columns:
+            additions.append("add column file_mtime double")
+        if "chunk_hash" not in columns:
+            additions.append("add column chunk_hash char(32)")
+        if "source_dir" not in columns:
+            additions.append("add column source_dir varchar(1024)")
+        if not additions:
+            return True
+        _, ok = self.exec_sql(f"alter table {quoted_table} {', '.join(additions)}")
+        return ok
+
+    def load_manifest(self, quoted_table, source_dir):
+        """Map file_name -> (set of stored file_mtime values, {chunk_hash: [ids]})
+        for the files imported from source_dir, file_name being relative to it.
+        Returns None if the table could not be read."""
+        rows, ok = self.exec_sql(
+            f"select id, file_name, file_mtime, chunk_hash from {quoted_table} where {_SOURCE_SCOPE}",
+            (source_dir,),
+        )
+        if not ok:
+            return None
+        manifest = {}
+        for row_id, file_name, mtime, chunk_hash in rows:
+            mtimes, chunks = manifest.setdefault(file_name, (set(), {}))
+            mtimes.add(mtime)
+            chunks.setdefault(chunk_hash, []).append(row_id)
+        return manifest
+
+    def finish_file(self, quoted_table, source_dir, file_name, mtime, stale_ids):
+        """Once all new chunks of a file are stored, drop its outdated chunks and
+        stamp the remaining ones with the file's mtime. Returns rows removed."""
+        statements = [
+            (f"delete from {quoted_table} where id in ({', '.join(['%s'] * len(ids))})", ids)
+            for ids in (stale_ids[i:i + 1000] for i in range(0, len(stale_ids), 1000))
+        ]
+        statements.append((
+            f"update {quoted_table} set file_mtime = %s, source_dir = %s where file_name = %s and {_SOURCE_SCOPE}",
+            (mtime, source_dir, file_name, source_dir),
+        ))
+        if self.exec_in_transaction(statements) is None:
+            return 0
+        return len(stale_ids)
+
+    def get_all_docxs(self, dir, patterns=None, recursive=False):
+        """List (path, name) of files matching any of the glob patterns, name
+        being the path relative to dir. Subdirectories are walked if recursive."""
+        patterns = patterns or DEFAULT_IMPORT_PATTERNS
         result = []
-        files_and_dirs = os.listdir(dir)
-        for file_or_dir in files_and_dirs:
-            file_path = os.path.join(dir, file_or_dir)
-            if os.path.isfile(file_path) and (file_or_dir.endswith('docx') or file_or_dir.endswith('md')):
-                result.append((file_path, file_or_dir))
+        for root, dirs, files in os.walk(dir):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                if any(fnmatch.fnmatch(file_name, pattern) for pattern in patterns):
+                    result.append((file_path, os.path.relpath(file_path, dir)))
+            if not recursive:
+                break
         return result
 
     def text_deal(self, text):
@@ -103,7 +381,13 @@ class DocImport:
         text = text.replace("*/","./")
         return text
                   
-    def import_doc(self, dir, table='') -> str:
+    def import_doc(self, dir, table='', patterns=None, recursive=False, prune=False) -> str:
+        """Import matching files into the knowledge base incrementally. Files whose
+        stored mtime is unchanged are skipped, changed files only embed chunks
+        whose content hash is new and lose chunks that disappeared. With prune,
+        chunks of files no longer found under dir are deleted too. Files are
+        tracked per import directory, so directories sharing a table never touch
+        each other's chunks."""
         if table == '':
             table_name = DEFAULT_TABLE_NAME
         else:
@@ -121,6 +405,9 @@ class DocImport:
             chunk_content text, 
             file_name varchar(256),
             vecs vector(768), 
+            file_mtime double,
+            chunk_hash char(32),
+            source_dir varchar(1024),
             primary key(id)
             )comment 'columnar=1';
         """
@@ -128,34 +415,90 @@ class DocImport:
         if not ok:
             logger.error(f"Error creating table '{table_name}'")
             return  f"Error creating table '{table_name}'"
-        docs = self.get_all_docxs(dir)
+        if not self.ensure_manifest_columns(quoted_table, table_name):
+            return f"Error adding manifest columns to table '{table_name}'"
+        source_dir = os.path.realpath(dir)
+        manifest = self.load_manifest(quoted_table, source_dir)
+        if manifest is None:
+            return f"Error reading table '{table_name}'"
+        docs = self.get_all_docxs(dir, patterns, recursive)
+        # files whose chunks all carry the current mtime need no parsing at all
+        mtimes = {}
+        changed = []
+        for file_path, file_name in docs:
+            mtimes[file_name] = os.stat(file_path).st_mtime
+            known = manifest.get(file_name)
+            if known is None or known[0] != {mtimes[file_name]}:
+                changed.append((file_path, file_name))
+        batch_size = get_import_batch_size()
+        started = time.monotonic()
         entry_count = 0
+        kept_count = 0
+        removed_count = 0
         file_count = 0
-        for doc in docs:
+        batch = []
+        pending = collections.Counter()
+        failed = set()
+        # parsed files waiting for their new chunks to be stored -> stale row ids
+        parsed = {}
+
+        def flush():
+            inserted, batch_failed = self._import_batch(quoted_table, batch, source_dir)
+            for _, file_name, _, _ in batch:
+                pending[file_name] -= 1
+            failed.update(batch_failed)
+            batch.clear()
+            return inserted
+
+        def finish_ready():
+            removed = 0
+            for file_name in [name for name in parsed if not pending[name]]:
+                stale_ids = parsed.pop(file_name)
+                # a file with missing chunks keeps its old mtime and is redone next time
+                if file_name not in failed:
+                    removed += self.finish_file(quoted_table, source_dir, file_name, mtimes[file_name], stale_ids)
+            return removed
+
+        for file_name, texts in self.iter_chunks(changed):
             file_count += 1
-            file_path, file_name = doc
-            texts = self.split_documents(file_path)
+            _, known_chunks = manifest.get(file_name, (None, {}))
+            unused = {chunk_hash: list(ids) for chunk_hash, ids in known_chunks.items()}
             for text in texts:
                 text = self.text_deal(text)
-                vec = self.text_to_vect(text)
-                if vec != "":
-                    if not _VECTOR_RE.match(vec):
-                        logger.error("Refusing to insert non-numeric vector literal")
-                        continue
-                    safe_text = _escape_sql_string(text)
-                    safe_file = _escape_sql_string(file_name)
-                    insert_sql = (
-                        f"insert into {quoted_table} (chunk_content, file_name, vecs) "
-                        f"values ('{safe_text}', '{safe_file}', string_to_vector(\"{vec}\"))"
-                    )
-                    rows, ok = self.exec_sql(insert_sql)
-                    if not ok:
-                        logger.error(f"Error inserting into table '{table_name}'")
-                    else:
-                        entry_count += 1
-        logger.info(f"success import {entry_count} entries with {file_count} files to table({table_name})")
-        return f"success import {entry_count} entries with {file_count} files"
-    
+                chunk_hash = _chunk_hash(text)
+                if unused.get(chunk_hash):
+                    unused[chunk_hash].pop()
+                    kept_count += 1
+                    continue
+                batch.append((text, file_name, mtimes[file_name], chunk_hash))
+                pending[file_name] += 1
+                if len(batch) >= batch_size:
+                    entry_count += flush()
+                    removed_count += finish_ready()
+            parsed[file_name] = [row_id for ids in unused.values() for row_id in ids]
+            removed_count += finish_ready()
+        if batch:
+            entry_count += flush()
+        removed_count += finish_ready()
+        if prune:
+            deleted = [(f"delete from {quoted_table} where file_name = %s and {_SOURCE_SCOPE}",
+                         (file_name, source_dir))
+                       for file_name in manifest if file_name not in mtimes]
+            if deleted:
+                removed_count += self.exec_in_transaction(deleted) or 0
+        elapsed = time.monotonic() - started
+        rate = entry_count / elapsed if elapsed > 0 else 0.0
+        skipped = len(docs) - len(changed)
+        logger.info(
+            f"success import {entry_count} entries with {file_count} files to table({table_name}) "
+            f"in {elapsed:.1f}s ({rate:.1f} chunks/s), {skipped} files unchanged, "
+            f"{kept_count} chunks kept, {removed_count} chunks removed"
+        )
+        return (
+            f"success import {entry_count} entries with {file_count} files ({rate:.1f} chunks/s), "
+            f"{skipped} files unchanged, {kept_count} chunks kept, {removed_count} chunks removed"
+        )
+
     def query_knowledge(self, text: str,count=5,table=''):
         text = self.text_deal(text)
         vec = self.text_to_vect(text)
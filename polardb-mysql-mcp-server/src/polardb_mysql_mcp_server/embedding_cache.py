@@ -0,0 +1,212 @@
+import collections
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("polardb-mysql-mcp-server")
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 24 * 3600
+DEFAULT_DISK_CACHE_SIZE = 100000
+
+
+def get_embedding_cache_settings():
+    """Get embedding cache settings from environment variables.
+
+    A size of 0 disables the memory tier, an empty path disables the disk tier
+    and a ttl of 0 keeps entries until they are evicted for space.
+    """
+    return {
+        "max_entries": int(os.getenv("POLARDB_MYSQL_EMBEDDING_CACHE_SIZE", str(DEFAULT_CACHE_SIZE))),
+        "ttl": float(os.getenv("POLARDB_MYSQL_EMBEDDING_CACHE_TTL", str(DEFAULT_CACHE_TTL))),
+        "path": os.getenv("POLARDB_MYSQL_EMBEDDING_CACHE_PATH") or None,
+        "max_disk_entries": int(
+            os.getenv("POLARDB_MYSQL_EMBEDDING_CACHE_DISK_SIZE", str(DEFAULT_DISK_CACHE_SIZE))
+        ),
+    }
+
+
+def normalize_text(text):
+    """Collapse runs of whitespace so trivially different texts share an entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """Two-tier cache of embedding vectors keyed by model scope and normalized text.
+
+    The memory tier is an LRU of at most ``max_entries`` vectors. With a
+    ``path``, vectors are also kept in a sqlite file of at most
+    ``max_disk_entries`` rows, evicted least recently used first, which
+    survives restarts and is shared by processes on the same host. Entries
+    older than ``ttl`` seconds are treated as missing in both tiers.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, path=None,
+                 max_disk_entries=DEFAULT_DISK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        # key -> (vector, stored_at); the right end holds the most recently used
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, vector TEXT NOT NULL, "
+                    "stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings(used_at)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Disabling on-disk embedding cache at {path}: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(scope, text):
+        data = f"{scope}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _expired(self, stored_at, now):
+        return self.ttl > 0 and now - stored_at > self.ttl
+
+    def get(self, key):
+        """Return the cached vector or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._memory[key]
+            entry = self._disk_get_locked(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put_locked(key, entry)
+            return entry[0]
+
+    def put(self, key, vector):
+        entry = (vector, time.time())
+        with self._lock:
+            self._memory_put_locked(key, entry)
+            self._disk_put_locked(key, entry)
+
+    def _memory_put_locked(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get_locked(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT vector, stored_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[1], now):
+                self._db.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE embeddings SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0], row[1]
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return None
+
+    def _disk_put_locked(self, key, entry):
+        if self._db is None:
+            return
+        vector, stored_at = entry
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, vector, stored_at, stored_at),
+            )
+            self._disk_writes += 1
+            # trimming needs a scan, so do it once every few hundred writes
+            if self._disk_writes % 256 == 1:
+                self._trim_disk_locked(stored_at)
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _trim_disk_locked(self, now):
+        if self.ttl > 0:
+            self._db.execute("DELETE FROM embeddings WHERE stored_at < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+            if self._db is not None:
+                try:
+                    stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+                stats["path"] = self.path
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_embedding_cache_settings()
+            _cache = EmbeddingCache(**settings)
+            logger.info(
+                f"Created embedding cache (size={settings['max_entries']}, ttl={settings['ttl']}s, "
+                f"path={settings['path']})"
+            )
+        return _cache
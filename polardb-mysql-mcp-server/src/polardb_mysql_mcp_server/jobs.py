@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+import secrets
+import time
+
+logger = logging.getLogger("polardb-mysql-mcp-server")
+
+DEFAULT_MAX_JOBS = 8
+DEFAULT_JOB_POLL_INTERVAL = 5
+DEFAULT_JOB_TIMEOUT = 3600
+DEFAULT_JOB_RETENTION = 3600
+
+JOB_STATES = ("running", "succeeded", "failed", "cancelled")
+
+
+def get_job_settings():
+    """Get background job settings from environment variables."""
+    return {
+        "max_jobs": int(os.getenv("POLARDB_MYSQL_MAX_JOBS", str(DEFAULT_MAX_JOBS))),
+        "poll_interval": float(os.getenv("POLARDB_MYSQL_JOB_POLL_INTERVAL", str(DEFAULT_JOB_POLL_INTERVAL))),
+        "timeout": float(os.getenv("POLARDB_MYSQL_JOB_TIMEOUT", str(DEFAULT_JOB_TIMEOUT))),
+        "retention": float(os.getenv("POLARDB_MYSQL_JOB_RETENTION", str(DEFAULT_JOB_RETENTION))),
+    }
+
+
+class JobFailed(Exception):
+    """Raised by a job coroutine when the operation it drives failed."""
+
+
+class Job:
+    """One background operation. The coroutine updates ``progress`` while it
+    runs and returns the tool result as a list of TextContent."""
+
+    def __init__(self, kind, description):
+        self.job_id = secrets.token_hex(8)
+        self.kind = kind
+        self.description = description
+        self.state = "running"
+        self.progress = "submitted"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def done(self):
+        return self.state != "running"
+
+    def status(self):
+        status = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "description": self.description,
+            "state": self.state,
+            "progress": self.progress,
+            "elapsed": round((self.finished_at or time.time()) - self.created_at, 1),
+        }
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class JobManager:
+    """Runs jobs as tasks on the server's event loop.
+
+    At most ``max_jobs`` run at once, each is cancelled after ``timeout``
+    seconds, and finished jobs are forgotten ``retention`` seconds after they
+    end. Cancelling a job stops the polling here; an operation PolarDB has
+    already accepted may still complete on the AI node.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, poll_interval=DEFAULT_JOB_POLL_INTERVAL,
+                 timeout=DEFAULT_JOB_TIMEOUT, retention=DEFAULT_JOB_RETENTION):
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.retention = retention
+        self._jobs = {}
+
+    def _prune(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.done and now - job.finished_at > self.retention:
+                del self._jobs[job_id]
+
+    def submit(self, kind, description, run) -> Job:
+        """Start ``run(job)``, a coroutine function, as a background job."""
+        self._prune()
+        running = sum(1 for job in self._jobs.values() if not job.done)
+        if running >= self.max_jobs:
+            raise ValueError(f"Too many running jobs (max {self.max_jobs}), wait for one to finish")
+        job = Job(kind, description)
+        self._jobs[job.job_id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job, run))
+        job.task.add_done_callback(lambda task: self._cancelled_early(job, task))
+        logger.info(f"Submitted job {job.job_id}: {kind} {description}")
+        return job
+
+    async def _run(self, job, run):
+        try:
+            job.result = await asyncio.wait_for(run(job), self.timeout)
+            job.state = "succeeded"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+        except asyncio.TimeoutError:
+            job.state = "failed"
+            job.error = f"timed out after {int(self.timeout)}s"
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e!r}")
+            job.state = "failed"
+            job.error = str(e) or repr(e)
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Job {job.job_id} {job.state}")
+
+    def _cancelled_early(self, job, task):
+        # a task cancelled before it started never ran the handlers in _run
+        if task.cancelled() and not job.done:
+            job.state = "cancelled"
+            job.finished_at = time.time()
+
+    def get(self, job_id) -> Job:
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown or expired job: {job_id}")
+        return job
+
+    def jobs(self):
+        self._prune()
+        return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def cancel(self, job_id) -> Job:
+        job = self.get(job_id)
+        if not job.done:
+            job.task.cancel()
+        return job
+
+    def stats(self):
+        states = {state: 0 for state in JOB_STATES}
+        for job in self._jobs.values():
+            states[job.state] += 1
+        return states
+
+
+_manager = None
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager configured from the environment."""
+    global _manager
+    if _manager is None:
+        _manager = JobManager(**get_job_settings())
+    return _manager
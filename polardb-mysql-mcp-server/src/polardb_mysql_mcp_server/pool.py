@@ -0,0 +1,336 @@
+from contextlib import contextmanager, asynccontextmanager
+from mysql.connector import connect, Error
+from mysql.connector.errors import PoolError
+import asyncio
+import collections
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("polardb-mysql-mcp-server")
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 30
+DEFAULT_POOL_MAX_IDLE = 300
+
+
+def get_pool_settings():
+    """Get connection pool settings from environment variables."""
+    return {
+        "size": int(os.getenv("POLARDB_MYSQL_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+        "timeout": float(os.getenv("POLARDB_MYSQL_POOL_TIMEOUT", str(DEFAULT_POOL_TIMEOUT))),
+        "max_idle": float(os.getenv("POLARDB_MYSQL_POOL_MAX_IDLE", str(DEFAULT_POOL_MAX_IDLE))),
+    }
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception as e:
+        logger.debug(f"Ignoring error while closing pooled connection: {e}")
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of mysql-connector connections.
+
+    At most ``size`` connections exist at once; borrowers wait up to ``timeout``
+    seconds for a free slot and get a PoolError after that. Idle connections are
+    pinged before being handed out and closed once idle longer than ``max_idle``.
+    """
+
+    def __init__(self, config, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT,
+                 max_idle=DEFAULT_POOL_MAX_IDLE):
+        if size <= 0:
+            raise ValueError(f"Invalid pool size: {size!r}")
+        self.config = dict(config)
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        # (connection, released_at); the right end holds the most recently used
+        self._idle = collections.deque()
+        self._discarded = set()
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _evict_expired_locked(self, now):
+        expired = []
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._created -= 1
+            expired.append(conn)
+        if expired:
+            self._cond.notify(len(expired))
+        return expired
+
+    def _is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error as e:
+            logger.info(f"Dropping dead pooled connection: {e}")
+            return False
+
+    def acquire(self):
+        """Borrow a connection, creating one if the pool is below its size limit."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            expired = []
+            with self._cond:
+                while True:
+                    expired.extend(self._evict_expired_locked(time.monotonic()))
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        conn = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolError(
+                            f"Timed out after {self.timeout}s waiting for a connection "
+                            f"(pool size {self.size})"
+                        )
+                    self._cond.wait(remaining)
+            for stale in expired:
+                _close_quietly(stale)
+            if conn is None:
+                try:
+                    return connect(**self.config)
+                except BaseException:
+                    self._forget()
+                    raise
+            if self._is_healthy(conn):
+                return conn
+            _close_quietly(conn)
+            self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def discard(self, conn):
+        """Mark a borrowed connection to be closed instead of reused on release."""
+        with self._cond:
+            self._discarded.add(id(conn))
+
+    def release(self, conn):
+        """Return a borrowed connection, ending any transaction it left open."""
+        with self._cond:
+            discard = id(conn) in self._discarded
+            self._discarded.discard(id(conn))
+        if not discard:
+            try:
+                # an unread result would have to be drained row by row; cheaper to reconnect
+                if conn.unread_result or not conn.is_connected():
+                    discard = True
+                elif conn.in_transaction:
+                    conn.rollback()
+            except Error as e:
+                logger.info(f"Dropping pooled connection that failed to reset: {e}")
+                discard = True
+        if discard:
+            _close_quietly(conn)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections; borrowed ones are closed when released."""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._created -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(config):
+    return tuple(sorted((k, repr(v)) for k, v in config.items()))
+
+
+def get_pool(config) -> ConnectionPool:
+    """Return the process-wide pool for this connection config, creating it on first use."""
+    key = _pool_key(config)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = get_pool_settings()
+            pool = ConnectionPool(config, **settings)
+            _pools[key] = pool
+            logger.info(
+                f"Created connection pool for {config.get('host')}:{config.get('port')}/"
+                f"{config.get('database')} (size={settings['size']}, timeout={settings['timeout']}s, "
+                f"max_idle={settings['max_idle']}s)"
+            )
+        return pool
+
+
+def pool_stats():
+    """Stats of every process-wide pool, for the stats resource."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [
+        dict(pool.stats(), host=pool.config.get("host"), port=pool.config.get("port"),
+             database=pool.config.get("database"))
+        for pool in pools
+    ]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _async_error(e):
+    """Convert an aiomysql/pymysql error into a mysql.connector Error so callers
+    handle both backends with the same except clauses."""
+    errno = e.args[0] if e.args and isinstance(e.args[0], int) else None
+    msg = e.args[1] if len(e.args) > 1 else str(e)
+    return Error(msg=msg, errno=errno)
+
+
+class AsyncConnectionPool:
+    """aiomysql-backed pool with the same sizing, timeout and idle policy as
+    ConnectionPool, for use directly on the event loop."""
+
+    def __init__(self, config, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT,
+                 max_idle=DEFAULT_POOL_MAX_IDLE):
+        self.config = dict(config)
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    try:
+                        import aiomysql
+                    except ImportError as e:
+                        raise RuntimeError(
+                            "POLARDB_MYSQL_ASYNC requires aiomysql, "
+                            "install polardb-mysql-mcp-server[async]"
+                        ) from e
+                    self._aiomysql = aiomysql
+                    try:
+                        self._pool = await aiomysql.create_pool(
+                            minsize=0,
+                            maxsize=self.size,
+                            pool_recycle=int(self.max_idle),
+                            host=self.config["host"],
+                            port=self.config["port"],
+                            user=self.config["user"],
+                            password=self.config["password"],
+                            db=self.config["database"],
+                            charset="utf8mb4",
+                            autocommit=False,
+                        )
+                    except aiomysql.Error as e:
+                        raise _async_error(e) from e
+        return self._pool
+
+    async def acquire(self):
+        pool = await self._get_pool()
+        while True:
+            try:
+                conn = await asyncio.wait_for(pool.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                raise PoolError(
+                    f"Timed out after {self.timeout}s waiting for a connection "
+                    f"(pool size {self.size})"
+                )
+            except self._aiomysql.Error as e:
+                raise _async_error(e) from e
+            try:
+                await conn.ping(reconnect=False)
+                return conn
+            except self._aiomysql.Error as e:
+                logger.info(f"Dropping dead pooled connection: {e}")
+                conn.close()
+                await pool.release(conn)
+
+    async def release(self, conn):
+        if not conn.closed and conn.get_transaction_status():
+            try:
+                await conn.rollback()
+            except self._aiomysql.Error as e:
+                logger.info(f"Dropping pooled connection that failed to reset: {e}")
+                conn.close()
+        await self._pool.release(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        except self._aiomysql.Error as e:
+            raise _async_error(e) from e
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # the server may still be sending the interrupted result
+            conn.close()
+            raise
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+
+_async_pools = {}
+
+
+def get_async_pool(config) -> AsyncConnectionPool:
+    """Return the pool for this connection config on the running event loop."""
+    key = (id(asyncio.get_running_loop()),) + _pool_key(config)
+    pool = _async_pools.get(key)
+    if pool is None:
+        settings = get_pool_settings()
+        pool = AsyncConnectionPool(config, **settings)
+        _async_pools[key] = pool
+        logger.info(
+            f"Created async connection pool for {config.get('host')}:{config.get('port')}/"
+            f"{config.get('database')} (size={settings['size']}, timeout={settings['timeout']}s, "
+            f"max_idle={settings['max_idle']}s)"
+        )
+    return pool
+
+
+async def close_async_pools():
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _async_pools if k[0] == loop_id]:
+        await _async_pools.pop(key).close()
@@ -0,0 +1,247 @@
+import collections
+import hashlib
+import os
+import re
+import threading
+import time
+
+from polardb_mysql_mcp_server.routing import is_read_only
+
+DEFAULT_RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RESULT_CACHE_TTL = 60
+
+_QUOTED = r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\""
+# whitespace is collapsed outside literals only, 'a  b' and 'a b' are different queries
+_NORMALIZE_RE = re.compile(_QUOTED + r"|\s+")
+_LITERALS_RE = re.compile(_QUOTED)
+# functions need their parentheses so columns called user or schema still cache,
+# the keywords that can be written without them are matched bare
+_NONDETERMINISTIC_RE = re.compile(
+    r"\b(?:now|sysdate|curdate|curtime|utc_date|utc_time|utc_timestamp|unix_timestamp|rand|uuid"
+    r"|uuid_short|connection_id|user|session_user|system_user|database|schema|sleep|benchmark)\s*\("
+    r"|\b(?:current_date|current_time|current_timestamp|current_user|localtime|localtimestamp)\b",
+    re.IGNORECASE,
+)
+_IDENTIFIER = r"(?:`[^`]+`|[\w$]+)(?:\s*\.\s*(?:`[^`]+`|[\w$]+))?"
+_IDENTIFIER_RE = re.compile(_IDENTIFIER)
+# comma-joined tables may carry aliases, the last one is followed by anything;
+# LOAD DATA writes INTO TABLE t
+_TABLE_LIST_RE = re.compile(
+    r"\b(?:from|join|update|into(?:\s+table)?|table)\s+((?:" + _IDENTIFIER + r"(?:\s+(?:as\s+)?[\w$]+)?\s*,\s*)*"
+    + _IDENTIFIER + ")",
+    re.IGNORECASE,
+)
+_DML_OPERATIONS = {"INSERT", "UPDATE", "DELETE"}
+_LEADING_COMMENTS_RE = re.compile(r"^(?:\s+|/\*.*?\*/|(?:--\s|#)[^\n]*\n?|\()*", re.DOTALL)
+# SHOW, DESCRIBE and EXPLAIN output and the system schemas change without any
+# write to a table, e.g. SHOW PROCESSLIST or performance_schema.global_status
+_METADATA_STATEMENT_RE = re.compile(r"(?:show|desc|describe|explain)\b", re.IGNORECASE)
+SYSTEM_SCHEMAS = {"information_schema", "performance_schema", "mysql", "sys"}
+_SYSTEM_SCHEMA_RE = re.compile(
+    r"(?<![\w$])`?(?:" + "|".join(sorted(SYSTEM_SCHEMAS)) + r")`?\s*\.", re.IGNORECASE
+)
+# _by_table key of the entries that read a view or a table not known to be a
+# base table: a write to any table may change them
+_ANY_TABLE = None
+
+
+def _env_bool(name, default="false"):
+    return os.getenv(name, default).lower() == "true"
+
+
+def get_result_cache_settings():
+    """Get result cache settings from environment variables."""
+    return {
+        "enabled": _env_bool("POLARDB_MYSQL_RESULT_CACHE"),
+        "max_bytes": int(os.getenv("POLARDB_MYSQL_RESULT_CACHE_MAX_BYTES", str(DEFAULT_RESULT_CACHE_MAX_BYTES))),
+        "ttl": float(os.getenv("POLARDB_MYSQL_RESULT_CACHE_TTL", str(DEFAULT_RESULT_CACHE_TTL))),
+    }
+
+
+def normalize_sql(query):
+    def replace(m):
+        return " " if m.group(0).isspace() else m.group(0)
+    return _NORMALIZE_RE.sub(replace, query).strip().rstrip(";").rstrip()
+
+
+def referenced_tables(query):
+    """Lower-cased names of the tables after FROM, JOIN, UPDATE, INTO and TABLE
+    in query, without database qualifiers."""
+    tables = set()
+    for m in _TABLE_LIST_RE.finditer(_LITERALS_RE.sub("''", query)):
+        for part in m.group(1).split(","):
+            name = _IDENTIFIER_RE.match(part.strip()).group(0)
+            tables.add(re.split(r"\s*\.\s*", name)[-1].strip("`").lower())
+    return tables
+
+
+def is_cacheable(query, operations, database=None):
+    """Whether the result of query only depends on table contents: a read-only
+    SELECT or WITH without time, random or session functions that does not
+    read a system schema."""
+    if not is_read_only(query, operations):
+        return False
+    if database and database.lower() in SYSTEM_SCHEMAS:
+        return False
+    if _METADATA_STATEMENT_RE.match(_LEADING_COMMENTS_RE.sub("", query, count=1)):
+        return False
+    query = _LITERALS_RE.sub("''", query)
+    return not _NONDETERMINISTIC_RE.search(query) and not _SYSTEM_SCHEMA_RE.search(query)
+
+
+class ResultCache:
+    """Byte-bounded LRU of execute_sql results with a per-entry TTL.
+
+    Entries are keyed by normalized SQL, result format, server, database and
+    user, and remember the tables they read so writes through this server
+    drop only the affected entries. A write to a base table also changes the
+    views over it, so entries that read a view, or a name not known to be a
+    base table, are dropped by every write. DDL, and writes whose target
+    tables cannot be told, drop everything. Changes made by other clients are
+    only picked up when the TTL expires.
+
+    Every invalidation bumps a generation of the tables it covers. A read
+    takes a ``token`` of those generations before it runs and ``put`` skips
+    its result if a write invalidated one of its tables in the meantime, as
+    the rows may have been read before the write committed.
+    """
+
+    def __init__(self, enabled=False, max_bytes=DEFAULT_RESULT_CACHE_MAX_BYTES, ttl=DEFAULT_RESULT_CACHE_TTL):
+        self.enabled = enabled and max_bytes > 0 and ttl > 0
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (result, tables, size, stored_at)
+        self._entries = collections.OrderedDict()
+        self._by_table = collections.defaultdict(set)
+        # table -> number of invalidations of it; _writes counts those of any
+        # table and _clears those of everything
+        self._generations = collections.Counter()
+        self._writes = 0
+        self._clears = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, config, query, result_format):
+        text = "\0".join([
+            str(config.get("host")), str(config.get("port")), str(config.get("database")),
+            str(config.get("user")), result_format or "", normalize_sql(query),
+        ])
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _remove_locked(self, key):
+        result, tables, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get(self, key):
+        """Cached result for key as a new list, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[3] > self.ttl:
+                self._remove_locked(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def token(self, query):
+        """Generations of the tables query reads, taken before running it and
+        passed to put."""
+        tables = referenced_tables(query)
+        with self._lock:
+            return self._clears, self._writes, {table: self._generations[table] for table in tables}
+
+    def put(self, key, result, query, token, base_tables=None):
+        """Cache result unless a write invalidated the tables of query since
+        token was taken. base_tables are the lower-cased names known to be
+        base tables rather than views; without them every table is treated
+        as a possible view."""
+        size = sum(len(getattr(item, "text", "")) for item in result)
+        if size > self.max_bytes:
+            return
+        tables = referenced_tables(query)
+        reads_view = not tables or base_tables is None or not tables <= base_tables
+        clears, writes, generations = token
+        with self._lock:
+            if clears != self._clears or (reads_view and writes != self._writes) or any(
+                    self._generations[table] != generation for table, generation in generations.items()):
+                return
+            if key in self._entries:
+                self._remove_locked(key)
+            if reads_view:
+                tables = tables | {_ANY_TABLE}
+            self._entries[key] = (list(result), tables, size, time.monotonic())
+            self._bytes += size
+            for table in tables:
+                self._by_table[table].add(key)
+            while self._bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tables(self, tables):
+        with self._lock:
+            self._writes += 1
+            keys = set(self._by_table.get(_ANY_TABLE, ()))
+            for table in tables:
+                self._generations[table] += 1
+                keys.update(self._by_table.get(table, ()))
+            for key in keys:
+                self._remove_locked(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._clears += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def invalidate_statement(self, query, operations):
+        """Drop the entries a non read-only statement may have made stale."""
+        tables = referenced_tables(query) if operations and operations <= _DML_OPERATIONS else set()
+        if tables:
+            self.invalidate_tables(tables)
+        else:
+            self.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(**get_result_cache_settings())
+        return _cache
@@ -0,0 +1,97 @@
+from mcp.types import TextContent
+import os
+
+DEFAULT_MAX_ROWS = 10000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_CHUNK_BYTES = 64 * 1024
+DEFAULT_FETCH_SIZE = 1000
+
+
+def get_result_limits():
+    """Get result size limits from environment variables, 0 means unlimited."""
+    return {
+        "max_rows": int(os.getenv("POLARDB_MYSQL_MAX_ROWS", str(DEFAULT_MAX_ROWS))),
+        "max_bytes": int(os.getenv("POLARDB_MYSQL_MAX_RESULT_BYTES", str(DEFAULT_MAX_BYTES))),
+        "chunk_bytes": int(os.getenv("POLARDB_MYSQL_RESULT_CHUNK_BYTES", str(DEFAULT_CHUNK_BYTES))),
+    }
+
+
+def get_fetch_size():
+    return max(1, int(os.getenv("POLARDB_MYSQL_FETCH_SIZE", str(DEFAULT_FETCH_SIZE))))
+
+
+class ResultWriter:
+    """Serializes a result set batch by batch through a ResultEncoder into
+    TextContent chunks of about ``chunk_bytes`` each, refusing rows beyond
+    ``max_rows``/``max_bytes`` so the caller can stop fetching early."""
+
+    def __init__(self, encoder, max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_BYTES,
+                 chunk_bytes=DEFAULT_CHUNK_BYTES):
+        self.encoder = encoder
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+        self.row_count = 0
+        self.byte_count = 0
+        self.truncated = False
+        self._chunks = []
+        self._parts = []
+        self._chunk_size = 0
+        header = encoder.header()
+        if header:
+            self._append(header, len(header.encode("utf-8")), 0)
+
+    def _append(self, text, size, row_count):
+        if self._parts and (not self.encoder.concatenable or self._chunk_size + size > self.chunk_bytes):
+            self._flush()
+        self._parts.append(text)
+        self._chunk_size += size
+        self.byte_count += size
+        self.row_count += row_count
+
+    def _flush(self):
+        if self._parts:
+            self._chunks.append(TextContent(type="text", text="".join(self._parts)))
+            self._parts = []
+            self._chunk_size = 0
+
+    def _add_block(self, rows):
+        text = self.encoder.encode(rows)
+        size = len(text.encode("utf-8"))
+        over_budget = self.max_bytes and self.byte_count + size > self.max_bytes
+        if over_budget or size > self.chunk_bytes:
+            if len(rows) > 1:
+                half = len(rows) // 2
+                return self._add_block(rows[:half]) and self._add_block(rows[half:])
+            if over_budget:
+                self.truncated = True
+                return False
+        self._append(text, size, len(rows))
+        return True
+
+    def add_rows(self, rows) -> bool:
+        """Add a fetched batch. Returns False once a budget is exhausted, after
+        which the rest of the result set should not be fetched."""
+        if self.max_rows and self.row_count + len(rows) > self.max_rows:
+            rows = rows[:self.max_rows - self.row_count]
+            self.truncated = True
+        if rows and not self._add_block(rows):
+            return False
+        return not self.truncated
+
+    def finish(self) -> list[TextContent]:
+        self._flush()
+        chunks = self._chunks
+        if not chunks:
+            # no header and no rows, e.g. an empty result in a headerless format
+            chunks.append(TextContent(type="text", text=self.encoder.encode([])))
+        if self.truncated:
+            chunks.append(TextContent(
+                type="text",
+                text=(
+                    f"Result truncated after {self.row_count} rows "
+                    f"(max_rows={self.max_rows}, max_bytes={self.max_bytes}); "
+                    f"add a LIMIT or narrow the query to see the rest"
+                ),
+            ))
+        return chunks
@@ -0,0 +1,166 @@
+import collections
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger("polardb-mysql-mcp-server")
+
+DEFAULT_READ_AFTER_WRITE_WINDOW = 5
+
+IMCI_HINT = "/*force_imci*/"
+
+_LITERALS_AND_COMMENTS_RE = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`|/\*(?!!).*?\*/|(?:--\s|#)[^\n]*",
+    re.DOTALL,
+)
+_LEADING_COMMENTS_RE = re.compile(r"^(?:\s+|/\*(?!!).*?\*/|(?:--\s|#)[^\n]*\n?)*", re.DOTALL)
+_READ_RE = re.compile(r"(?:\(\s*)*(?:select|with|show|desc|describe|explain)\b", re.IGNORECASE)
+_SELECT_RE = re.compile(r"(?:\(\s*)*(?:select|with)\b", re.IGNORECASE)
+# reads that lock, write or depend on session state have to stay on the primary
+_PRIMARY_ONLY_RE = re.compile(
+    r"\bfor\s+update\b|\bfor\s+share\b|\block\s+in\s+share\s+mode\b|\binto\b|\bget_lock\s*\("
+    r"|\brelease_lock\s*\(|\blast_insert_id\s*\(|\bfound_rows\s*\(|\brow_count\s*\(|@",
+    re.IGNORECASE,
+)
+_ANALYTIC_RE = re.compile(
+    r"\bgroup\s+by\b|\bover\s*\(|\bdistinct\b"
+    r"|\b(?:count|sum|avg|min|max|std|stddev|variance|group_concat)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def _env_bool(name, default="false"):
+    return os.getenv(name, default).lower() == "true"
+
+
+def get_routing_settings():
+    """Get the optional reader and IMCI endpoints from environment variables.
+    An endpoint without a host is not used; ports default to POLARDB_MYSQL_PORT."""
+    port = os.getenv("POLARDB_MYSQL_PORT", "3306")
+    return {
+        "reader_host": os.getenv("POLARDB_MYSQL_READER_HOST") or None,
+        "reader_port": int(os.getenv("POLARDB_MYSQL_READER_PORT", port)),
+        "imci_host": os.getenv("POLARDB_MYSQL_IMCI_HOST") or None,
+        "imci_port": int(os.getenv("POLARDB_MYSQL_IMCI_PORT", port)),
+        "auto_imci": _env_bool("POLARDB_MYSQL_AUTO_IMCI"),
+        "read_after_write_window": float(
+            os.getenv("POLARDB_MYSQL_READ_AFTER_WRITE_WINDOW", str(DEFAULT_READ_AFTER_WRITE_WINDOW))
+        ),
+    }
+
+
+def is_read_only(query, operations):
+    """Whether query can run on a read-only node: a SELECT, WITH, SHOW, DESCRIBE
+    or EXPLAIN that neither locks rows nor reads or sets session state."""
+    if operations or "/*polar4ai*/" in query.lower():
+        return False
+    if not _READ_RE.match(_LEADING_COMMENTS_RE.sub("", query, count=1)):
+        return False
+    return not _PRIMARY_ONLY_RE.search(_LITERALS_AND_COMMENTS_RE.sub(" ", query))
+
+
+def is_analytic(query):
+    """Whether a read looks like an aggregation that the column store serves
+    better than the row store."""
+    if not _SELECT_RE.match(_LEADING_COMMENTS_RE.sub("", query, count=1)):
+        return False
+    return bool(_ANALYTIC_RE.search(_LITERALS_AND_COMMENTS_RE.sub(" ", query)))
+
+
+def add_imci_hint(query):
+    if IMCI_HINT in query.lower():
+        return query
+    return f"{IMCI_HINT} {query.lstrip()}"
+
+
+class QueryRouter:
+    """Chooses the endpoint an execute_sql statement runs on.
+
+    Writes, DDL and anything touching session state go to the primary. Reads
+    go to the reader endpoint, analytic reads to the IMCI endpoint when one is
+    configured, and with ``auto_imci`` analytic reads also get a /*force_imci*/
+    hint so a cluster endpoint proxy sends them to a column store node.
+    Every endpoint falls back to the primary when it is not configured.
+
+    Read-only nodes replay the primary's changes with some lag, so for
+    ``read_after_write_window`` seconds after a write, reads stay on the
+    primary and see it.
+    """
+
+    def __init__(self, reader_host=None, reader_port=3306, imci_host=None, imci_port=3306, auto_imci=False,
+                 read_after_write_window=DEFAULT_READ_AFTER_WRITE_WINDOW):
+        self.reader_host = reader_host
+        self.reader_port = reader_port
+        self.imci_host = imci_host
+        self.imci_port = imci_port
+        self.auto_imci = auto_imci
+        self.read_after_write_window = read_after_write_window
+        self._last_write = None
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.reader_host or self.imci_host or self.auto_imci)
+
+    def endpoint_config(self, config, endpoint):
+        """config pointing at endpoint; the primary config if it is not set."""
+        if endpoint == "reader" and self.reader_host:
+            return dict(config, host=self.reader_host, port=self.reader_port)
+        if endpoint == "imci" and self.imci_host:
+            return dict(config, host=self.imci_host, port=self.imci_port)
+        return config
+
+    def note_write(self):
+        """Record a write that did not go through route, such as a bulk load."""
+        with self._lock:
+            self._last_write = time.monotonic()
+
+    def _after_write_locked(self):
+        return self._last_write is not None and time.monotonic() - self._last_write < self.read_after_write_window
+
+    def route(self, config, query, operations):
+        """Return (endpoint, endpoint config, query to run)."""
+        endpoint = "primary"
+        hinted = False
+        after_write = False
+        read_only = is_read_only(query, operations)
+        with self._lock:
+            if not read_only:
+                self._last_write = time.monotonic()
+            elif self.enabled:
+                after_write = self._after_write_locked()
+        if self.enabled and read_only and not after_write:
+            endpoint = "reader" if self.reader_host else "primary"
+            if (self.imci_host or self.auto_imci) and is_analytic(query):
+                if self.imci_host:
+                    endpoint = "imci"
+                if self.auto_imci:
+                    query = add_imci_hint(query)
+                    hinted = True
+        with self._lock:
+            self._counts[endpoint] += 1
+            if hinted:
+                self._counts["imci_hints"] += 1
+            if after_write:
+                self._counts["read_after_write"] += 1
+        return endpoint, self.endpoint_config(config, endpoint), query
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_query_router() -> QueryRouter:
+    """Return the process-wide router configured from the environment."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = QueryRouter(**get_routing_settings())
+        return _router
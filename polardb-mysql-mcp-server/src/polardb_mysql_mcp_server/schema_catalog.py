@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("polardb-mysql-mcp-server")
+
+DEFAULT_SCHEMA_CACHE_TTL = 300
+DEFAULT_SCHEMA_PROBE_INTERVAL = 10
+
+# Counts only, so no row of the views is evaluated. UPDATE_TIME moves with
+# every data change and is left out; MySQL 8 serves CREATE_TIME from a cache
+# refreshed every information_schema_stats_expiry seconds, while the table and
+# column counts come straight from the data dictionary. DDL run through this
+# server invalidates the catalog directly, the ttl catches the rest.
+_PROBE_SQL = (
+    "SELECT COUNT(*), MAX(CREATE_TIME), "
+    "(SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s) "
+    "FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s"
+)
+_CASE_SQL = "SELECT @@lower_case_table_names"
+_TABLES_SQL = (
+    "SELECT TABLE_NAME, TABLE_TYPE, TABLE_ROWS, TABLE_COMMENT FROM INFORMATION_SCHEMA.TABLES "
+    "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME"
+)
+_COLUMNS_SQL = (
+    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, COLUMN_COMMENT FROM INFORMATION_SCHEMA.COLUMNS "
+    "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, ORDINAL_POSITION"
+)
+_INDEXES_SQL = (
+    "SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME FROM INFORMATION_SCHEMA.STATISTICS "
+    "WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+)
+
+
+def get_schema_cache_settings():
+    """Get schema cache settings from environment variables, a ttl of 0 disables the cache."""
+    return {
+        "ttl": float(os.getenv("POLARDB_MYSQL_SCHEMA_CACHE_TTL", str(DEFAULT_SCHEMA_CACHE_TTL))),
+        "probe_interval": float(
+            os.getenv("POLARDB_MYSQL_SCHEMA_PROBE_INTERVAL", str(DEFAULT_SCHEMA_PROBE_INTERVAL))
+        ),
+    }
+
+
+class SchemaSnapshot:
+    """Metadata of every table as loaded at one point in time.
+
+    tables:       table names in order
+    table_info:   table -> (TABLE_TYPE, TABLE_ROWS estimate, TABLE_COMMENT)
+    columns:      table -> [(name, type, comment)]
+    primary_keys: table -> [column names]
+    indexes:      table -> [(index name, unique, [column names])], without PRIMARY
+    fold_case:    whether the server compares table names case-insensitively
+    """
+
+    def __init__(self, tables, table_info, columns, primary_keys, indexes, probe, fold_case=False):
+        self.tables = tables
+        self.table_info = table_info
+        self.columns = columns
+        self.primary_keys = primary_keys
+        self.indexes = indexes
+        self.probe = probe
+        self.fold_case = fold_case
+        self.loaded_at = time.monotonic()
+        self._names = set(tables)
+        self._by_lower_name = {name.lower(): name for name in tables}
+
+    def resolve(self, table):
+        """Name of table as stored, or None if it is not in the snapshot. Falls
+        back to a case-insensitive match only when lower_case_table_names is 1
+        or 2; with 0 the server treats Orders and orders as different tables."""
+        if table in self._names:
+            return table
+        if not self.fold_case:
+            return None
+        return self._by_lower_name.get(table.lower())
+
+    def base_tables(self):
+        """Lower-cased names of the tables that are not views."""
+        return {name.lower() for name, info in self.table_info.items() if info[0] == "BASE TABLE"}
+
+    def table_columns(self, table):
+        table = self.resolve(table)
+        if table is None:
+            return None
+        return self.columns.get(table, [])
+
+    def primary_key(self, table):
+        table = self.resolve(table)
+        if table is None:
+            return None
+        return self.primary_keys.get(table, [])
+
+
+class SchemaCatalog:
+    """In-memory copy of the table and column metadata of one database.
+
+    A snapshot is loaded with a few bulk INFORMATION_SCHEMA queries and served
+    from memory until ``ttl`` expires, ``invalidate()`` is called, or a cheap
+    probe (run at most every ``probe_interval`` seconds) sees a different table
+    count, column count or newest table creation time. Changes that keep all
+    three, such as a new comment, and row estimates only show up after the
+    ttl. Concurrent callers that find the snapshot stale share one reload. A
+    ttl of 0 or less bypasses the catalog: every call loads from the server and
+    nothing is kept.
+
+    ``fetch`` passed to the read methods is a coroutine function taking
+    (sql, params) and returning (columns, rows), so the catalog works with
+    either database backend.
+    """
+
+    def __init__(self, database, ttl=DEFAULT_SCHEMA_CACHE_TTL,
+                 probe_interval=DEFAULT_SCHEMA_PROBE_INTERVAL):
+        self.database = database
+        self.ttl = ttl
+        self.probe_interval = probe_interval
+        self._snapshot = None
+        self._probed_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = asyncio.Lock()
+        self.loads = 0
+        self.probes = 0
+        self.hits = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def current(self):
+        """The loaded snapshot if it is within its ttl, without querying the server."""
+        snapshot = self._snapshot
+        if snapshot is None or self.ttl <= 0 or time.monotonic() - snapshot.loaded_at > self.ttl:
+            return None
+        return snapshot
+
+    async def _probe(self, fetch):
+        _, rows = await fetch(_PROBE_SQL, (self.database,) * 2)
+        with self._lock:
+            self.probes += 1
+        return tuple(tuple(row) for row in rows)
+
+    async def _load(self, fetch, probe=None, keep=True):
+        if probe is None and keep:
+            probe = await self._probe(fetch)
+        _, case_rows = await fetch(_CASE_SQL, None)
+        _, table_rows = await fetch(_TABLES_SQL, (self.database,))
+        _, column_rows = await fetch(_COLUMNS_SQL, (self.database,))
+        _, index_rows = await fetch(_INDEXES_SQL, (self.database,))
+        tables = [row[0] for row in table_rows]
+        table_info = {row[0]: tuple(row[1:]) for row in table_rows}
+        columns = {}
+        for table, name, column_type, comment in column_rows:
+            columns.setdefault(table, []).append((name, column_type, comment))
+        primary_keys = {}
+        indexes = {}
+        for table, index_name, non_unique, column in index_rows:
+            if index_name == "PRIMARY":
+                primary_keys.setdefault(table, []).append(column)
+                continue
+            table_indexes = indexes.setdefault(table, [])
+            if not table_indexes or table_indexes[-1][0] != index_name:
+                table_indexes.append((index_name, not int(non_unique), []))
+            table_indexes[-1][2].append(column)
+        fold_case = bool(case_rows and int(case_rows[0][0]))
+        snapshot = SchemaSnapshot(tables, table_info, columns, primary_keys, indexes, probe, fold_case)
+        with self._lock:
+            if keep:
+                self._snapshot = snapshot
+                self._probed_at = snapshot.loaded_at
+            self.loads += 1
+        logger.info(f"Loaded schema of {self.database}: {len(tables)} tables, {len(column_rows)} columns")
+        return snapshot
+
+    async def _reload(self, fetch, stale, probe=None):
+        """Load a new snapshot unless another caller replaced stale while this
+        one waited for the load lock."""
+        async with self._load_lock:
+            if self._snapshot is not stale and self.current() is not None:
+                return self._snapshot
+            return await self._load(fetch, probe)
+
+    async def snapshot(self, fetch, force_probe=False) -> SchemaSnapshot:
+        """Return a current snapshot, reloading it if stale or changed."""
+        if self.ttl <= 0:
+            return await self._load(fetch, keep=False)
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is None or now - snapshot.loaded_at > self.ttl:
+            return await self._reload(fetch, snapshot)
+        if force_probe or now - self._probed_at >= self.probe_interval:
+            with self._lock:
+                # claimed before the query so concurrent callers skip the probe
+                self._probed_at = now
+            probe = await self._probe(fetch)
+            if probe != snapshot.probe:
+                return await self._reload(fetch, snapshot, probe)
+        with self._lock:
+            self.hits += 1
+        return snapshot
+
+    async def tables(self, fetch):
+        return (await self.snapshot(fetch)).tables
+
+    async def _table_snapshot(self, fetch, table):
+        """Snapshot containing table; an unknown table triggers a probe first in
+        case it was created since the last one."""
+        snapshot = await self.snapshot(fetch)
+        if snapshot.resolve(table) is None and self.ttl > 0:
+            snapshot = await self.snapshot(fetch, force_probe=True)
+        return snapshot
+
+    async def table_columns(self, fetch, table):
+        """Columns of table as (name, type, comment), empty if it does not exist."""
+        return (await self._table_snapshot(fetch, table)).table_columns(table) or []
+
+    async def primary_key(self, fetch, table):
+        """Primary key column names of table, empty if it has none or does not exist."""
+        return (await self._table_snapshot(fetch, table)).primary_key(table) or []
+
+    def stats(self):
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                "database": self.database,
+                "loads": self.loads,
+                "probes": self.probes,
+                "hits": self.hits,
+                "tables": len(snapshot.tables) if snapshot else None,
+                "age": round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None,
+            }
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _catalog_key(config):
+    return (config.get("host"), config.get("port"), config.get("database"))
+
+
+def get_schema_catalog(config) -> SchemaCatalog:
+    """Return the process-wide catalog of the configured database."""
+    key = _catalog_key(config)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = SchemaCatalog(config.get("database"), **get_schema_cache_settings())
+            _catalogs[key] = catalog
+        return catalog
+
+
+def invalidate_schema_catalog(config):
+    with _catalogs_lock:
+        catalog = _catalogs.get(_catalog_key(config))
+    if catalog is not None:
+        catalog.invalidate()
+
+
+def schema_catalog_stats():
+    with _catalogs_lock:
+        catalogs = list(_catalogs.values())
+    return [catalog.stats() for catalog in catalogs]
@@ -0,0 +1,88 @@
+import fnmatch
+from urllib.parse import parse_qs
+
+DEFAULT_SCHEMA_MAX_BYTES = 64 * 1024
+_PARAMS = ("pattern", "max_bytes")
+
+
+class TableSchema:
+    """Everything the schema resource shows about one table.
+
+    columns are (name, type, comment) tuples and indexes (name, unique, column
+    names) tuples, not including the primary key. rows is the optimizer's row
+    estimate, None or negative if unknown.
+    """
+
+    def __init__(self, name, kind="table", rows=None, comment="", columns=(), primary_key=(), indexes=()):
+        self.name = name
+        self.kind = kind
+        self.rows = rows
+        self.comment = comment
+        self.columns = columns
+        self.primary_key = primary_key
+        self.indexes = indexes
+
+
+def parse_schema_query(query_string):
+    """Return (patterns, max_bytes) from the schema resource query string.
+    pattern is a comma separated list of case-insensitive globs."""
+    params = {}
+    for name, values in parse_qs(query_string or "", keep_blank_values=True).items():
+        if name not in _PARAMS:
+            raise ValueError(f"Unknown parameter {name!r}, expected one of {list(_PARAMS)}")
+        params[name] = values[-1]
+    patterns = [p.strip().lower() for p in params.get("pattern", "").split(",") if p.strip()] or None
+    max_bytes = DEFAULT_SCHEMA_MAX_BYTES
+    if params.get("max_bytes"):
+        try:
+            max_bytes = int(params["max_bytes"])
+        except ValueError:
+            raise ValueError(f"Invalid max_bytes: {params['max_bytes']!r}")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+    return patterns, max_bytes
+
+
+def _one_line(text):
+    return " ".join(str(text).split())
+
+
+def format_table(table) -> str:
+    head = f"{table.kind} {table.name}"
+    if table.rows is not None and table.rows >= 0:
+        head += f" ~{int(table.rows)} rows"
+    if table.comment:
+        head += f" -- {_one_line(table.comment)}"
+    lines = [head]
+    for name, column_type, comment in table.columns:
+        line = f"  {name} {column_type}"
+        if comment:
+            line += f" -- {_one_line(comment)}"
+        lines.append(line)
+    if table.primary_key:
+        lines.append(f"  primary key ({', '.join(table.primary_key)})")
+    for name, unique, columns in table.indexes:
+        kind = "unique index" if unique else "index"
+        lines.append(f"  {kind} {name} ({', '.join(c or '<expression>' for c in columns)})")
+    return "\n".join(lines)
+
+
+def format_schema(tables, patterns=None, max_bytes=DEFAULT_SCHEMA_MAX_BYTES) -> str:
+    """Compact text description of the tables matching patterns, stopping
+    before max_bytes with a note on how many tables were left out."""
+    if patterns:
+        tables = [t for t in tables if any(fnmatch.fnmatchcase(t.name.lower(), p) for p in patterns)]
+    parts = []
+    size = 0
+    for i, table in enumerate(tables):
+        text = format_table(table)
+        text_size = len(text.encode("utf-8")) + 1
+        if size + text_size > max_bytes:
+            parts.append(
+                f"-- {len(tables) - i} more tables omitted (max_bytes={max_bytes}); "
+                f"use pattern= to narrow the snapshot"
+            )
+            break
+        parts.append(text)
+        size += text_size
+    return "\n".join(parts)
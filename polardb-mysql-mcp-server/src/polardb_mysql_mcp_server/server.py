@@ -11,11 +11,37 @@ from mysql.connector import connect, Error
 from mcp.types import Resource, Tool, TextContent, ResourceTemplate
 from pydantic import AnyUrl
 from dotenv import load_dotenv
-from polardb_mysql_mcp_server.doc_import import DocImport
+from polardb_mysql_mcp_server.doc_import import DEFAULT_TABLE_NAME, DocImport
+from polardb_mysql_mcp_server.result_writer import ResultWriter, get_result_limits, get_fetch_size
+from polardb_mysql_mcp_server.encoders import ENCODERS, get_encoder, check_format
+from polardb_mysql_mcp_server.pool import get_pool, get_async_pool, close_pools, close_async_pools, pool_stats
+from polardb_mysql_mcp_server.embedding_cache import get_embedding_cache
+from polardb_mysql_mcp_server.data_query import parse_data_query, decode_cursor, encode_cursor
+from polardb_mysql_mcp_server.schema_format import TableSchema, parse_schema_query, format_schema
+from polardb_mysql_mcp_server.schema_catalog import get_schema_catalog, invalidate_schema_catalog, schema_catalog_stats
+from polardb_mysql_mcp_server.cost_guard import CostEstimate, get_cost_guard
+from polardb_mysql_mcp_server.routing import get_query_router, is_read_only
+from polardb_mysql_mcp_server.result_cache import get_result_cache, is_cacheable
+from polardb_mysql_mcp_server.cursors import OpenCursor, get_cursor_registry
+from polardb_mysql_mcp_server.jobs import JobFailed, get_job_manager
+from polardb_mysql_mcp_server.translation_cache import get_translation_cache
+from polardb_mysql_mcp_server.bulk_load import (
+    BULK_LOAD_FORMATS, LoadWarnings, detect_format, get_bulk_load_settings, import_path, load_summary,
+    read_csv_header, read_rows,
+)
 import asyncio
+from contextlib import asynccontextmanager
 import re
 import sqlparse
 import numbers
+import collections
+import json
+import random
+import math
+import hashlib
+import itertools
+import threading
+import time
 
 _IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
 
@@ -79,36 +105,119 @@ _RESTRICTED_KEYWORDS = {
 
 
 _MYSQL_EXEC_COMMENT_RE = re.compile(r"/\*!\d*\s?", re.IGNORECASE)
+# candidate delimiters: exec comment, block comment, line comments, quotes
+_MYSQL_SCAN_RE = re.compile(r"/\*!\d*\s?|/\*|#|--(?=[\x00-\x20]|$)|['\"`]")
+# literals without backslashes end at the same quote whether or not the
+# session uses NO_BACKSLASH_ESCAPES, so only those are skipped as opaque
+_MYSQL_QUOTED_RE = {
+    "'": re.compile(r"'(?:[^'\\]|'')*'"),
+    '"': re.compile(r'"(?:[^"\\]|"")*"'),
+    "`": re.compile(r"`(?:[^`]|``)*`"),
+}
 
 
-def _strip_mysql_exec_comments(sql):
-    """Unwrap MySQL conditional-execution comments like /*!50000 DELETE ... */
-    so sqlparse sees the embedded statement body. Returns the rewritten sql.
-    """
-    out = []
-    i = 0
-    n = len(sql)
-    while i < n:
-        m = _MYSQL_EXEC_COMMENT_RE.match(sql, i)
+def _unwrap_exec_comments(sql, pos, out):
+    """Unwrap every exec comment from pos on, ignoring quotes and comments."""
+    while True:
+        m = _MYSQL_EXEC_COMMENT_RE.search(sql, pos)
         if not m:
-            out.append(sql[i])
-            i += 1
-            continue
-        # find matching */
+            break
         end = sql.find("*/", m.end())
         if end == -1:
-            # malformed, treat as opaque comment; keep as-is to be safe
-            out.append(sql[i:])
             break
+        out.append(sql[pos:m.start()])
         out.append(" ")
         out.append(sql[m.end():end])
         out.append(" ")
-        i = end + 2
+        pos = end + 2
+    out.append(sql[pos:])
     return "".join(out)
 
 
+def _strip_mysql_exec_comments(sql):
+    """Unwrap MySQL conditional-execution comments like /*!50000 DELETE ... */
+    so sqlparse sees the embedded statement body. Returns the rewritten sql.
+
+    Jumps between candidate delimiters and copies slices, leaving exec-comment
+    lookalikes inside string literals, identifiers and ordinary comments
+    alone. Whenever the lexing is ambiguous (backslashes in a literal,
+    unterminated tokens, quotes inside an exec comment) the rest of the text
+    is unwrapped unconditionally, so this never hides more than it used to.
+    """
+    out = []
+    last = 0
+    pos = 0
+    while True:
+        m = _MYSQL_SCAN_RE.search(sql, pos)
+        if not m:
+            out.append(sql[last:])
+            return "".join(out)
+        token = m.group(0)
+        start = m.start()
+        if token.startswith("/*!"):
+            end = sql.find("*/", m.end())
+            body = sql[m.end():end]
+            if end == -1 or "/*" in body or any(q in body for q in _MYSQL_QUOTED_RE):
+                break
+            out.append(sql[last:start])
+            out.append(" ")
+            out.append(body)
+            out.append(" ")
+            last = pos = end + 2
+        elif token == "/*":
+            end = sql.find("*/", m.end())
+            if end == -1:
+                break
+            pos = end + 2
+        elif token == "#" or token == "--":
+            end = sql.find("\n", m.end())
+            if end == -1:
+                out.append(sql[last:])
+                return "".join(out)
+            pos = end + 1
+        else:
+            quoted = _MYSQL_QUOTED_RE[token].match(sql, start)
+            if quoted is None:
+                break
+            pos = quoted.end()
+    out.append(sql[last:start])
+    return _unwrap_exec_comments(sql, start, out)
+
+
+# sqlparse splits a word that starts with a digit into a number and the rest
+# (1e5DELETE, 0xAREPLACE), so a keyword ending such a word counts as well
+_RESTRICTED_KEYWORD_RE = re.compile(
+    r"\b(?:\d\w*?)?(?:" + "|".join(_RESTRICTED_KEYWORDS) + r")\b", re.IGNORECASE
+)
+_SQL_OPERATIONS_CACHE_SIZE = 1024
+_sql_operations_cache = collections.OrderedDict()
+_sql_operations_cache_lock = threading.Lock()
+
+
 def get_sql_operations(sql):
     """Return (set of restricted ops anywhere in sql, non-empty statement count)."""
+    if not any(marker in sql for marker in (";", "--", "#", "/*")):
+        # a single comment-free statement with no restricted keyword anywhere in
+        # its text cannot classify as restricted, so sqlparse can be skipped
+        if not _RESTRICTED_KEYWORD_RE.search(sql):
+            return set(), (1 if sql.strip() else 0)
+    # keyed by a digest so huge generated statements are not kept alive
+    key = hashlib.blake2b(sql.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _sql_operations_cache_lock:
+        cached = _sql_operations_cache.get(key)
+        if cached is not None:
+            _sql_operations_cache.move_to_end(key)
+    if cached is None:
+        cached = _classify_sql(sql)
+        with _sql_operations_cache_lock:
+            _sql_operations_cache[key] = cached
+            while len(_sql_operations_cache) > _SQL_OPERATIONS_CACHE_SIZE:
+                _sql_operations_cache.popitem(last=False)
+    operations, statement_count = cached
+    return set(operations), statement_count
+
+
+def _classify_sql(sql):
     normalized = _strip_mysql_exec_comments(sql)
     parsed = sqlparse.parse(normalized)
     statement_count = sum(
@@ -124,13 +233,16 @@ def get_sql_operations(sql):
             kw = token.value.upper()
             if kw in _RESTRICTED_KEYWORDS:
                 operations.add(_RESTRICTED_KEYWORDS[kw])
-    return operations, statement_count
+    return frozenset(operations), statement_count
 
 
 enable_delete = False
 enable_update = False
 enable_insert = False
 enable_ddl = False
+use_async_backend = False
+DEFAULT_BATCH_CONCURRENCY = 4
+MAX_BATCH_STATEMENTS = 50
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(name)s - %(message)s'
@@ -155,6 +267,20 @@ def get_db_config():
     
     return config
 
+def get_stats():
+    """Collect runtime statistics for the polardb-mysql://stats resource."""
+    return {
+        "pools": pool_stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+        "schema_catalogs": schema_catalog_stats(),
+        "cost_guard": get_cost_guard().stats(),
+        "routing": get_query_router().stats(),
+        "result_cache": get_result_cache().stats(),
+        "cursors": get_cursor_registry().stats(),
+        "jobs": get_job_manager().stats(),
+        "text2sql_cache": get_translation_cache().stats(),
+    }
+
 # Initialize server
 app = Server("polardb-mysql-mcp-server")
 
@@ -173,6 +299,19 @@ async def list_resources() -> list[Resource]:
                 name="get_models",
                 description=" List all models for Polar4ai and PolarDB MySQL in the current database",
                 mimeType="text/plain"
+            ),
+            Resource(
+                uri=f"polardb-mysql://schema",
+                name="get_schema",
+                description=" All tables with columns, types, comments, primary keys, indexes and row estimates "
+                            "in one compact snapshot; optional ?pattern=orders*,user_* and ?max_bytes=N",
+                mimeType="text/plain"
+            ),
+            Resource(
+                uri=f"polardb-mysql://stats",
+                name="get_stats",
+                description=" Connection pool and cache statistics of this server",
+                mimeType="application/json"
             )
         ]
     except Exception as e:
@@ -191,7 +330,11 @@ async def list_resource_templates() -> list[ResourceTemplate]:
         ResourceTemplate(
             uriTemplate=f"polardb-mysql://{{table}}/data", 
             name="table_data",
-            description="get data from the table,default limit 50 rows",
+            description="get data from the table,default limit 50 rows. Optional query parameters: "
+                        "columns=a,b (projection), limit=N (at most 1000), after=<key> (keyset page after "
+                        "this primary key value, JSON array for composite keys; see the trailing next: line), "
+                        "sample=<percent> with sample_method=bernoulli (rows from the whole table, full scan) "
+                        "or system (blocks of adjacent rows from random keys of an integer primary key)",
             mimeType="text/plain"
         )
     ]
@@ -205,17 +348,14 @@ async def read_resource(uri: AnyUrl) -> str:
     # Handle polardb-mysql:// URIs for PolarDB API resources
     if uri_str.startswith("polardb-mysql://"):
         prefix = "polardb-mysql://"
-        parts = uri_str[len(prefix):].split('/')
+        path, _, query_string = uri_str[len(prefix):].partition('?')
+        parts = path.split('/')
 
         if len(parts) == 1 and parts[0] == "tables":
             config = get_db_config()
             try:
-                with connect(**config) as conn:
-                    with conn.cursor() as cursor:
-                        cursor.execute(f"SHOW TABLES")
-                        rows = cursor.fetchall()
-                        result = [row[0] for row in rows]
-                        return "\n".join(result)
+                result = await get_schema_catalog(config).tables(_catalog_fetch(config))
+                return "\n".join(result)
             except Error as e:
                 logger.error(f"Database error reading tables: {str(e)}")
                 raise RuntimeError(f"Database error: {str(e)}")
@@ -223,16 +363,26 @@ async def read_resource(uri: AnyUrl) -> str:
         elif len(parts) == 1 and parts[0] == "models":
             config = get_db_config()
             try:
-                with connect(**config) as conn:
-                    with conn.cursor() as cursor:
-                        cursor.execute(f"/*polar4ai*/SHOW MODELS;")
-                        rows = cursor.fetchall()
-                        result = [row[0] for row in rows]
-                        return "\n".join(result)
+                _, rows = await fetch_all(config, "/*polar4ai*/SHOW MODELS;")
+                result = [row[0] for row in rows]
+                return "\n".join(result)
             except Error as e:
                 logger.error(f"Database error reading models: {str(e)}")
                 raise RuntimeError(f"Database error: {str(e)}")
 
+        elif len(parts) == 1 and parts[0] == "schema":
+            config = get_db_config()
+            patterns, max_bytes = parse_schema_query(query_string)
+            try:
+                snapshot = await get_schema_catalog(config).snapshot(_catalog_fetch(config))
+            except Error as e:
+                logger.error(f"Database error reading schema: {str(e)}")
+                raise RuntimeError(f"Database error: {str(e)}")
+            return format_schema(_table_schemas(snapshot), patterns, max_bytes)
+
+        elif len(parts) == 1 and parts[0] == "stats":
+            return json.dumps(get_stats(), indent=2, default=str)
+
         elif len(parts) == 2 and (parts[1] == "data" or parts[1] == 'field'):
             config = get_db_config()
             table = parts[0]
@@ -243,23 +393,18 @@ async def read_resource(uri: AnyUrl) -> str:
                 raise ValueError(str(e))
             resource_type = parts[1]
             try:
-                with connect(**config) as conn:
-                    with conn.cursor() as cursor:
-                        if resource_type == "data":
-                            cursor.execute(f"SELECT * FROM {_quote_identifier(table, 'table')} LIMIT 50")
-                            columns = [desc[0] for desc in cursor.description]
-                            rows = cursor.fetchall()
-                            result = [",".join(map(str, row)) for row in rows]
-                            return "\n".join([",".join(columns)] + result)
-                        elif resource_type == "field":
-                            cursor.execute(
-                                "SELECT COLUMN_NAME,COLUMN_TYPE,COLUMN_COMMENT FROM INFORMATION_SCHEMA.COLUMNS "
-                                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
-                                (config['database'], table),
-                            )
-                            rows = cursor.fetchall()
-                            result = [",".join(map(str, row)) for row in rows]
-                            return "\n".join(result)
+                if resource_type == "data":
+                    if query_string:
+                        return await _read_table_data(config, table, parse_data_query(query_string))
+                    columns, rows = await fetch_all(
+                        config, f"SELECT * FROM {_quote_identifier(table, 'table')} LIMIT 50"
+                    )
+                    result = [",".join(map(str, row)) for row in rows]
+                    return "\n".join([",".join(columns)] + result)
+                elif resource_type == "field":
+                    rows = await get_schema_catalog(config).table_columns(_catalog_fetch(config), table)
+                    result = [",".join(map(str, row)) for row in rows]
+                    return "\n".join(result)
             except Error as e:
                 logger.error(f"Database error reading resource: {str(e)}")
                 raise RuntimeError(f"Database error: {str(e)}")
@@ -272,6 +417,117 @@ async def read_resource(uri: AnyUrl) -> str:
         logger.error(f"Invalid URI scheme: {uri_str}")
         raise ValueError(f"Invalid URI scheme: {uri_str}")
 
+def _table_schemas(snapshot):
+    """TableSchema of every table in a SchemaSnapshot, for format_schema."""
+    result = []
+    for table in snapshot.tables:
+        table_type, rows, comment = snapshot.table_info.get(table, ("BASE TABLE", None, ""))
+        result.append(TableSchema(
+            table,
+            kind="view" if table_type == "VIEW" else "table",
+            rows=rows,
+            comment=comment,
+            columns=snapshot.columns.get(table, []),
+            primary_key=snapshot.primary_keys.get(table, []),
+            indexes=snapshot.indexes.get(table, []),
+        ))
+    return result
+
+
+_INTEGER_TYPES = ("tinyint", "smallint", "mediumint", "int", "bigint")
+# system sampling reads at most this many blocks of adjacent rows
+_SAMPLE_BLOCKS = 10
+
+
+async def _read_table_data(config, table, query):
+    """table_data resource with projection, keyset pagination on the primary
+    key and sampling. Returns the same CSV-like text as the plain resource,
+    plus a trailing "next:" line with the URI of the following page.
+
+    Bernoulli sampling keeps each row with the given probability and shuffles
+    the kept rows, so the limit does not favour the start of the table; it
+    scans the whole table. System sampling reads blocks of adjacent rows from
+    random primary key values, sample percent of the key range in total up to
+    the limit, which avoids a full scan but needs an integer key."""
+    catalog = get_schema_catalog(config)
+    fetch = _catalog_fetch(config)
+    primary_key = await catalog.primary_key(fetch, table)
+    quoted_table = _quote_identifier(table, "table")
+    if query.columns:
+        selected = _validate_identifier_list(",".join(query.columns)).split(",")
+        # key columns are fetched too, to build the cursor, but not shown
+        extra = [c for c in primary_key if c.lower() not in {s.lower() for s in selected}]
+        select_list = ", ".join(_quote_identifier(c) for c in selected + extra)
+    else:
+        selected = None
+        select_list = "*"
+    quoted_key = [_quote_identifier(c) for c in primary_key]
+    where = ""
+    order_by = ""
+    params = []
+    paged = False
+    if query.sample is not None and query.sample_method == "bernoulli":
+        where = "WHERE RAND() < %s"
+        order_by = "ORDER BY RAND()"
+        params.append(query.sample / 100)
+    elif query.sample is not None:
+        key_types = {name: column_type for name, column_type, _ in await catalog.table_columns(fetch, table)}
+        if len(primary_key) != 1 or not key_types.get(primary_key[0], "").lower().startswith(_INTEGER_TYPES):
+            raise ValueError("sample_method=system needs a single integer primary key")
+        return _format_table_rows(*await _sample_blocks(config, quoted_table, primary_key[0], select_list, query),
+                                  selected)
+    elif primary_key:
+        paged = True
+        order_by = "ORDER BY " + ", ".join(quoted_key)
+        if query.after is not None:
+            values = decode_cursor(query.after, len(primary_key))
+            placeholders = ", ".join(["%s"] * len(values))
+            where = f"WHERE ({', '.join(quoted_key)}) > ({placeholders})"
+            params.extend(values)
+    elif query.after is not None:
+        raise ValueError(f"Table {table} has no primary key to page on")
+    clauses = " ".join(clause for clause in (where, order_by) if clause)
+    sql = f"SELECT {select_list} FROM {quoted_table} {clauses} LIMIT {int(query.limit)}"
+    columns, rows = await fetch_all(config, sql, tuple(params) or None)
+    result = _format_table_rows(columns, rows, selected)
+    if paged and len(rows) == query.limit:
+        positions = {name.lower(): i for i, name in enumerate(columns)}
+        last = rows[-1]
+        cursor = encode_cursor([last[positions[c.lower()]] for c in primary_key])
+        result += f"\nnext: polardb-mysql://{table}/data?{query.next_page(cursor)}"
+    return result
+
+
+def _format_table_rows(columns, rows, selected):
+    shown = len(selected) if selected else len(columns)
+    result = [",".join(columns[:shown])]
+    result.extend(",".join(map(str, row[:shown])) for row in rows)
+    return "\n".join(result)
+
+
+async def _sample_blocks(config, quoted_table, key, select_list, query):
+    """(columns, rows) of system sampling: sample percent of the key range of
+    the integer column key, at most query.limit rows, read as up to
+    _SAMPLE_BLOCKS blocks of adjacent rows from random key values in one
+    UNION ALL. Rows of overlapping blocks are returned once, in key order."""
+    quoted_key = _quote_identifier(key)
+    _, bounds = await fetch_all(config, f"SELECT MIN({quoted_key}), MAX({quoted_key}) FROM {quoted_table}")
+    low, high = bounds[0] if bounds else (None, None)
+    if low is None:
+        return await fetch_all(config, f"SELECT {select_list} FROM {quoted_table} LIMIT 0")
+    low, high = int(low), int(high)
+    wanted = min(int(query.limit), max(1, math.ceil(query.sample / 100 * (high - low + 1))))
+    blocks = min(wanted, _SAMPLE_BLOCKS)
+    block_rows = math.ceil(wanted / blocks)
+    block_sql = (f"(SELECT {select_list} FROM {quoted_table} WHERE {quoted_key} >= %s "
+                 f"ORDER BY {quoted_key} LIMIT {block_rows})")
+    starts = tuple(random.randint(low, high) for _ in range(blocks))
+    columns, rows = await fetch_all(config, " UNION ALL ".join([block_sql] * blocks), starts)
+    position = [name.lower() for name in columns].index(key.lower())
+    unique = {row[position]: row for row in rows}
+    return columns, [unique[value] for value in sorted(unique)][:wanted]
+
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available PolarDB MySQL tools."""
@@ -286,11 +542,162 @@ async def list_tools() -> list[Tool]:
                     "query": {
                         "type": "string",
                         "description": "The SQL query to execute"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(ENCODERS),
+                        "description": "Result format: csv (RFC 4180, default), jsonl (one JSON object per row), "
+                                       "columnar_json ({columns, data} with one array per column) or "
+                                       "arrow (base64 Arrow IPC stream)"
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
+        Tool(
+            name="job_status",
+            description="Show the state and progress of background jobs started with background=true, "
+                        "or of all recent jobs when job_id is omitted",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "The job id returned when the job was submitted"
+                    }
+                }
+            }
+        ),
+        Tool(
+            name="job_result",
+            description="Get the result of a finished background job",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "The job id returned when the job was submitted"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="job_cancel",
+            description="Stop a running background job; an operation already accepted by the AI node may still complete",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "The job id returned when the job was submitted"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="execute_sql_batch",
+            description="Run several independent read-only SQL queries concurrently in one call, e.g. row "
+                        "counts, distinct values or min/max of several tables, and return each result with "
+                        "its timing",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": f"The read-only queries to run, at most {MAX_BATCH_STATEMENTS}"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(ENCODERS),
+                        "description": "Result format, as for execute_sql"
+                    }
+                },
+                "required": ["queries"]
+            }
+        ),
+        Tool(
+            name="open_cursor",
+            description="Run a query that returns rows and keep its result open on the server, so a huge "
+                        "result can be read page by page with fetch_cursor instead of re-running it with OFFSET",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The SELECT query to run"
                     }
                 },
                 "required": ["query"]
             }
         ),
+        Tool(
+            name="fetch_cursor",
+            description="Fetch the next rows of a cursor opened with open_cursor; the cursor is closed "
+                        "once the result is exhausted",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor_id": {
+                        "type": "string",
+                        "description": "The cursor id returned by open_cursor"
+                    },
+                    "rows": {
+                        "type": "integer",
+                        "description": "Number of rows to fetch (default: POLARDB_MYSQL_FETCH_SIZE, "
+                                       "at most POLARDB_MYSQL_MAX_ROWS)"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(ENCODERS),
+                        "description": "Result format, as for execute_sql"
+                    }
+                },
+                "required": ["cursor_id"]
+            }
+        ),
+        Tool(
+            name="close_cursor",
+            description="Close a cursor opened with open_cursor before reading all of its rows",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor_id": {
+                        "type": "string",
+                        "description": "The cursor id returned by open_cursor"
+                    }
+                },
+                "required": ["cursor_id"]
+            }
+        ),
+        Tool(
+            name="bulk_load",
+            description="Load a local CSV or JSON lines file into an existing table in one transaction, "
+                        "instead of generating large INSERT statements; needs INSERT to be enabled",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file": {
+                        "type": "string",
+                        "description": "Path of the file relative to the server's import directory. A CSV file "
+                                       "needs a header row of column names, empty fields load as NULL; in a JSON "
+                                       "lines file the keys of the first object are the columns"
+                    },
+                    "table": {
+                        "type": "string",
+                        "description": "The target table, optionally qualified as database.table"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(BULK_LOAD_FORMATS),
+                        "description": "File format, by default taken from the extension (.csv, .jsonl, .ndjson)"
+                    }
+                },
+                "required": ["file", "table"]
+            }
+        ),
         Tool(
             name="polar4ai_update_index_for_text_2_sql",
             description="""
@@ -305,6 +712,10 @@ async def list_tools() -> list[Tool]:
                     "force_update": {
                         "type": "boolean",
                         "description": "是否强制更新索引,若果schema_index有数据并且该值为false,则不执行更新操作,否则强制更新"
+                    },
+                    "background": {
+                        "type": "boolean",
+                        "description": "为true时立即返回job_id,在后台执行并轮询状态,可用job_status/job_result/job_cancel查看进度、结果或取消"
                     }
                 },
                 "required": ["force_update"]
@@ -388,6 +799,10 @@ async def list_tools() -> list[Tool]:
                                 }
                         },
                         "required": ["model_name", "model_class", "table_name", "x_cols", "y_cols"]
+                    },
+                    "background": {
+                        "type": "boolean",
+                        "description": "为true时立即返回job_id,在后台执行并轮询状态,可用job_status/job_result/job_cancel查看进度、结果或取消"
                     }
                 },
                 "required": ["model"]
@@ -395,7 +810,7 @@ async def list_tools() -> list[Tool]:
         ),
          Tool(
             name="polar4ai_import_doc",
-            description="将本地某个目录下的所有后缀为docx和md文件导入到PolarDB中,生成一个知识库",
+            description="将本地某个目录下的所有后缀为docx和md文件导入到PolarDB中,生成一个知识库;重复导入时只处理新增或修改过的文件",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -406,6 +821,19 @@ async def list_tools() -> list[Tool]:
                     "table_name": {
                         "type": "string",
                         "description": "知识库的名称,为表的名称(默认使用default_knowledge_base)"
+                    },
+                    "include": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "要导入的文件名的通配符,如[\"*.md\"](默认为[\"*.docx\", \"*.md\"])"
+                    },
+                    "recursive": {
+                        "type": "boolean",
+                        "description": "是否递归导入子目录中的文件(默认为false)"
+                    },
+                    "prune": {
+                        "type": "boolean",
+                        "description": "是否删除知识库中在该目录下已不存在(或不再匹配include)的文件的内容(默认为false)"
                     }
                 },
                 "required": ["dir"]
@@ -438,7 +866,7 @@ async def list_tools() -> list[Tool]:
 def exec_sql(config, sql):
     rows=[]
     try:
-        with connect(**config) as conn:
+        with get_pool(config).connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(sql)
                 if cursor.description is not None:
@@ -449,14 +877,88 @@ def exec_sql(config, sql):
     except Error as e:
         logger.error(f"Error executing SQL '{sql}': {e}")
         return rows, False
-def polar4ai_update_index_for_text_2_sql(arguments: str, index_table_name='schema_index'):
-    config = get_db_config()
+
+
+async def exec_sql_async(config, sql):
+    """exec_sql on the aiomysql backend."""
+    rows = []
+    try:
+        async with get_async_pool(config).connection() as conn:
+            async with conn.cursor() as cursor:
+                await asyncio.wait_for(cursor.execute(sql), config["read_timeout"])
+                if cursor.description is not None:
+                    return list(await cursor.fetchall()), True
+                else:
+                    await conn.commit()
+                    return rows, True
+    except (Error, asyncio.TimeoutError) as e:
+        logger.error(f"Error executing SQL '{sql}': {e!r}")
+        return rows, False
+
+
+def _fetch_all_sync(config, sql, params=None):
+    with get_pool(config).connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [desc[0] for desc in cursor.description]
+            return columns, cursor.fetchall()
+
+
+async def _fetch_all_async(config, sql, params=None):
+    async with get_async_pool(config).connection() as conn:
+        async with conn.cursor() as cursor:
+            try:
+                await asyncio.wait_for(cursor.execute(sql, params), config["read_timeout"])
+            except asyncio.TimeoutError:
+                raise Error(msg=f"Query timed out after {config['read_timeout']}s")
+            columns = [desc[0] for desc in cursor.description]
+            return columns, list(await cursor.fetchall())
+
+
+async def fetch_all(config, sql, params=None):
+    """Run a read query on the configured backend and return (columns, rows)
+    without blocking the event loop."""
+    if use_async_backend:
+        return await _fetch_all_async(config, sql, params)
+    return await asyncio.to_thread(_fetch_all_sync, config, sql, params)
+
+
+def _catalog_fetch(config):
+    """Bind fetch_all to config for SchemaCatalog."""
+    async def fetch(sql, params=None):
+        return await fetch_all(config, sql, params)
+    return fetch
+
+
+def _run_steps(config, steps):
+    """Drive a polar4ai step generator: every SQL it yields is executed with
+    exec_sql and the (rows, ok) result is sent back in."""
+    try:
+        sql = next(steps)
+        while True:
+            sql = steps.send(exec_sql(config, sql))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _run_steps_async(config, steps):
+    try:
+        sql = next(steps)
+        while True:
+            sql = steps.send(await exec_sql_async(config, sql))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _update_index_steps(arguments, index_table_name='schema_index', info=None):
+    """Steps of polar4ai_update_index_for_text_2_sql. The index is built by an
+    async PREDICT task whose id is put in info["task_id"]."""
     force_update = arguments.get("force_update")
     if force_update is None:
         raise ValueError("force_update is required for tool polar4ai_update_index_for_text_2_sql")
     _validate_identifier(index_table_name, "index_table_name")
     table_sql = f'/*polar4ai*/show tables;'
-    rows, ok = exec_sql(config, table_sql)
+    rows, ok = yield table_sql
     if not ok:
         raise ValueError("Error executing SQL '/*polar4ai*/show tables'")
     index_table_exist = False
@@ -467,42 +969,75 @@ def polar4ai_update_index_for_text_2_sql(arguments: str, index_table_name='schem
     logging.info(f"force_update:{force_update},index_table_exist:{index_table_exist}")
     if not index_table_exist:
         create_index_sql = f'/*polar4ai*/CREATE TABLE {index_table_name}(id integer, table_name varchar, table_comment text_ik_max_word, table_ddl text_ik_max_word, column_names text_ik_max_word, column_comments text_ik_max_word, sample_values text_ik_max_word, vecs vector_768, ext text_ik_max_word, PRIMARY KEY (id));'
-        rows, ok = exec_sql(config, create_index_sql)
+        rows, ok = yield create_index_sql
         if not ok:
             raise ValueError("Error executing SQL '/*polar4ai*/CREATE TABLE {index_table_name}'")
     table_count=0
     table_count_sql = f'/*polar4ai*/SELECT COUNT(*) FROM {index_table_name};'
-    rows, ok = exec_sql(config, table_count_sql)
+    rows, ok = yield table_count_sql
     if ok and len(rows) == 1:
         table_count = int(rows[0][0])
     else:
         raise ValueError("Error executing SQL '/*polar4ai*/SELECT COUNT(*) FROM {index_table_name}'")
     if force_update or table_count == 0:
         update_sql=f"/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_text2vec, SELECT '') WITH (mode='async', resource='schema') INTO {index_table_name};"
-        rows, ok = exec_sql(config, update_sql)
+        rows, ok = yield update_sql
         if not ok:
             raise ValueError("Error executing SQL '/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_text2vec, SELECT xxxx'")
+        if info is not None and rows:
+            info["task_id"] = str(rows[0][0])
+        # the task is still running; _wait_for_index_rebuild invalidates again once it is done
+        get_translation_cache().invalidate(_index_scope(index_table_name))
     return [TextContent(type="text", text=f"更新索引表({index_table_name})成功")]
 
 
-def polar4ai_text_2_sql(arguments: str,index_table_name='schema_index'):
+def polar4ai_update_index_for_text_2_sql(arguments: str, index_table_name='schema_index', info=None):
+    config = get_db_config()
+    return _run_steps(config, _update_index_steps(arguments, index_table_name, info))
+
+
+def _index_scope(index_table_name):
     config = get_db_config()
+    return f"{config['host']}:{config['port']}/{config['database']}/{index_table_name}"
+
+
+def _nl2sql_steps(text, index_table_name):
+    """The _polar4ai_nl2sql step shared by text_2_sql and text_2_chart. A
+    question already translated against the current index is answered from
+    the translation cache without a round trip to the AI node."""
+    cache = get_translation_cache()
+    key = cache.make_key(_index_scope(index_table_name), text)
+    sql = cache.get(key)
+    if sql is not None:
+        return sql
+    safe_text = _escape_sql_string(text)
+    sql = f"/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2sql, SELECT '{safe_text}') WITH (basic_index_name='{index_table_name}')";
+    rows, ok = yield sql
+    if ok and len(rows) == 1:
+        sql = f"{rows[0][0]}"
+        cache.put(key, sql)
+        return sql
+    raise ValueError("Error executing SQL '/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2sql, SELECT xxxx'")
+
+
+def _text_2_sql_steps(arguments, index_table_name='schema_index'):
     text = arguments.get("text")
     if not text:
         raise ValueError("text is required for tool polar4ai_text_2_sql")
     _validate_identifier(index_table_name, "index_table_name")
-    safe_text = _escape_sql_string(text)
-    sql = f"/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2sql, SELECT '{safe_text}') WITH (basic_index_name='{index_table_name}')";
-    rows, ok = exec_sql(config, sql)
-    if ok and len(rows) == 1:
-        return [TextContent(type="text", text=f"{rows[0][0]}")]
-    else :
-        raise ValueError("Error executing SQL '/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2sql, SELECT xxxx'")
-_ALLOWED_CHART_TYPES = {"柱状图", "折线图", "饼状图"}
+    sql = yield from _nl2sql_steps(text, index_table_name)
+    return [TextContent(type="text", text=sql)]
 
 
-def polar4ai_text_2_chart(arguments: str,index_table_name='schema_index'):
+def polar4ai_text_2_sql(arguments: str,index_table_name='schema_index'):
     config = get_db_config()
+    return _run_steps(config, _text_2_sql_steps(arguments, index_table_name))
+
+
+_ALLOWED_CHART_TYPES = {"柱状图", "折线图", "饼状图"}
+
+
+def _text_2_chart_steps(arguments, index_table_name='schema_index'):
     text = arguments.get("text")
     chart_type= arguments.get("chart_type")
     if not text:
@@ -514,25 +1049,24 @@ def polar4ai_text_2_chart(arguments: str,index_table_name='schema_index'):
     _validate_identifier(index_table_name, "index_table_name")
     safe_text = _escape_sql_string(text)
     safe_chart = _escape_sql_string(chart_type)
-    sql = f"/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2sql, SELECT '{safe_text}') WITH (basic_index_name='{index_table_name}')";
-    rows, ok = exec_sql(config, sql)
-    if ok and len(rows) == 1:
-        sql = rows[0][0]
-    else:
-        ValueError("Error executing SQL '/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2sql, SELECT xxxx'")
+    sql = yield from _nl2sql_steps(text, index_table_name)
     sql = sql.replace(";","")
     chart_sql = f"/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2chart,{sql}) WITH (usr_query = '{safe_text},{safe_chart}', result_type = 'IMAGE');"
-    rows, ok = exec_sql(config, chart_sql)
+    rows, ok = yield chart_sql
     if ok and len(rows) == 1:
         return [TextContent(type="text", text=f"{rows[0][0]}")]
     else:
         raise ValueError("Error executing SQL '/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2chart, SELECT xxxx'")
-def polar4ai_create_models(model: dict) -> list[TextContent]:
-    """
-    使用polar4ai语法，创建模型
-    """
+
+
+def polar4ai_text_2_chart(arguments: str,index_table_name='schema_index'):
     config = get_db_config()
-    #config['compress']=True
+    return _run_steps(config, _text_2_chart_steps(arguments, index_table_name))
+
+
+def _create_models_steps(model, info=None):
+    """Steps of polar4ai_create_models. Training goes on after CREATE MODEL
+    returns; the model to watch is put in info["model_name"]."""
     logger.info(str(model))
     logger.info(f"Reading polar4ai_create_models")
     try:
@@ -546,22 +1080,27 @@ def polar4ai_create_models(model: dict) -> list[TextContent]:
     except (KeyError, ValueError) as e:
         logger.error(f"Invalid model arguments: {e}")
         return [TextContent(type="text", text=f"创建模型失败: {e}")]
-    try:
-        with connect(**config) as conn:
-            with conn.cursor() as cursor:
-                query_str = (
-                    f"/*polar4ai*/CREATE MODEL {model_name} "
-                    f"WITH (model_class = '{model_class}',"
-                    f"x_cols = '{x_cols}',y_cols='{y_cols}')"
-                    f"AS (SELECT * FROM {_quote_identifier(table_name, 'table_name')});"
-                )
-                cursor.execute(query_str)
-                logger.info("create model ok")
-                return [TextContent(type="text", text=f"创建{model_name}模型成功")]
-
-    except Error as e:
-        logger.error(f"Database error polar4ai : {str(e)}")
+    query_str = (
+        f"/*polar4ai*/CREATE MODEL {model_name} "
+        f"WITH (model_class = '{model_class}',"
+        f"x_cols = '{x_cols}',y_cols='{y_cols}')"
+        f"AS (SELECT * FROM {_quote_identifier(table_name, 'table_name')});"
+    )
+    rows, ok = yield query_str
+    if not ok:
         return [TextContent(type="text", text=f"创建模型失败")]
+    logger.info("create model ok")
+    if info is not None:
+        info["model_name"] = model_name
+    return [TextContent(type="text", text=f"创建{model_name}模型成功")]
+
+
+def polar4ai_create_models(model: dict) -> list[TextContent]:
+    """
+    使用polar4ai语法，创建模型
+    """
+    config = get_db_config()
+    return _run_steps(config, _create_models_steps(model))
 
 
 def get_sql_operation_type(sql):
@@ -572,45 +1111,723 @@ def get_sql_operation_type(sql):
             return op
     return 'OTHER'
 
-def execute_sql(arguments: str) -> str:
-    config = get_db_config()
-    query = arguments.get("query")
-    if not query:
-        raise ValueError("query is required for tool execute_sql")
+
+def _authorize_sql(query):
+    """Classify query and check it against the enabled operations.
+    Returns (operations, rejection) where rejection is the tool response to
+    send back instead of running the query, or None if it may run."""
     operations, statement_count = get_sql_operations(query)
     logger.info(f"SQL operations: {operations}, statements: {statement_count}")
     if statement_count > 1:
         logger.info("multi-statement queries are not allowed")
-        return [TextContent(type="text", text="Multi-statement queries are not allowed")]
+        return operations, [TextContent(type="text", text="Multi-statement queries are not allowed")]
     global enable_delete,enable_update,enable_insert,enable_ddl
     if 'INSERT' in operations and not enable_insert:
         logger.info(f"INSERT operation is not enabled,please check POLARDB_MYSQL_ENABLE_INSERT")
-        return [TextContent(type="text", text=f"INSERT operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"INSERT operation is not enabled in current tool")]
     if 'UPDATE' in operations and not enable_update:
         logger.info(f"UPDATE operation is not enabled,please check POLARDB_MYSQL_ENABLE_UPDATE")
-        return [TextContent(type="text", text=f"UPDATE operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"UPDATE operation is not enabled in current tool")]
     if 'DELETE' in operations and not enable_delete:
         logger.info(f"DELETE operation is not enabled,please check POLARDB_MYSQL_ENABLE_DELETE")
-        return [TextContent(type="text", text=f"DELETE operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"DELETE operation is not enabled in current tool")]
     if 'DDL' in operations and not enable_ddl:
         logger.info(f"DDL operation is not enabled,please check POLARDB_MYSQL_ENABLE_DDL")
-        return [TextContent(type="text", text=f"DDL operation is not enabled in current tool")]
-    logger.info(f"will Executing SQL: {query}")
+        return operations, [TextContent(type="text", text=f"DDL operation is not enabled in current tool")]
+    return operations, None
+
+
+def _abort_unbuffered_result(config, pool, conn, cursor=None):
+    """Stop the server from sending the rest of an unbuffered result set.
+
+    Draining millions of unread rows would defeat the row budget, so the query
+    is killed from a separate connection and the pooled connection is dropped.
+    Failing to discard what is left is only logged: the rows already read are
+    still a valid, truncated result.
+    """
+    pool.discard(conn)
     try:
-        with connect(**config) as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                if cursor.description is not None:
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return [TextContent(type="text", text="\n".join([",".join(columns)] + result))]
-                else:
-                    conn.commit()
-                    return [TextContent(type="text", text=f"Query executed successfully. Rows affected: {cursor.rowcount}")]
+        with connect(**config) as killer:
+            with killer.cursor() as kill_cursor:
+                kill_cursor.execute(f"KILL QUERY {int(conn.connection_id)}")
+    except Error as e:
+        logger.info(f"Could not kill truncated query: {e}")
+    try:
+        conn.consume_results()
+        if cursor is not None:
+            cursor.close()
+    except Exception as e:
+        # the connection is discarded anyway, whatever state it was left in
+        logger.info(f"Ignoring error while discarding truncated result: {e!r}")
+
+
+def _guard_verdict(conn, query):
+    """Check query against the cost guard on conn, returning None when the
+    guard is off, does not apply or the plan could not be read."""
+    guard = get_cost_guard()
+    if not guard.applies_to(query):
+        return None
+    estimate = guard.cached_estimate(query)
+    if estimate is None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(guard.explain_sql(query))
+            estimate = CostEstimate.from_explain_json(cursor.fetchall()[0][0])
+        except (Error, ValueError, IndexError) as e:
+            logger.info(f"Cost guard could not explain query, running it unchecked: {e}")
+            return None
+        finally:
+            cursor.close()
+        guard.store_estimate(query, estimate)
+    return guard.decide(query, estimate)
+
+
+async def _guard_verdict_async(conn, query, read_timeout):
+    """_guard_verdict on an aiomysql connection."""
+    from aiomysql import Error as AsyncError
+    guard = get_cost_guard()
+    if not guard.applies_to(query):
+        return None
+    estimate = guard.cached_estimate(query)
+    if estimate is None:
+        try:
+            async with conn.cursor() as cursor:
+                await asyncio.wait_for(cursor.execute(guard.explain_sql(query)), read_timeout)
+                estimate = CostEstimate.from_explain_json((await cursor.fetchall())[0][0])
+        except (AsyncError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            logger.info(f"Cost guard could not explain query, running it unchecked: {e!r}")
+            return None
+        guard.store_estimate(query, estimate)
+    return guard.decide(query, estimate)
+
+
+def _cached_result(config, query, operations, result_format):
+    """Return (cache key, cached result); the key is None when query may not
+    be cached and the result None on a miss. On a miss the key is paired with
+    the cache token to pass to _store_result."""
+    cache = get_result_cache()
+    if not cache.enabled or not is_cacheable(query, operations, config.get("database")):
+        return None, None
+    key = cache.make_key(config, query, result_format)
+    cached = cache.get(key)
+    if cached is not None:
+        return key, cached
+    return (key, cache.token(query)), None
+
+
+def _store_result(config, cache_key, result, query):
+    """Cache result of query. Names the schema catalog does not list as base
+    tables may be views, whose entries every write drops; until the catalog
+    is loaded that is every name."""
+    key, token = cache_key
+    snapshot = get_schema_catalog(config).current()
+    base_tables = snapshot.base_tables() if snapshot is not None else None
+    get_result_cache().put(key, result, query, token, base_tables)
+
+
+def _after_statement(config, query, operations):
+    """Drop cached metadata and results a statement may have made stale."""
+    if 'DDL' in operations:
+        invalidate_schema_catalog(config)
+    cache = get_result_cache()
+    if cache.enabled and not is_read_only(query, operations):
+        cache.invalidate_statement(query, operations)
+
+
+def _after_write(config, tables, ddl=False):
+    """Like _after_statement, for tools that write tables without going
+    through execute_sql."""
+    get_query_router().note_write()
+    if ddl:
+        invalidate_schema_catalog(config)
+    cache = get_result_cache()
+    if cache.enabled:
+        cache.invalidate_tables({table.lower() for table in tables})
+
+
+def _with_guard_note(result, verdict):
+    if verdict is not None and verdict.action != "allow":
+        result.append(TextContent(type="text", text=verdict.message()))
+    return result
+
+
+def execute_sql(arguments: str) -> str:
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("query is required for tool execute_sql")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    operations, rejection = _authorize_sql(query)
+    if rejection:
+        return rejection
+    cache_key, cached = _cached_result(config, query, operations, result_format)
+    if cached is not None:
+        logger.info(f"Returning cached result of SQL: {query}")
+        return cached
+    statement = query
+    endpoint, endpoint_config, query = get_query_router().route(config, query, operations)
+    logger.info(f"will Executing SQL on {endpoint}: {query}")
+    try:
+        pool = get_pool(endpoint_config)
+        with pool.connection() as conn:
+            verdict = _guard_verdict(conn, query)
+            if verdict is not None:
+                if verdict.action == "reject":
+                    return [TextContent(type="text", text=verdict.message())]
+                query = verdict.query
+            # unbuffered cursor: rows are pulled from the socket batch by batch
+            cursor = conn.cursor()
+            cursor.execute(query)
+            if cursor.description is not None:
+                columns = [desc[0] for desc in cursor.description]
+                writer = ResultWriter(get_encoder(result_format, columns), **get_result_limits())
+                fetch_size = get_fetch_size()
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        cursor.close()
+                        break
+                    if not writer.add_rows(rows):
+                        _abort_unbuffered_result(endpoint_config, pool, conn, cursor)
+                        break
+                logger.info(f"Returned {writer.row_count} rows, {writer.byte_count} bytes, truncated: {writer.truncated}")
+                result = _with_guard_note(writer.finish(), verdict)
+                if cache_key is not None:
+                    _store_result(config, cache_key, result, statement)
+                return result
+            else:
+                conn.commit()
+                # close() resets rowcount to -1
+                rowcount = cursor.rowcount
+                cursor.close()
+                return [TextContent(type="text", text=f"Query executed successfully. Rows affected: {rowcount}")]
     except Error as e:
         logger.error(f"Error executing SQL '{query}': {e}")
         return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+    finally:
+        _after_statement(config, statement, operations)
+
+
+async def execute_sql_async(arguments: str) -> str:
+    """execute_sql on the aiomysql backend, running on the event loop."""
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("query is required for tool execute_sql")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    operations, rejection = _authorize_sql(query)
+    if rejection:
+        return rejection
+    cache_key, cached = _cached_result(config, query, operations, result_format)
+    if cached is not None:
+        logger.info(f"Returning cached result of SQL: {query}")
+        return cached
+    statement = query
+    endpoint, endpoint_config, query = get_query_router().route(config, query, operations)
+    logger.info(f"will Executing SQL on {endpoint}: {query}")
+    from aiomysql import SSCursor
+    try:
+        async with get_async_pool(endpoint_config).connection() as conn:
+            verdict = await _guard_verdict_async(conn, query, config["read_timeout"])
+            if verdict is not None:
+                if verdict.action == "reject":
+                    return [TextContent(type="text", text=verdict.message())]
+                query = verdict.query
+            cursor = await conn.cursor(SSCursor)
+            await asyncio.wait_for(cursor.execute(query), config["read_timeout"])
+            if cursor.description is not None:
+                columns = [desc[0] for desc in cursor.description]
+                writer = ResultWriter(get_encoder(result_format, columns), **get_result_limits())
+                fetch_size = get_fetch_size()
+                while True:
+                    rows = await asyncio.wait_for(cursor.fetchmany(fetch_size), config["read_timeout"])
+                    if not rows:
+                        break
+                    if not writer.add_rows(rows):
+                        # closing the socket stops the server sending; closing the
+                        # cursor would drain the remaining rows first
+                        conn.close()
+                        break
+                if not conn.closed:
+                    await cursor.close()
+                logger.info(f"Returned {writer.row_count} rows, {writer.byte_count} bytes, truncated: {writer.truncated}")
+                result = _with_guard_note(writer.finish(), verdict)
+                if cache_key is not None:
+                    _store_result(config, cache_key, result, statement)
+                return result
+            else:
+                await conn.commit()
+                rowcount = cursor.rowcount
+                await cursor.close()
+                return [TextContent(type="text", text=f"Query executed successfully. Rows affected: {rowcount}")]
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out executing SQL '{query}'")
+        return [TextContent(type="text", text=f"Error executing query: timed out after {config['read_timeout']}s")]
+    except Error as e:
+        logger.error(f"Error executing SQL '{query}': {e}")
+        return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+    finally:
+        _after_statement(config, statement, operations)
+
+def _table_reference(table):
+    """Quoted `table` or `database`.`table`."""
+    parts = table.split(".") if isinstance(table, str) else []
+    if not 1 <= len(parts) <= 2:
+        raise ValueError(f"Invalid table: {table!r}")
+    return ".".join(_quote_identifier(part, "table") for part in parts)
+
+
+def _load_data_local(config, table_ref, columns, path, line_terminator):
+    """LOAD DATA LOCAL INFILE on a dedicated connection, allowed to send
+    files from the directory of path only. Empty fields become NULL, as in
+    the INSERT path, and any warning rolls the load back, as an error would
+    the INSERT path."""
+    # allow_local_infile_in_path alone enables LOCAL; the connector ignores
+    # the directory once allow_local_infile is set as well
+    conn = connect(**config, allow_local_infile_in_path=os.path.dirname(path))
+    try:
+        cursor = conn.cursor()
+        variables = [f"@c{i}" for i in range(len(columns))]
+        assignments = ", ".join(
+            f"{_quote_identifier(column, 'column')} = NULLIF({variable}, '')"
+            for column, variable in zip(columns, variables)
+        )
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_ref} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY %s IGNORE 1 LINES ({', '.join(variables)}) SET {assignments}",
+            (path, line_terminator),
+        )
+        loaded = cursor.rowcount
+        if cursor.warning_count:
+            count = cursor.warning_count
+            cursor.execute("SHOW WARNINGS LIMIT 3")
+            details = "; ".join(f"{code}: {message}" for _, code, message in cursor.fetchall())
+            conn.rollback()
+            raise LoadWarnings(f"LOAD DATA reported {count} warnings and was rolled back ({details})")
+        conn.commit()
+        return loaded
+    finally:
+        conn.close()
+
+
+def _insert_batches(config, table_ref, columns, rows, batch_rows):
+    """Multi-row INSERTs of batch_rows rows each, committed together."""
+    sql = (f"INSERT INTO {table_ref} ({', '.join(_quote_identifier(c, 'column') for c in columns)}) "
+           f"VALUES ({', '.join(['%s'] * len(columns))})")
+    loaded = 0
+    with get_pool(config).connection() as conn:
+        cursor = conn.cursor()
+        try:
+            for batch in itertools.batched(rows, batch_rows):
+                cursor.executemany(sql, batch)
+                loaded += len(batch)
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Error as e:
+                logger.info(f"Rollback after a failed bulk load failed: {e}")
+            raise
+        finally:
+            cursor.close()
+    return loaded
+
+
+def bulk_load(arguments):
+    """Load a CSV or JSON lines file into a table, with LOAD DATA LOCAL INFILE
+    for CSV when POLARDB_MYSQL_LOAD_DATA_LOCAL is on, batched INSERTs otherwise."""
+    config = get_db_config()
+    path = arguments.get("file")
+    table = arguments.get("table")
+    if not path or not table:
+        raise ValueError("file and table are required for tool bulk_load")
+    if not enable_insert:
+        logger.info(f"INSERT operation is not enabled,please check POLARDB_MYSQL_ENABLE_INSERT")
+        return [TextContent(type="text", text=f"INSERT operation is not enabled in current tool")]
+    settings = get_bulk_load_settings()
+    path = import_path(settings["directory"], path)
+    fmt = detect_format(path, arguments.get("format"))
+    table_ref = _table_reference(table)
+    started = time.perf_counter()
+    try:
+        if fmt == "csv" and settings["load_data_local"]:
+            method = "LOAD DATA LOCAL INFILE"
+            columns, line_terminator = read_csv_header(path)
+            for column in columns:
+                _validate_identifier(column, "column")
+            logger.info(f"will load {path} into {table_ref} with {method}")
+            loaded = _load_data_local(config, table_ref, columns, path, line_terminator)
+        else:
+            method = f"INSERT batches of {settings['batch_rows']} rows"
+            columns, rows = read_rows(path, fmt)
+            for column in columns:
+                _validate_identifier(column, "column")
+            logger.info(f"will load {path} into {table_ref} with {method}")
+            loaded = _insert_batches(config, table_ref, columns, rows, settings["batch_rows"])
+    except (Error, LoadWarnings) as e:
+        logger.error(f"Error loading {path} into {table_ref}: {e}")
+        return [TextContent(type="text", text=f"Error loading file, nothing was loaded: {str(e)}")]
+    finally:
+        _after_write(config, {table.split(".")[-1]})
+    return [TextContent(type="text", text=load_summary(loaded, table, time.perf_counter() - started, method))]
+
+
+def get_batch_concurrency():
+    return max(1, int(os.getenv("POLARDB_MYSQL_BATCH_CONCURRENCY", str(DEFAULT_BATCH_CONCURRENCY))))
+
+
+async def execute_sql_batch(arguments):
+    """Run read-only queries through execute_sql at most
+    POLARDB_MYSQL_BATCH_CONCURRENCY at a time, in pooled connections.
+    Results keep the order of the queries, each behind a header with its
+    index and elapsed time."""
+    queries = arguments.get("queries")
+    if not queries or not isinstance(queries, list):
+        raise ValueError("queries is required for tool execute_sql_batch")
+    if len(queries) > MAX_BATCH_STATEMENTS:
+        raise ValueError(f"execute_sql_batch takes at most {MAX_BATCH_STATEMENTS} queries")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    concurrency = get_batch_concurrency()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(query):
+        operations, _ = get_sql_operations(query)
+        if operations:
+            return [TextContent(type="text", text="execute_sql_batch only runs read-only queries")], 0.0
+        statement_arguments = {"query": query, "format": result_format}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if use_async_backend:
+                    result = await execute_sql_async(statement_arguments)
+                else:
+                    result = await asyncio.to_thread(execute_sql, statement_arguments)
+            except ValueError as e:
+                result = [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+            return result, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(run(str(query)) for query in queries))
+    wall_ms = (time.perf_counter() - started) * 1000
+    output = []
+    for i, (query, (result, elapsed_ms)) in enumerate(zip(queries, outcomes), 1):
+        output.append(TextContent(type="text", text=f"-- [{i}] {elapsed_ms:.1f} ms: {' '.join(str(query).split())}"))
+        output.extend(result)
+    output.append(TextContent(
+        type="text",
+        text=f"-- {len(queries)} queries in {wall_ms:.1f} ms "
+             f"(sum {sum(ms for _, ms in outcomes):.1f} ms, concurrency {concurrency})",
+    ))
+    return output
+
+
+def _open_cursor_query(arguments):
+    """Validate open_cursor arguments, returning (config, operations, query, rejection)."""
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("query is required for tool open_cursor")
+    operations, rejection = _authorize_sql(query)
+    if rejection is None and operations:
+        rejection = [TextContent(type="text", text="open_cursor only runs queries that return rows")]
+    return config, operations, query, rejection
+
+
+def _fetch_cursor_args(arguments):
+    cursor_id = arguments.get("cursor_id")
+    if not cursor_id:
+        raise ValueError("cursor_id is required for tool fetch_cursor")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    max_rows = get_result_limits()["max_rows"]
+    rows = int(arguments.get("rows") or get_fetch_size())
+    if rows <= 0:
+        raise ValueError("rows must be positive")
+    if max_rows:
+        rows = min(rows, max_rows)
+    return cursor_id, rows, result_format
+
+
+def _cursor_writer(cursor, result_format):
+    # the page size is the row budget; a byte budget would drop rows of the stream
+    return ResultWriter(get_encoder(result_format, cursor.columns), max_rows=0, max_bytes=0,
+                        chunk_bytes=get_result_limits()["chunk_bytes"])
+
+
+def _cursor_opened(cursor):
+    registry = get_cursor_registry()
+    return [TextContent(
+        type="text",
+        text=f"Opened cursor {cursor.cursor_id} with columns: {', '.join(cursor.columns)}. "
+             f"Read it with fetch_cursor; it is closed after {int(registry.idle_timeout)}s without a fetch",
+    )]
+
+
+def _cursor_page(cursor, writer, first_row):
+    result = writer.finish()
+    if cursor.exhausted:
+        status = (f"cursor {cursor.cursor_id}: rows {first_row}-{cursor.row_count}, end of result, "
+                  f"cursor closed" if writer.row_count else
+                  f"cursor {cursor.cursor_id}: no more rows after {cursor.row_count}, cursor closed")
+    else:
+        status = (f"cursor {cursor.cursor_id}: rows {first_row}-{cursor.row_count}, "
+                  f"call fetch_cursor for more")
+    result.append(TextContent(type="text", text=status))
+    return result
+
+
+def _close_cursor_result(cursor_id, cursor):
+    if cursor is None:
+        return [TextContent(type="text", text=f"Unknown, expired or busy cursor: {cursor_id}")]
+    return [TextContent(type="text", text=f"Closed cursor {cursor_id} after {cursor.row_count} rows")]
+
+
+def _release_cursor(cursor):
+    """Give the pinned connection of a sync backend cursor back to its pool."""
+    pool, config = cursor.release
+    conn = cursor.conn
+    try:
+        if cursor.exhausted:
+            cursor.cursor.close()
+            reset = conn.cursor()
+            reset.execute("SET SESSION net_write_timeout = DEFAULT")
+            reset.close()
+        else:
+            _abort_unbuffered_result(config, pool, conn)
+    except Error as e:
+        logger.info(f"Dropping connection of cursor {cursor.cursor_id}: {e}")
+        pool.discard(conn)
+    finally:
+        pool.release(conn)
+
+
+def _net_write_timeout_sql(registry):
+    # the server gives up on a client that stops reading after net_write_timeout,
+    # an open cursor must survive the whole idle timeout
+    return f"SET SESSION net_write_timeout = {int(registry.idle_timeout) + 60}"
+
+
+def open_cursor(arguments):
+    config, operations, query, rejection = _open_cursor_query(arguments)
+    if rejection:
+        return rejection
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        _release_cursor(expired)
+    registry.check_capacity()
+    _, endpoint_config, query = get_query_router().route(config, query, operations)
+    logger.info(f"will open cursor for SQL: {query}")
+    pool = get_pool(endpoint_config)
+    conn = pool.acquire()
+    try:
+        setup = conn.cursor()
+        setup.execute(_net_write_timeout_sql(registry))
+        setup.close()
+        cursor = conn.cursor()
+        cursor.execute(query)
+    except Error as e:
+        pool.discard(conn)
+        pool.release(conn)
+        logger.error(f"Error opening cursor for SQL '{query}': {e}")
+        return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+    except BaseException:
+        pool.discard(conn)
+        pool.release(conn)
+        raise
+    if cursor.description is None:
+        cursor.close()
+        pool.release(conn)
+        return [TextContent(type="text", text="Query returned no rows to read, no cursor was opened")]
+    entry = OpenCursor(query, [desc[0] for desc in cursor.description], conn, cursor, (pool, endpoint_config))
+    try:
+        registry.add(entry)
+    except ValueError:
+        _release_cursor(entry)
+        raise
+    return _cursor_opened(entry)
+
+
+def fetch_cursor(arguments):
+    cursor_id, rows, result_format = _fetch_cursor_args(arguments)
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        _release_cursor(expired)
+    cursor = registry.checkout(cursor_id)
+    first_row = cursor.row_count + 1
+    try:
+        writer = _cursor_writer(cursor, result_format)
+        fetch_size = get_fetch_size()
+        while writer.row_count < rows:
+            batch = cursor.cursor.fetchmany(min(fetch_size, rows - writer.row_count))
+            if not batch:
+                cursor.exhausted = True
+                break
+            writer.add_rows(batch)
+            cursor.row_count += len(batch)
+        return _cursor_page(cursor, writer, first_row)
+    except Error as e:
+        logger.error(f"Error fetching cursor {cursor_id}: {e}")
+        cursor.exhausted = True
+        cursor.release[0].discard(cursor.conn)
+        return [TextContent(type="text", text=f"Error fetching cursor, it was closed: {str(e)}")]
+    finally:
+        registry.checkin(cursor)
+        if cursor.exhausted:
+            _release_cursor(cursor)
+
+
+def close_cursor(arguments):
+    cursor_id = arguments.get("cursor_id")
+    if not cursor_id:
+        raise ValueError("cursor_id is required for tool close_cursor")
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        _release_cursor(expired)
+    cursor = registry.pop(cursor_id)
+    if cursor is not None:
+        _release_cursor(cursor)
+    return _close_cursor_result(cursor_id, cursor)
+
+
+async def _release_cursor_async(cursor):
+    """_release_cursor for a cursor on the aiomysql backend."""
+    from aiomysql import Error as AsyncError
+    conn = cursor.conn
+    try:
+        if cursor.exhausted and not conn.closed:
+            await cursor.cursor.close()
+            async with conn.cursor() as reset:
+                await reset.execute("SET SESSION net_write_timeout = DEFAULT")
+        else:
+            # closing the socket stops the server sending the rest of the result
+            conn.close()
+    except AsyncError as e:
+        logger.info(f"Dropping connection of cursor {cursor.cursor_id}: {e!r}")
+        conn.close()
+    finally:
+        await cursor.release.release(conn)
+
+
+async def open_cursor_async(arguments):
+    """open_cursor on the aiomysql backend."""
+    from aiomysql import SSCursor, Error as AsyncError
+    config, operations, query, rejection = _open_cursor_query(arguments)
+    if rejection:
+        return rejection
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        await _release_cursor_async(expired)
+    registry.check_capacity()
+    _, endpoint_config, query = get_query_router().route(config, query, operations)
+    logger.info(f"will open cursor for SQL: {query}")
+    pool = get_async_pool(endpoint_config)
+    conn = await pool.acquire()
+    try:
+        async with conn.cursor() as setup:
+            await setup.execute(_net_write_timeout_sql(registry))
+        cursor = await conn.cursor(SSCursor)
+        await asyncio.wait_for(cursor.execute(query), config["read_timeout"])
+    except (AsyncError, asyncio.TimeoutError) as e:
+        conn.close()
+        await pool.release(conn)
+        logger.error(f"Error opening cursor for SQL '{query}': {e!r}")
+        return [TextContent(type="text", text=f"Error executing query: {str(e) or 'timed out'}")]
+    except BaseException:
+        conn.close()
+        await pool.release(conn)
+        raise
+    if cursor.description is None:
+        await cursor.close()
+        await pool.release(conn)
+        return [TextContent(type="text", text="Query returned no rows to read, no cursor was opened")]
+    entry = OpenCursor(query, [desc[0] for desc in cursor.description], conn, cursor, pool)
+    try:
+        registry.add(entry)
+    except ValueError:
+        await _release_cursor_async(entry)
+        raise
+    return _cursor_opened(entry)
+
+
+async def fetch_cursor_async(arguments):
+    """fetch_cursor on the aiomysql backend."""
+    from aiomysql import Error as AsyncError
+    cursor_id, rows, result_format = _fetch_cursor_args(arguments)
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        await _release_cursor_async(expired)
+    cursor = registry.checkout(cursor_id)
+    first_row = cursor.row_count + 1
+    read_timeout = get_db_config()["read_timeout"]
+    try:
+        writer = _cursor_writer(cursor, result_format)
+        fetch_size = get_fetch_size()
+        while writer.row_count < rows:
+            batch = await asyncio.wait_for(
+                cursor.cursor.fetchmany(min(fetch_size, rows - writer.row_count)), read_timeout)
+            if not batch:
+                cursor.exhausted = True
+                break
+            writer.add_rows(batch)
+            cursor.row_count += len(batch)
+        return _cursor_page(cursor, writer, first_row)
+    except (AsyncError, asyncio.TimeoutError, asyncio.CancelledError) as e:
+        logger.error(f"Error fetching cursor {cursor_id}: {e!r}")
+        cursor.exhausted = True
+        cursor.conn.close()
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        return [TextContent(type="text", text=f"Error fetching cursor, it was closed: {str(e) or 'timed out'}")]
+    finally:
+        registry.checkin(cursor)
+        if cursor.exhausted:
+            await _release_cursor_async(cursor)
+
+
+async def close_cursor_async(arguments):
+    """close_cursor on the aiomysql backend."""
+    cursor_id = arguments.get("cursor_id")
+    if not cursor_id:
+        raise ValueError("cursor_id is required for tool close_cursor")
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        await _release_cursor_async(expired)
+    cursor = registry.pop(cursor_id)
+    if cursor is not None:
+        await _release_cursor_async(cursor)
+    return _close_cursor_result(cursor_id, cursor)
+
+
+async def _reap_idle_cursors():
+    """Close cursors as their idle timeout passes, so the connections they pin
+    go back to the pool without waiting for the next cursor call. Returns once
+    no cursor is open; open_cursor starts it again."""
+    registry = get_cursor_registry()
+    while True:
+        delay = registry.next_expiry()
+        if delay is None:
+            return
+        await asyncio.sleep(delay + 0.1)
+        for expired in registry.pop_expired():
+            logger.info(f"Closing cursor {expired.cursor_id} after {int(registry.idle_timeout)}s idle")
+            if use_async_backend:
+                await _release_cursor_async(expired)
+            else:
+                await asyncio.to_thread(_release_cursor, expired)
+
+
+_cursor_reaper = None
+
+
+def _start_cursor_reaper():
+    global _cursor_reaper
+    if _cursor_reaper is None or _cursor_reaper.done():
+        _cursor_reaper = asyncio.create_task(_reap_idle_cursors())
+
 
 def polar4ai_import_doc(arguments: str):
     dir_path = arguments.get("dir")
@@ -620,10 +1837,19 @@ def polar4ai_import_doc(arguments: str):
     table_name = arguments.get("table_name")
     if not table_name:
         table_name =''
+    include = arguments.get("include") or None
+    if isinstance(include, str):
+        include = [include]
+    recursive = bool(arguments.get("recursive", False))
+    prune = bool(arguments.get("prune", False))
     config = get_db_config()
     doc_import = DocImport(config)
     logger.info(f"will import files in {dir_path} to table {table_name}")
-    result_text = doc_import.import_doc(dir_path,table_name)
+    try:
+        result_text = doc_import.import_doc(dir_path, table_name, include, recursive, prune)
+    finally:
+        # the table may have been created as well as written
+        _after_write(config, {table_name or DEFAULT_TABLE_NAME}, ddl=True)
     return [TextContent(type="text", text=f"{result_text}")]
 def polar4ai_search_doc(arguments: str):
     text = arguments.get("text")
@@ -639,22 +1865,195 @@ def polar4ai_search_doc(arguments: str):
     logger.info(f"will query_knowledge,text={text},count={count},table_name={table_name}")
     result = doc_import.query_knowledge(text, count, table_name)
     return [TextContent(type="text", text=f"{result}")]
+_TASK_DONE_STATES = {"finish"}
+_MODEL_DONE_STATES = {"saved", "saved_oss", "serving"}
+_TASK_ID_RE = re.compile(r"[\w-]+")
+
+
+async def _exec_polar4ai(config, sql):
+    if use_async_backend:
+        return await exec_sql_async(config, sql)
+    return await asyncio.to_thread(exec_sql, config, sql)
+
+
+async def _drive_steps(config, steps):
+    """Drive a polar4ai step generator without blocking the event loop on
+    either backend."""
+    try:
+        sql = next(steps)
+        while True:
+            sql = steps.send(await _exec_polar4ai(config, sql))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _poll_polar4ai(job, config, sql, done_states):
+    """Run a SHOW TASK/SHOW MODEL statement every poll interval until the
+    status in its first column is one of done_states. job, if given, gets the
+    status as its progress."""
+    while True:
+        rows, ok = await _exec_polar4ai(config, sql)
+        if not ok or not rows:
+            raise JobFailed(f"Error executing SQL '{sql}'")
+        status = str(rows[0][0])
+        if job is not None:
+            job.progress = status
+        if status.lower() in done_states:
+            return status
+        if "fail" in status.lower() or "error" in status.lower():
+            raise JobFailed(f"PolarDB AI reported {status}")
+        await asyncio.sleep(get_job_manager().poll_interval)
+
+
+async def _wait_for_index_rebuild(config, task_id, index_table_name, job=None):
+    """Poll the PREDICT task rebuilding an index until it is done, then forget
+    the questions translated against the old index while it ran."""
+    if not task_id or not _TASK_ID_RE.fullmatch(task_id):
+        return
+    try:
+        await _poll_polar4ai(job, config, f"/*polar4ai*/SHOW TASK `{task_id}`;", _TASK_DONE_STATES)
+    finally:
+        get_translation_cache().invalidate(_index_scope(index_table_name))
+
+
+_index_rebuild_watchers = set()
+
+
+def _watch_index_rebuild(config, task_id, index_table_name):
+    """Wait for a rebuild started by the foreground tool in the background,
+    which keeps a reference to the task until it is done."""
+    async def watch():
+        try:
+            await _wait_for_index_rebuild(config, task_id, index_table_name)
+        except Exception as e:
+            logger.warning(f"Rebuild of index {index_table_name} did not finish: {e!r}")
+
+    task = asyncio.create_task(watch())
+    _index_rebuild_watchers.add(task)
+    task.add_done_callback(_index_rebuild_watchers.discard)
+
+
+async def _update_index_job(job, arguments, index_table_name='schema_index'):
+    config = get_db_config()
+    info = {}
+    job.progress = "building index"
+    result = await _drive_steps(config, _update_index_steps(arguments, index_table_name, info))
+    await _wait_for_index_rebuild(config, info.get("task_id"), index_table_name, job)
+    return result
+
+
+async def _create_model_job(job, model):
+    config = get_db_config()
+    info = {}
+    job.progress = "creating model"
+    result = await _drive_steps(config, _create_models_steps(model, info))
+    if "model_name" not in info:
+        raise JobFailed(result[0].text)
+    await _poll_polar4ai(job, config, f"/*polar4ai*/SHOW MODEL {info['model_name']};", _MODEL_DONE_STATES)
+    return result
+
+
+def _job_submitted(job):
+    return [TextContent(
+        type="text",
+        text=f"Submitted job {job.job_id}; check it with job_status and get the result with job_result",
+    )]
+
+
+async def job_status(arguments):
+    manager = get_job_manager()
+    job_id = arguments.get("job_id")
+    jobs = [manager.get(job_id)] if job_id else manager.jobs()
+    return [TextContent(type="text", text=json.dumps([job.status() for job in jobs], ensure_ascii=False))]
+
+
+async def job_result(arguments):
+    job_id = arguments.get("job_id")
+    if not job_id:
+        raise ValueError("job_id is required for tool job_result")
+    job = get_job_manager().get(job_id)
+    if job.state == "succeeded":
+        return job.result
+    if job.state == "running":
+        return [TextContent(type="text", text=f"Job {job_id} is still running: {job.progress}")]
+    if job.state == "cancelled":
+        return [TextContent(type="text", text=f"Job {job_id} was cancelled")]
+    return [TextContent(type="text", text=f"Job {job_id} failed: {job.error}")]
+
+
+async def job_cancel(arguments):
+    job_id = arguments.get("job_id")
+    if not job_id:
+        raise ValueError("job_id is required for tool job_cancel")
+    job = get_job_manager().cancel(job_id)
+    if not job.done:
+        await asyncio.wait({job.task}, timeout=5)
+    return [TextContent(type="text", text=f"Job {job_id} is {job.state}")]
+
+
+async def _run_polar4ai(func, steps_func, *args):
+    """Run a polar4ai tool natively on the event loop with the async backend,
+    or in a worker thread otherwise."""
+    if use_async_backend:
+        return await _run_steps_async(get_db_config(), steps_func(*args))
+    return await asyncio.to_thread(func, *args)
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     logger.info(f"Calling tool: {name} with arguments: {arguments}")
     if name == "execute_sql":
+        if use_async_backend:
+            return await execute_sql_async(arguments)
         return await asyncio.to_thread(execute_sql, arguments)
+    elif name == "execute_sql_batch":
+        return await execute_sql_batch(arguments)
+    elif name == "open_cursor":
+        if use_async_backend:
+            result = await open_cursor_async(arguments)
+        else:
+            result = await asyncio.to_thread(open_cursor, arguments)
+        _start_cursor_reaper()
+        return result
+    elif name == "fetch_cursor":
+        if use_async_backend:
+            return await fetch_cursor_async(arguments)
+        return await asyncio.to_thread(fetch_cursor, arguments)
+    elif name == "close_cursor":
+        if use_async_backend:
+            return await close_cursor_async(arguments)
+        return await asyncio.to_thread(close_cursor, arguments)
     elif name == "polar4ai_update_index_for_text_2_sql":
-        return await asyncio.to_thread(polar4ai_update_index_for_text_2_sql, arguments)
+        index_table_name = "schema_index"
+        if arguments.get("background"):
+            return _job_submitted(get_job_manager().submit(
+                "update_index", index_table_name, lambda job: _update_index_job(job, arguments, index_table_name)))
+        info = {}
+        result = await _run_polar4ai(
+            polar4ai_update_index_for_text_2_sql, _update_index_steps, arguments, index_table_name, info)
+        if info.get("task_id"):
+            _watch_index_rebuild(get_db_config(), info["task_id"], index_table_name)
+        return result
     elif name == "polar4ai_text_2_sql":
-        return await asyncio.to_thread(polar4ai_text_2_sql, arguments)
+        return await _run_polar4ai(polar4ai_text_2_sql, _text_2_sql_steps, arguments)
     elif name == "polar4ai_text_2_chart":
-        return await asyncio.to_thread(polar4ai_text_2_chart, arguments)
+        return await _run_polar4ai(polar4ai_text_2_chart, _text_2_chart_steps, arguments)
     elif name == "polar4ai_create_models":
         query_dict = arguments.get("model")
         if query_dict is None:
             raise ValueError("Missing 'query_dict' in arguments")
-        return await asyncio.to_thread(polar4ai_create_models, query_dict)
+        if arguments.get("background"):
+            return _job_submitted(get_job_manager().submit(
+                "create_model", str(query_dict.get("model_name")), lambda job: _create_model_job(job, query_dict)))
+        return await _run_polar4ai(polar4ai_create_models, _create_models_steps, query_dict)
+    elif name == "job_status":
+        return await job_status(arguments)
+    elif name == "job_result":
+        return await job_result(arguments)
+    elif name == "job_cancel":
+        return await job_cancel(arguments)
+    elif name == "bulk_load":
+        return await asyncio.to_thread(bulk_load, arguments)
     elif name == "polar4ai_import_doc":
         return await asyncio.to_thread(polar4ai_import_doc, arguments)
     elif name == "polar4ai_search_doc":
@@ -679,8 +2078,14 @@ def create_starlette_app(app: Server, *, debug: bool = False) -> Starlette:
                 app.create_initialization_options(),
             )
 
+    @asynccontextmanager
+    async def lifespan(starlette_app: Starlette):
+        yield
+        await close_async_pools()
+
     return Starlette(
         debug=debug,
+        lifespan=lifespan,
         routes=[
             Route("/sse", endpoint=handle_sse),
             Mount("/messages/", app=sse.handle_post_message),
@@ -712,6 +2117,8 @@ async def stdio_main():
         except Exception as e:
             logger.error(f"Server error: {str(e)}", exc_info=True)
             raise
+        finally:
+            await close_async_pools()
 
 def get_bool_env(var_name: str, default: bool = False) -> bool:
     value = os.getenv(var_name)
@@ -726,12 +2133,18 @@ def main():
     enable_insert = get_bool_env("POLARDB_MYSQL_ENABLE_INSERT")
     enable_ddl = get_bool_env("POLARDB_MYSQL_ENABLE_DDL")
     logger.info(f"enable_delete: {enable_delete}, enable_update: {enable_update}, enable_insert: {enable_insert}, enable_ddl: {enable_ddl}")
-    if os.getenv("RUN_MODE")=="stdio":
-        asyncio.run(stdio_main())
-    else:
-        bind_host = os.getenv("SSE_BIND_HOST")
-        bind_port = int(os.getenv("SSE_BIND_PORT"))
-        sse_main(bind_host,bind_port)
+    global use_async_backend
+    use_async_backend = get_bool_env("POLARDB_MYSQL_ASYNC")
+    logger.info(f"use_async_backend: {use_async_backend}")
+    try:
+        if os.getenv("RUN_MODE")=="stdio":
+            asyncio.run(stdio_main())
+        else:
+            bind_host = os.getenv("SSE_BIND_HOST")
+            bind_port = int(os.getenv("SSE_BIND_PORT"))
+            sse_main(bind_host,bind_port)
+    finally:
+        close_pools()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,99 @@
+import collections
+import hashlib
+import os
+import threading
+import time
+
+from polardb_mysql_mcp_server.embedding_cache import normalize_text
+
+DEFAULT_TRANSLATION_CACHE_SIZE = 512
+DEFAULT_TRANSLATION_CACHE_TTL = 3600
+
+
+def get_translation_cache_settings():
+    """Get text-to-SQL translation cache settings from environment variables.
+    A size of 0 disables the cache."""
+    return {
+        "max_entries": int(os.getenv("POLARDB_MYSQL_TEXT2SQL_CACHE_SIZE", str(DEFAULT_TRANSLATION_CACHE_SIZE))),
+        "ttl": float(os.getenv("POLARDB_MYSQL_TEXT2SQL_CACHE_TTL", str(DEFAULT_TRANSLATION_CACHE_TTL))),
+    }
+
+
+class TranslationCache:
+    """LRU of the SQL _polar4ai_nl2sql produced for a question.
+
+    Keys combine the index scope (instance, database and index table), the
+    generation of that index and the whitespace-normalized question.
+    Rebuilding an index bumps its generation, so translations made against
+    the old index are never served again and age out of the LRU. Entries
+    older than ``ttl`` seconds are treated as missing, which bounds staleness
+    from index rebuilds done outside this server.
+    """
+
+    def __init__(self, max_entries=DEFAULT_TRANSLATION_CACHE_SIZE, ttl=DEFAULT_TRANSLATION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (sql, stored_at); the right end holds the most recently used
+        self._entries = collections.OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def make_key(self, scope, text):
+        with self._lock:
+            generation = self._generations.get(scope, 0)
+        data = f"{scope}\0{generation}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Return the cached SQL or None."""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl > 0 and time.time() - entry[1] > self.ttl):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, sql):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (sql, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, scope):
+        """Forget every translation made against the index of scope."""
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache() -> TranslationCache:
+    """Return the process-wide translation cache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranslationCache(**get_translation_cache_settings())
+        return _cache
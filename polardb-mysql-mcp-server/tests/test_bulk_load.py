@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+import pytest
+from mysql.connector import DatabaseError
+from mysql.connector.connection import MySQLConnection
+from polardb_mysql_mcp_server import server
+from polardb_mysql_mcp_server.bulk_load import import_path
+
+CONFIG = {"host": "h", "port": 3306, "user": "u", "password": "p", "database": "db", "read_timeout": 1}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def executemany(self, sql, rows):
+        self.conn.batches.append((sql, list(rows)))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.batches = []
+        self.committed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+
+def test_bulk_load_inserts_in_batches(tmp_path):
+    csv_file = tmp_path / "orders.csv"
+    csv_file.write_text("id,note\r\n1,a\r\n2,\r\n3,\"c,d\"\r\n")
+    jsonl_file = tmp_path / "orders.jsonl"
+    jsonl_file.write_text('{"id": 1, "meta": {"k": 1}}\n\n{"id": 2}\n')
+    pool = FakePool()
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=pool), \
+            patch.dict("os.environ", {"POLARDB_MYSQL_BULK_LOAD_BATCH_ROWS": "2",
+                                      "POLARDB_MYSQL_IMPORT_DIR": str(tmp_path)}):
+        assert server.bulk_load({"file": "orders.csv", "table": "orders"})[0].text == \
+            "INSERT operation is not enabled in current tool"
+        with patch.object(server, "enable_insert", True):
+            result = server.bulk_load({"file": "orders.csv", "table": "db.orders"})[0].text
+            assert result.startswith("Loaded 3 rows into db.orders with INSERT batches of 2 rows in ")
+            assert result.endswith(" rows/s)")
+            server.bulk_load({"file": str(jsonl_file), "table": "orders"})
+    sql, rows = pool.conn.batches[0]
+    assert sql == "INSERT INTO `db`.`orders` (`id`, `note`) VALUES (%s, %s)"
+    assert [rows for _, rows in pool.conn.batches[:2]] == [[("1", "a"), ("2", None)], [("3", "c,d")]]
+    assert pool.conn.batches[2] == (
+        "INSERT INTO `orders` (`id`, `meta`) VALUES (%s, %s)", [(1, '{"k": 1}'), (2, None)]
+    )
+    assert pool.conn.committed
+
+
+def test_import_path_stays_inside_the_import_directory(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.csv").write_text("id\n1\n")
+    (tmp_path / "secret.csv").write_text("id\n1\n")
+    (tmp_path / "data" / "link.csv").symlink_to(tmp_path / "secret.csv")
+    directory = str(tmp_path / "data")
+    assert import_path(directory, "a.csv") == str(tmp_path / "data" / "a.csv")
+    assert import_path(directory, str(tmp_path / "data" / "a.csv")) == str(tmp_path / "data" / "a.csv")
+    for name in ("../secret.csv", str(tmp_path / "secret.csv"), "link.csv", ".", "missing.csv"):
+        with pytest.raises(ValueError):
+            import_path(directory, name)
+    with pytest.raises(ValueError, match="POLARDB_MYSQL_IMPORT_DIR"):
+        import_path(None, "a.csv")
+
+
+class WarningCursor:
+    rowcount = 2
+    warning_count = 1
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql)
+
+    def fetchall(self):
+        return [("Warning", 1062, "Duplicate entry '1' for key 'PRIMARY'")]
+
+
+class WarningConnection:
+    def __init__(self):
+        self.statements = []
+        self.rolled_back = False
+        self.committed = False
+
+    def cursor(self):
+        return WarningCursor(self)
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def commit(self):
+        self.committed = True
+
+    def close(self):
+        pass
+
+
+def test_load_data_local_rolls_back_on_warnings(tmp_path):
+    (tmp_path / "orders.csv").write_text("id\n1\n1\n")
+    conn = WarningConnection()
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "connect", return_value=conn), \
+            patch.object(server, "enable_insert", True), \
+            patch.dict("os.environ", {"POLARDB_MYSQL_LOAD_DATA_LOCAL": "true",
+                                      "POLARDB_MYSQL_IMPORT_DIR": str(tmp_path)}):
+        result = server.bulk_load({"file": "orders.csv", "table": "orders"})[0].text
+    assert result.startswith("Error loading file, nothing was loaded: LOAD DATA reported 1 warnings")
+    assert "1062: Duplicate entry" in result
+    assert conn.rolled_back and not conn.committed
+    assert conn.statements[-1] == "SHOW WARNINGS LIMIT 3"
+
+
+def test_load_data_local_only_sends_files_from_the_import_directory(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "orders.csv").write_text("id\n1\n")
+    secret = tmp_path / "secret.csv"
+    secret.write_text("id\n1\n")
+    with patch.object(server, "connect", return_value=WarningConnection()) as connect:
+        with pytest.raises(server.LoadWarnings):
+            server._load_data_local(CONFIG, "`orders`", ["id"], str(tmp_path / "data" / "orders.csv"), "\n")
+    options = {k: v for k, v in connect.call_args.kwargs.items() if k.startswith("allow_local_infile")}
+    conn = MySQLConnection()
+    conn.config(**options)
+    # the connector refuses to send a file outside the import directory
+    conn._query = f"LOAD DATA LOCAL INFILE '{secret}' INTO TABLE orders".encode()
+    with pytest.raises(DatabaseError, match="allow_local_infile_in_path"):
+        conn._handle_load_data_infile(str(secret))
@@ -0,0 +1,82 @@
+import json
+from unittest.mock import patch
+from polardb_mysql_mcp_server.cost_guard import CostGuard, CostEstimate, fingerprint, is_guarded_query, limit_query
+
+JOIN_PLAN = json.dumps({
+    "query_block": {
+        "select_id": 1,
+        "cost_info": {"query_cost": "1250.50"},
+        "nested_loop": [
+            {"table": {"table_name": "o", "access_type": "ALL",
+                       "rows_examined_per_scan": 1000, "rows_produced_per_join": 100}},
+            {"table": {"table_name": "i", "access_type": "ref",
+                       "rows_examined_per_scan": 5, "rows_produced_per_join": 500}},
+        ],
+    }
+})
+
+
+def test_estimate_from_explain_json():
+    estimate = CostEstimate.from_explain_json(JOIN_PLAN)
+    # the inner table is looked up once per row the outer one produces
+    assert (estimate.rows, estimate.cost) == (1000 + 100 * 5, 1250.5)
+    single = CostEstimate.from_explain_json(json.dumps({
+        "query_block": {"cost_info": {"query_cost": "2.1"},
+                        "table": {"table_name": "t", "rows_examined_per_scan": 7}}
+    }))
+    assert (single.rows, single.cost) == (7, 2.1)
+
+
+def test_fingerprint_and_guarded_queries():
+    assert fingerprint("SELECT * FROM t WHERE id = 1") == fingerprint("select *  from t where id = 42;")
+    assert fingerprint("SELECT * FROM t WHERE name = 'a'") == fingerprint("SELECT * FROM t WHERE name = 'it''s'")
+    assert fingerprint("SELECT * FROM t1") != fingerprint("SELECT * FROM t2")
+    assert is_guarded_query("/* report */ SELECT 1")
+    assert is_guarded_query("(select 1) union (select 2)")
+    assert is_guarded_query("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert not is_guarded_query("UPDATE t SET a = 1")
+    assert not is_guarded_query("/*polar4ai*/SELECT * FROM PREDICT(MODEL m) WITH ()")
+
+
+def test_guard_actions_and_plan_cache():
+    estimate = CostEstimate(rows=5000, cost=10)
+    query = "SELECT * FROM orders;"
+    assert CostGuard("reject", max_rows=10000).decide(query, estimate).action == "allow"
+    verdict = CostGuard("reject", max_rows=1000).decide(query, estimate)
+    assert verdict.action == "reject" and "max_rows=1000" in verdict.message()
+    verdict = CostGuard("limit", max_rows=0, max_cost=5, limit=20).decide(query, estimate)
+    assert verdict.action == "limit" and verdict.query == "SELECT * FROM orders\nLIMIT 20"
+    verdict = CostGuard("limit", max_rows=1000).decide("SELECT * FROM t FOR UPDATE", estimate)
+    assert verdict.action == "reject" and "a LIMIT cannot be added" in verdict.message()
+    assert CostGuard("imci", max_rows=1000).decide(query, estimate).query == "/*force_imci*/ SELECT * FROM orders"
+
+    guard = CostGuard("reject", ttl=60)
+    assert guard.cached_estimate("SELECT * FROM t WHERE id = 1") is None
+    guard.store_estimate("SELECT * FROM t WHERE id = 1", estimate)
+    assert guard.cached_estimate("SELECT * FROM t WHERE id = 2") is estimate
+    with patch("polardb_mysql_mcp_server.cost_guard.time.monotonic", return_value=10 ** 9):
+        assert guard.cached_estimate("SELECT * FROM t WHERE id = 3") is None
+    assert guard.stats()["cache_hits"] == 1 and guard.stats()["explains"] == 2
+
+
+def test_limit_query_adds_or_tightens_a_top_level_limit():
+    join = "SELECT o.id, u.id FROM orders o JOIN users u ON u.id = o.user_id -- newest\n"
+    # duplicate column names would break a derived table, a plain LIMIT does not care
+    assert limit_query(join, 100) == join.strip() + "\nLIMIT 100"
+    assert limit_query("SELECT * FROM t WHERE id IN (SELECT id FROM u LIMIT 5000);", 100) == \
+        "SELECT * FROM t WHERE id IN (SELECT id FROM u LIMIT 5000)\nLIMIT 100"
+    assert limit_query("SELECT * FROM t ORDER BY id LIMIT 5000", 100) == "SELECT * FROM t ORDER BY id LIMIT 100"
+    assert limit_query("SELECT * FROM t LIMIT 10", 100) == "SELECT * FROM t LIMIT 10"
+    assert limit_query("SELECT * FROM t LIMIT 20, 5000", 100) == "SELECT * FROM t LIMIT 20, 100"
+    assert limit_query("SELECT * FROM t LIMIT 5000 OFFSET 20", 100) == "SELECT * FROM t LIMIT 100 OFFSET 20"
+    assert limit_query("SELECT 'limit 5' AS `limit` FROM t", 100) == "SELECT 'limit 5' AS `limit` FROM t\nLIMIT 100"
+    assert limit_query("(SELECT a FROM t) UNION (SELECT a FROM u)", 100).endswith(") UNION (SELECT a FROM u)\nLIMIT 100")
+    for query in (
+        "SELECT * FROM t LIMIT ?",
+        "SELECT * FROM t INTO OUTFILE '/tmp/x'",
+        "SELECT a INTO @a FROM t",
+        "SELECT * FROM t FOR UPDATE",
+        "SELECT * FROM t LOCK IN SHARE MODE",
+        "SELECT /*!40001 SQL_NO_CACHE */ * FROM t",
+    ):
+        assert limit_query(query, 100) is None, query
@@ -0,0 +1,141 @@
+import pytest
+from unittest.mock import patch
+from polardb_mysql_mcp_server import server
+from polardb_mysql_mcp_server.cursors import CursorRegistry, OpenCursor
+
+CONFIG = {"host": "h", "port": 3306, "user": "u", "password": "p", "database": "db", "read_timeout": 1}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+        self.closed = False
+
+    def execute(self, sql):
+        self.conn.statements.append(sql)
+        if sql.startswith("SELECT"):
+            self.description = [("id",), ("name",)]
+            self.rows = [(i, f"n{i}") for i in range(1, 6)]
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.borrowed = 0
+
+    def acquire(self):
+        self.borrowed += 1
+        return self.conn
+
+    def release(self, conn):
+        self.borrowed -= 1
+
+    def discard(self, conn):
+        pass
+
+
+def test_registry_capacity_checkout_and_expiry():
+    registry = CursorRegistry(idle_timeout=60, max_cursors=1)
+    cursor = OpenCursor("SELECT 1", ["1"], None, None)
+    registry.add(cursor)
+    with pytest.raises(ValueError, match="Too many open cursors"):
+        registry.check_capacity()
+    assert registry.checkout(cursor.cursor_id) is cursor
+    with pytest.raises(ValueError, match="another request"):
+        registry.checkout(cursor.cursor_id)
+    # a cursor being read is neither closed nor expired
+    assert registry.pop(cursor.cursor_id) is None
+    with patch("polardb_mysql_mcp_server.cursors.time.monotonic", return_value=10 ** 9):
+        assert registry.pop_expired() == []
+    registry.checkin(cursor)
+    with patch("polardb_mysql_mcp_server.cursors.time.monotonic", return_value=10 ** 9):
+        assert registry.pop_expired() == [cursor]
+    with pytest.raises(ValueError, match="Unknown or expired"):
+        registry.checkout(cursor.cursor_id)
+
+
+def test_fetch_cursor_pages_through_a_pinned_connection():
+    pool = FakePool()
+    registry = CursorRegistry(idle_timeout=60, max_cursors=2)
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=pool), \
+            patch.object(server, "get_cursor_registry", return_value=registry):
+        opened = server.open_cursor({"query": "SELECT id, name FROM t"})[0].text
+        cursor_id = opened.split()[2]
+        assert opened.startswith(f"Opened cursor {cursor_id} with columns: id, name")
+        assert pool.conn.statements[0] == "SET SESSION net_write_timeout = 120"
+        page = server.fetch_cursor({"cursor_id": cursor_id, "rows": 3})
+        assert page[0].text == "id,name\r\n1,n1\r\n2,n2\r\n3,n3\r\n"
+        assert page[-1].text == f"cursor {cursor_id}: rows 1-3, call fetch_cursor for more"
+        assert pool.borrowed == 1
+        page = server.fetch_cursor({"cursor_id": cursor_id, "rows": 3})
+        assert page[0].text == "id,name\r\n4,n4\r\n5,n5\r\n"
+        assert page[-1].text == f"cursor {cursor_id}: rows 4-5, end of result, cursor closed"
+        assert pool.borrowed == 0
+        assert pool.conn.statements[-1] == "SET SESSION net_write_timeout = DEFAULT"
+        assert server.close_cursor({"cursor_id": cursor_id})[0].text.startswith("Unknown, expired or busy cursor")
+        with patch.object(server, "enable_delete", True):
+            assert "only runs queries that return rows" in server.open_cursor({"query": "DELETE FROM t"})[0].text
+
+
+def test_add_enforces_capacity_and_next_expiry():
+    registry = CursorRegistry(idle_timeout=60, max_cursors=1)
+    assert registry.next_expiry() is None
+    first = OpenCursor("SELECT 1", ["1"], None, None)
+    registry.add(first)
+    assert 59 < registry.next_expiry() <= 60
+    # another request that passed check_capacity before first was added
+    with pytest.raises(ValueError, match="Too many open cursors"):
+        registry.add(OpenCursor("SELECT 2", ["2"], None, None))
+    registry.checkout(first.cursor_id)
+    assert registry.next_expiry() == 60
+
+
+def test_idle_cursors_are_closed_without_another_cursor_call():
+    import asyncio
+    pool = FakePool()
+    registry = CursorRegistry(idle_timeout=0.05, max_cursors=2)
+
+    async def run():
+        with patch.object(server, "get_db_config", return_value=CONFIG), \
+                patch.object(server, "get_pool", return_value=pool), \
+                patch.object(server, "get_cursor_registry", return_value=registry), \
+                patch.object(server, "_abort_unbuffered_result") as abort:
+            await server.call_tool("open_cursor", {"query": "SELECT id, name FROM t"})
+            assert pool.borrowed == 1
+            await asyncio.wait_for(server._cursor_reaper, 5)
+            abort.assert_called_once()
+        assert pool.borrowed == 0 and registry.stats()["expired"] == 1
+
+    asyncio.run(run())
+
+
+def test_open_cursor_over_capacity_releases_its_connection():
+    pool = FakePool()
+    registry = CursorRegistry(idle_timeout=60, max_cursors=1)
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=pool), \
+            patch.object(server, "get_cursor_registry", return_value=registry), \
+            patch.object(registry, "check_capacity"), \
+            patch.object(server, "_abort_unbuffered_result") as abort:
+        server.open_cursor({"query": "SELECT id, name FROM t"})
+        with pytest.raises(ValueError, match="Too many open cursors"):
+            server.open_cursor({"query": "SELECT id, name FROM t"})
+        abort.assert_called_once()
+    assert pool.borrowed == 1
@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from polardb_mysql_mcp_server.data_query import parse_data_query, decode_cursor, encode_cursor
+
+
+def test_parse_data_query():
+    query = parse_data_query("columns=id,name&limit=10&after=5")
+    assert (query.columns, query.limit, query.after) == (["id", "name"], 10, "5")
+    assert parse_data_query("sample=2.5&sample_method=system").sample == 2.5
+    for bad in ("limit=0", "limit=5000", "sample=0", "sample_method=x", "offset=3", "sample=1&after=2"):
+        with pytest.raises(ValueError):
+            parse_data_query(bad)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([42]), 1) == ["42"]
+    assert decode_cursor(encode_cursor(["a", 3]), 2) == ["a", 3]
+    assert decode_cursor(encode_cursor(["[x"]), 1) == ["[x"]
+    with pytest.raises(ValueError):
+        decode_cursor("1", 2)
+
+
+def test_read_table_data_pages_on_primary_key():
+    from polardb_mysql_mcp_server import server
+    config = {"host": "data-query-test", "port": 1, "database": "db", "read_timeout": 1}
+    queries = []
+
+    async def fetch_all(config, sql, params=None):
+        queries.append((sql, params))
+        if "COUNT(*)" in sql:
+            return ["c", "ct", "ut"], [(1, None, None)]
+        if "STATISTICS" in sql:
+            return ["t", "i", "n", "c"], [("orders", "PRIMARY", 0, "id")]
+        if "INFORMATION_SCHEMA.COLUMNS" in sql:
+            return ["t", "c", "ty", "co"], [("orders", "id", "int", ""), ("orders", "total", "int", "")]
+        if "INFORMATION_SCHEMA.TABLES" in sql:
+            return ["t", "ty", "r", "c"], [("orders", "BASE TABLE", 2, "")]
+        return ["total", "id"], [(10, 1), (20, 2)]
+
+    with patch.object(server, "fetch_all", side_effect=fetch_all):
+        text = asyncio.run(server._read_table_data(config, "orders", parse_data_query("columns=total&limit=2&after=0")))
+    sql, params = queries[-1]
+    assert sql == "SELECT `total`, `id` FROM `orders` WHERE (`id`) > (%s) ORDER BY `id` LIMIT 2"
+    assert params == ("0",)
+    assert text.split("\n") == ["total", "10", "20", "next: polardb-mysql://orders/data?columns=total&limit=2&after=2"]
+
+
+def test_system_sample_reads_blocks_scaled_by_percentage():
+    from polardb_mysql_mcp_server import server
+    config = {"host": "data-sample-test", "port": 1, "database": "db", "read_timeout": 1}
+    queries = []
+
+    async def fetch_all(config, sql, params=None):
+        queries.append((sql, params))
+        if "COUNT(*)" in sql:
+            return ["c", "h"], [(1, 1)]
+        if "lower_case_table_names" in sql:
+            return ["l"], [(0,)]
+        if "STATISTICS" in sql:
+            return ["t", "i", "n", "c"], [("orders", "PRIMARY", 0, "id")]
+        if "INFORMATION_SCHEMA.COLUMNS" in sql:
+            return ["t", "c", "ty", "co"], [("orders", "id", "bigint", ""), ("orders", "total", "int", "")]
+        if "INFORMATION_SCHEMA.TABLES" in sql:
+            return ["t", "ty", "r", "c"], [("orders", "BASE TABLE", 1000, "")]
+        if sql.startswith("SELECT MIN"):
+            return ["lo", "hi"], [(1, 1000)]
+        # two overlapping blocks come back with a shared row
+        return ["id", "total"], [(7, 70), (8, 80), (8, 80), (500, 5)]
+
+    with patch.object(server, "fetch_all", side_effect=fetch_all):
+        text = asyncio.run(server._read_table_data(config, "orders", parse_data_query("sample=2&sample_method=system")))
+    sql, params = queries[-1]
+    # 2% of 1000 keys is 20 rows, read as 10 blocks of 2
+    assert sql.count("UNION ALL") == 9 and len(params) == 10
+    assert sql.startswith("(SELECT * FROM `orders` WHERE `id` >= %s ORDER BY `id` LIMIT 2)")
+    assert text.split("\n") == ["id,total", "7,70", "8,80", "500,5"]
+    queries.clear()
+    with patch.object(server, "fetch_all", side_effect=fetch_all):
+        asyncio.run(server._read_table_data(config, "orders", parse_data_query("sample=5&limit=3")))
+    assert queries[-1] == ("SELECT * FROM `orders` WHERE RAND() < %s ORDER BY RAND() LIMIT 3", (0.05,))
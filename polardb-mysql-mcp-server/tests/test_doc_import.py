@@ -0,0 +1,184 @@
+import os
+from unittest.mock import patch
+from polardb_mysql_mcp_server.doc_import import DocImport
+from polardb_mysql_mcp_server.embedding_cache import EmbeddingCache
+
+TEST_DOC_DIR = os.path.join(os.path.dirname(__file__), "test_doc")
+
+
+def make_doc_import(**kwargs):
+    doc_import = DocImport({}, **kwargs)
+    doc_import.embedding_cache = EmbeddingCache()
+    return doc_import
+
+
+def fake_exec_sql(sql, params=None):
+    if "predict(" in sql:
+        count = sql.count(" AS chunk_index")
+        if count:
+            # keyed rows, deliberately not in input order
+            return [(i, f"[0.{i}]") for i in reversed(range(count))], True
+        return [("[0.1,0.2]",)], True
+    return [], True
+
+
+def test_import_doc_batches_embedding_and_inserts(monkeypatch):
+    monkeypatch.setenv("POLARDB_MYSQL_IMPORT_BATCH_SIZE", "4")
+    monkeypatch.setenv("POLARDB_MYSQL_IMPORT_WORKERS", "1")
+    doc_import = make_doc_import()
+    with patch.object(doc_import, "exec_sql", side_effect=fake_exec_sql) as exec_sql, \
+            patch.object(doc_import, "insert_chunks", side_effect=lambda table, chunks: len(chunks)) as insert, \
+            patch.object(doc_import, "exec_in_transaction", return_value=0):
+        result = doc_import.import_doc(TEST_DOC_DIR)
+    inserted = sum(len(call.args[1]) for call in insert.call_args_list)
+    predicts = [call.args[0] for call in exec_sql.call_args_list if "predict(" in call.args[0]]
+    assert result.startswith(f"success import {inserted} entries with 2 files")
+    assert inserted > 4
+    assert len(predicts) == insert.call_count == (inserted + 3) // 4
+    assert all(len(call.args[1]) <= 4 for call in insert.call_args_list)
+
+
+def test_texts_to_vects_falls_back_on_row_mismatch():
+    doc_import = make_doc_import()
+    with patch.object(doc_import, "exec_sql", return_value=([("[1]",)], True)) as exec_sql:
+        assert doc_import.texts_to_vects(["a", "b"]) == ["[1]", "[1]"]
+    # one batched call plus one call per text
+    assert exec_sql.call_count == 3
+
+
+def test_texts_to_vects_matches_rows_on_chunk_index():
+    doc_import = make_doc_import()
+    rows = [(2, "[2]"), ("[0]", 0), (1, "[1]")]
+    with patch.object(doc_import, "exec_sql", return_value=(rows, True)) as exec_sql:
+        assert doc_import.texts_to_vects(["a", "b", "c"]) == ["[0]", "[1]", "[2]"]
+    assert exec_sql.call_count == 1
+    assert "SELECT 1 AS chunk_index, 'b' AS chunk_content" in exec_sql.call_args.args[0]
+
+
+def test_get_all_docxs_filters_and_recurses(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("a.md", "b.docx", "c.txt", "sub/d.md"):
+        (tmp_path / name).write_text("x")
+    doc_import = make_doc_import()
+    names = [name for _, name in doc_import.get_all_docxs(str(tmp_path))]
+    assert names == ["a.md", "b.docx"]
+    names = [name for _, name in doc_import.get_all_docxs(str(tmp_path), ["*.md"], recursive=True)]
+    assert names == ["a.md", os.path.join("sub", "d.md")]
+
+
+def test_iter_chunks_parses_in_worker_processes(tmp_path):
+    doc_import = make_doc_import()
+    (tmp_path / "broken.docx").write_bytes(b"not a zip file")
+    docs = doc_import.get_all_docxs(TEST_DOC_DIR) + doc_import.get_all_docxs(str(tmp_path))
+    sequential = list(doc_import.iter_chunks(docs, workers=1))
+    parallel = list(doc_import.iter_chunks(docs, workers=2))
+    assert parallel == sequential
+    assert [name for name, _ in parallel] == [name for _, name in docs[:2]]
+
+
+def test_import_doc_only_processes_changes(tmp_path, monkeypatch):
+    from polardb_mysql_mcp_server.doc_import import _chunk_hash
+    monkeypatch.setenv("POLARDB_MYSQL_IMPORT_WORKERS", "1")
+    (tmp_path / "a.md").write_text("alpha\n\ngamma")
+    (tmp_path / "b.md").write_text("beta")
+    b_mtime = os.stat(tmp_path / "b.md").st_mtime
+    manifest_rows = [
+        (1, "a.md", 0.0, _chunk_hash("alpha")),
+        (2, "a.md", 0.0, _chunk_hash("outdated")),
+        (3, "b.md", b_mtime, _chunk_hash("beta")),
+        (4, "c.md", 0.0, _chunk_hash("deleted")),
+    ]
+
+    def exec_sql(sql, params=None):
+        if "information_schema" in sql:
+            return [("id",), ("file_mtime",), ("chunk_hash",)], True
+        if sql.startswith("select id, file_name"):
+            return manifest_rows, True
+        return fake_exec_sql(sql)
+
+    doc_import = make_doc_import(chunk_size_=6, chunk_overlap_=0)
+    with patch.object(doc_import, "exec_sql", side_effect=exec_sql), \
+            patch.object(doc_import, "insert_chunks", side_effect=lambda table, chunks: len(chunks)) as insert, \
+            patch.object(doc_import, "exec_in_transaction", return_value=1) as transaction:
+        result = doc_import.import_doc(str(tmp_path), prune=True)
+    assert [chunk[0] for call in insert.call_args_list for chunk in call.args[1]] == ["gamma"]
+    statements = [statement for call in transaction.call_args_list for statement in call.args[0]]
+    assert statements[0][1] == [2]
+    assert statements[1][1][2] == "a.md"
+    assert statements[2][1] == ("c.md", os.path.realpath(tmp_path))
+    assert result.startswith("success import 1 entries with 1 files")
+    assert "1 files unchanged, 1 chunks kept, 2 chunks removed" in result
+
+
+def test_text_to_vect_uses_embedding_cache():
+    doc_import = make_doc_import()
+    with patch.object(doc_import, "exec_sql", return_value=([("[1]",)], True)) as exec_sql:
+        assert doc_import.text_to_vect("load  balancing") == "[1]"
+        assert doc_import.text_to_vect("load balancing ") == "[1]"
+        assert doc_import.texts_to_vects(["load balancing", "other"]) == ["[1]", "[1]"]
+    assert exec_sql.call_count == 2
+    assert doc_import.embedding_cache.stats()["hits"] == 2
+
+
+class FakeKnowledgeBase:
+    """Rows of one knowledge base table, kept in memory."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def exec_sql(self, sql, params=None):
+        if "information_schema" in sql:
+            return [("id",), ("file_mtime",), ("chunk_hash",), ("source_dir",)], True
+        if sql.startswith("select id, file_name"):
+            return [
+                (row_id, row["file_name"], row["file_mtime"], row["chunk_hash"])
+                for row_id, row in self.rows.items() if row["source_dir"] in (params[0], None)
+            ], True
+        return fake_exec_sql(sql)
+
+    def insert_chunks(self, table, chunks):
+        for text, file_name, _, mtime, chunk_hash, source_dir in chunks:
+            self.rows[len(self.rows) + 1] = {
+                "content": text, "file_name": file_name, "file_mtime": mtime,
+                "chunk_hash": chunk_hash, "source_dir": source_dir,
+            }
+        return len(chunks)
+
+    def _in_scope(self, row, file_name, source_dir):
+        return row["file_name"] == file_name and row["source_dir"] in (source_dir, None)
+
+    def exec_in_transaction(self, statements):
+        for sql, params in statements:
+            if "where id in" in sql:
+                for row_id in params:
+                    del self.rows[row_id]
+            elif sql.startswith("update"):
+                mtime, source_dir, file_name, _ = params
+                for row in self.rows.values():
+                    if self._in_scope(row, file_name, source_dir):
+                        row.update(file_mtime=mtime, source_dir=source_dir)
+            else:
+                file_name, source_dir = params
+                self.rows = {row_id: row for row_id, row in self.rows.items()
+                             if not self._in_scope(row, file_name, source_dir)}
+        return 0
+
+
+def test_import_dirs_sharing_a_table_keep_their_chunks(tmp_path, monkeypatch):
+    monkeypatch.setenv("POLARDB_MYSQL_IMPORT_WORKERS", "1")
+    for name, text in (("first", "alpha"), ("second", "beta")):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "README.md").write_text(text)
+    table = FakeKnowledgeBase()
+    doc_import = make_doc_import()
+    with patch.object(doc_import, "exec_sql", side_effect=table.exec_sql), \
+            patch.object(doc_import, "insert_chunks", side_effect=table.insert_chunks), \
+            patch.object(doc_import, "exec_in_transaction", side_effect=table.exec_in_transaction):
+        doc_import.import_doc(str(tmp_path / "first"))
+        doc_import.import_doc(str(tmp_path / "second"), prune=True)
+        result = doc_import.import_doc(str(tmp_path / "first"), prune=True)
+    assert sorted((row["source_dir"], row["content"]) for row in table.rows.values()) == [
+        (os.path.realpath(tmp_path / "first"), "alpha"),
+        (os.path.realpath(tmp_path / "second"), "beta"),
+    ]
+    assert result.endswith("1 files unchanged, 0 chunks kept, 0 chunks removed")
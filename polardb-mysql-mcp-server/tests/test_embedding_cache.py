@@ -0,0 +1,40 @@
+from unittest.mock import patch
+from polardb_mysql_mcp_server.embedding_cache import EmbeddingCache
+
+
+def test_memory_tier_is_lru():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", "[1]")
+    cache.put("b", "[2]")
+    assert cache.get("a") == "[1]"
+    cache.put("c", "[3]")
+    assert cache.get("b") is None
+    assert cache.get("a") == "[1]"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["memory_entries"]) == (2, 1, 2)
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    cache = EmbeddingCache(max_entries=0, ttl=60, path=path)
+    key = EmbeddingCache.make_key("scope", " hello\n world ")
+    assert key == EmbeddingCache.make_key("scope", "hello world")
+    cache.put(key, "[1,2]")
+    cache.close()
+    cache = EmbeddingCache(max_entries=1, ttl=60, path=path)
+    assert cache.get(key) == "[1,2]"
+    assert cache.stats()["disk_hits"] == 1
+    cache._memory.clear()
+    with patch("polardb_mysql_mcp_server.embedding_cache.time.time", return_value=10 ** 10):
+        assert cache.get(key) is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_tier_is_size_bounded(tmp_path):
+    cache = EmbeddingCache(max_entries=0, path=str(tmp_path / "embeddings.db"), max_disk_entries=2)
+    with patch("polardb_mysql_mcp_server.embedding_cache.time.time", side_effect=[1, 2, 3]):
+        for i in range(3):
+            cache.put(str(i), f"[{i}]")
+    cache._trim_disk_locked(0)
+    assert cache.stats()["disk_entries"] == 2
+    assert cache.get("0") is None
@@ -0,0 +1,47 @@
+import base64
+import csv
+import datetime
+import decimal
+import io
+import json
+import pytest
+from polardb_mysql_mcp_server.encoders import encode_result, check_format
+
+COLUMNS = ["id", "name", "price", "created", "raw"]
+ROWS = [
+    (1, 'a,"quoted"\nvalue', decimal.Decimal("1.50"), datetime.datetime(2024, 1, 2, 3, 4, 5), b"\xff\x00"),
+    (2, None, None, None, b"text"),
+]
+
+
+def test_csv_quotes_and_escapes():
+    text = encode_result(COLUMNS, ROWS, "csv")
+    parsed = list(csv.reader(io.StringIO(text)))
+    assert parsed[0] == COLUMNS
+    assert parsed[1] == ["1", 'a,"quoted"\nvalue', "1.50", "2024-01-02 03:04:05", "0xff00"]
+    assert parsed[2] == ["2", "", "", "", "text"]
+
+
+def test_jsonl_and_columnar_json():
+    lines = encode_result(COLUMNS, ROWS, "jsonl").splitlines()
+    first = json.loads(lines[0])
+    assert first["name"] == 'a,"quoted"\nvalue'
+    assert first["price"] == "1.50"
+    assert first["created"] == "2024-01-02T03:04:05"
+    doc = json.loads(encode_result(COLUMNS, ROWS, "columnar_json"))
+    assert doc["columns"] == COLUMNS
+    assert doc["data"][0] == [1, 2]
+    assert doc["data"][1] == ['a,"quoted"\nvalue', None]
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    data = base64.b64decode(encode_result(COLUMNS, ROWS, "arrow"))
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.column_names == COLUMNS
+    assert table.column("id").to_pylist() == [1, 2]
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError):
+        check_format("xml")
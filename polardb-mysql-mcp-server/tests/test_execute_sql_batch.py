@@ -0,0 +1,36 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+from mcp.types import TextContent
+from polardb_mysql_mcp_server import server
+
+
+def test_batch_runs_concurrently_in_order_and_rejects_writes():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def execute_sql(arguments):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return [TextContent(type="text", text=f"result of {arguments['query']}")]
+
+    queries = [f"SELECT COUNT(*) FROM t{i}" for i in range(6)] + ["DELETE FROM t0"]
+    with patch.object(server, "execute_sql", side_effect=execute_sql), \
+            patch.dict("os.environ", {"POLARDB_MYSQL_BATCH_CONCURRENCY": "3"}):
+        started = time.perf_counter()
+        output = asyncio.run(server.execute_sql_batch({"queries": queries}))
+        elapsed = time.perf_counter() - started
+    assert peak == 3
+    assert elapsed < 6 * 0.05
+    texts = [item.text for item in output]
+    assert texts[0].startswith("-- [1] ") and texts[0].endswith(" ms: SELECT COUNT(*) FROM t0")
+    assert texts[1:12:2] == [f"result of SELECT COUNT(*) FROM t{i}" for i in range(6)]
+    assert texts[13] == "execute_sql_batch only runs read-only queries"
+    assert texts[-1].startswith("-- 7 queries in ") and texts[-1].endswith("concurrency 3)")
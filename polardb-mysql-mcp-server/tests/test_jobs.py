@@ -0,0 +1,103 @@
+import asyncio
+from unittest.mock import patch
+from polardb_mysql_mcp_server import server
+from polardb_mysql_mcp_server.jobs import JobManager, JobFailed
+from polardb_mysql_mcp_server.translation_cache import TranslationCache
+
+CONFIG = {"host": "h", "port": 3306, "user": "u", "password": "p", "database": "db", "read_timeout": 1}
+
+
+def test_job_manager_states():
+    async def run():
+        manager = JobManager(max_jobs=2, timeout=5)
+
+        async def ok(job):
+            job.progress = "working"
+            return ["done"]
+
+        async def fail(job):
+            raise JobFailed("boom")
+
+        async def forever(job):
+            await asyncio.sleep(60)
+
+        jobs = [manager.submit("t", "ok", ok), manager.submit("t", "fail", fail)]
+        await asyncio.gather(*(job.task for job in jobs))
+        assert [job.state for job in jobs] == ["succeeded", "failed"]
+        assert jobs[0].result == ["done"] and jobs[1].status()["error"] == "boom"
+        slow = manager.submit("t", "slow", forever)
+        manager.submit("t", "slow", forever)
+        try:
+            manager.submit("t", "slow", forever)
+            assert False, "max_jobs was not enforced"
+        except ValueError:
+            pass
+        manager.cancel(slow.job_id)
+        await asyncio.wait({slow.task})
+        assert slow.state == "cancelled"
+        assert manager.stats() == {"running": 1, "succeeded": 1, "failed": 1, "cancelled": 1}
+
+    asyncio.run(run())
+
+
+def test_create_model_job_polls_until_saved():
+    statuses = iter(["training", "training", "saved_oss"])
+    statements = []
+
+    async def exec_polar4ai(config, sql):
+        statements.append(sql)
+        if sql.startswith("/*polar4ai*/SHOW MODEL"):
+            return [(next(statuses), "oss://m")], True
+        return [], True
+
+    model = {"model_name": "m1", "model_class": "lightgbm", "table_name": "t", "x_cols": "a,b", "y_cols": "c"}
+
+    async def run():
+        manager = JobManager(poll_interval=0)
+        with patch.object(server, "get_db_config", return_value=CONFIG), \
+                patch.object(server, "get_job_manager", return_value=manager), \
+                patch.object(server, "_exec_polar4ai", side_effect=exec_polar4ai):
+            submitted = await server.call_tool("polar4ai_create_models", {"model": model, "background": True})
+            job_id = submitted[0].text.split()[2].rstrip(";")
+            await manager.get(job_id).task
+            status = await server.call_tool("job_status", {"job_id": job_id})
+            result = await server.call_tool("job_result", {"job_id": job_id})
+        assert '"state": "succeeded"' in status[0].text and '"progress": "saved_oss"' in status[0].text
+        assert result[0].text == "创建m1模型成功"
+        assert statements[0].startswith("/*polar4ai*/CREATE MODEL m1 ")
+        assert statements[1:] == ["/*polar4ai*/SHOW MODEL m1;"] * 3
+
+    asyncio.run(run())
+
+
+def test_foreground_index_rebuild_invalidates_translations_when_done():
+    statuses = iter(["running", "finish"])
+
+    def exec_sql(config, sql):
+        if sql == "/*polar4ai*/show tables;":
+            return [("schema_index",)], True
+        if sql.startswith("/*polar4ai*/SELECT COUNT(*)"):
+            return [(3,)], True
+        return [("task-1",)], True
+
+    async def exec_polar4ai(config, sql):
+        assert sql == "/*polar4ai*/SHOW TASK `task-1`;"
+        return [(next(statuses),)], True
+
+    async def run():
+        cache = TranslationCache(max_entries=8)
+        with patch.object(server, "get_db_config", return_value=CONFIG), \
+                patch.object(server, "get_job_manager", return_value=JobManager(poll_interval=0)), \
+                patch.object(server, "get_translation_cache", return_value=cache), \
+                patch.object(server, "exec_sql", side_effect=exec_sql), \
+                patch.object(server, "_exec_polar4ai", side_effect=exec_polar4ai):
+            result = await server.call_tool("polar4ai_update_index_for_text_2_sql", {"force_update": True})
+            assert result[0].text == "更新索引表(schema_index)成功"
+            # a question translated while the index is being rebuilt
+            key = cache.make_key(server._index_scope("schema_index"), "how many orders")
+            cache.put(key, "SELECT 1")
+            await asyncio.gather(*server._index_rebuild_watchers)
+            assert cache.get(cache.make_key(server._index_scope("schema_index"), "how many orders")) is None
+        assert cache.stats()["invalidations"] == 2
+
+    asyncio.run(run())
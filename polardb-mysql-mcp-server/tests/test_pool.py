@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from polardb_mysql_mcp_server.pool import ConnectionPool
+
+
+def make_conn():
+    conn = MagicMock()
+    conn.unread_result = False
+    conn.in_transaction = False
+    conn.is_connected.return_value = True
+    return conn
+
+
+@patch("polardb_mysql_mcp_server.pool.connect")
+def test_pool_reuses_connection(mock_connect):
+    mock_connect.side_effect = lambda **kwargs: make_conn()
+    pool = ConnectionPool({"host": "h"}, size=2, timeout=1)
+    with pool.connection() as conn1:
+        pass
+    with pool.connection() as conn2:
+        pass
+    assert conn1 is conn2
+    assert mock_connect.call_count == 1
+    conn2.ping.assert_called_with(reconnect=False)
+
+
+@patch("polardb_mysql_mcp_server.pool.connect")
+def test_pool_times_out_when_exhausted(mock_connect):
+    mock_connect.side_effect = lambda **kwargs: make_conn()
+    pool = ConnectionPool({"host": "h"}, size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolError):
+            pool.acquire()
+    assert pool.stats()["in_use"] == 0
+
+
+@patch("polardb_mysql_mcp_server.pool.connect")
+def test_pool_replaces_dead_and_idle_connections(mock_connect):
+    mock_connect.side_effect = lambda **kwargs: make_conn()
+    pool = ConnectionPool({"host": "h"}, size=1, timeout=1, max_idle=60)
+    with pool.connection() as conn1:
+        conn1.ping.side_effect = Error("gone")
+    with pool.connection() as conn2:
+        pass
+    assert conn2 is not conn1
+    conn1.close.assert_called()
+    pool.max_idle = 0
+    with pool.connection() as conn3:
+        pass
+    assert conn3 is not conn2
+    assert pool.stats()["open"] == 1
+
+
+@patch("polardb_mysql_mcp_server.pool.connect")
+def test_pool_resets_transaction_and_discards_unread(mock_connect):
+    mock_connect.side_effect = lambda **kwargs: make_conn()
+    pool = ConnectionPool({"host": "h"}, size=1, timeout=1)
+    with pool.connection() as conn1:
+        conn1.in_transaction = True
+    conn1.rollback.assert_called_once()
+    with pool.connection() as conn2:
+        conn2.unread_result = True
+    assert conn2 is conn1
+    with pool.connection() as conn3:
+        pass
+    assert conn3 is not conn1
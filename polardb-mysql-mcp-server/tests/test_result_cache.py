@@ -0,0 +1,120 @@
+from unittest.mock import patch
+from mcp.types import TextContent
+from polardb_mysql_mcp_server.result_cache import ResultCache, is_cacheable, normalize_sql, referenced_tables
+
+CONFIG = {"host": "h", "port": 3306, "user": "u", "database": "db"}
+
+
+def result(text):
+    return [TextContent(type="text", text=text)]
+
+
+def test_cacheable_queries_and_tables():
+    assert is_cacheable("SELECT COUNT(*) FROM orders", set())
+    assert is_cacheable("SELECT user, `schema` FROM accounts WHERE note = 'now()'", set())
+    assert not is_cacheable("SELECT * FROM t WHERE created > NOW() - INTERVAL 1 DAY", set())
+    assert not is_cacheable("SELECT CURRENT_DATE", set())
+    assert not is_cacheable("SELECT * FROM t ORDER BY RAND()", set())
+    assert not is_cacheable("SELECT * FROM t FOR UPDATE", set())
+    assert not is_cacheable("UPDATE t SET a = 1", {"UPDATE"})
+    assert not is_cacheable("SHOW GLOBAL STATUS", set())
+    assert not is_cacheable("/* who */ show processlist", set())
+    assert not is_cacheable("SELECT * FROM information_schema.PROCESSLIST", set())
+    assert not is_cacheable("SELECT * FROM `performance_schema` . global_status", set())
+    assert not is_cacheable("SELECT * FROM PROCESSLIST", set(), "INFORMATION_SCHEMA")
+    assert is_cacheable("SELECT * FROM t WHERE note = 'mysql.user'", set(), "db")
+    assert normalize_sql("SELECT  *\nFROM t WHERE a = 'x  y';") == "SELECT * FROM t WHERE a = 'x  y'"
+    assert referenced_tables("SELECT * FROM a x, db.`B` AS y JOIN c ON 1 WHERE s = 'from z'") == {"a", "b", "c"}
+    assert referenced_tables("LOAD DATA LOCAL INFILE 'a.csv' INTO TABLE db.`T` (id)") == {"t"}
+    assert referenced_tables("INSERT INTO table_x VALUES (1)") == {"table_x"}
+
+
+def test_lru_is_bounded_by_bytes_and_ttl():
+    cache = ResultCache(enabled=True, max_bytes=10, ttl=60)
+    key1 = cache.make_key(CONFIG, "SELECT * FROM a", None)
+    key2 = cache.make_key(CONFIG, "SELECT * FROM b", None)
+    assert cache.make_key(CONFIG, "SELECT *  FROM a;", None) == key1
+    assert cache.make_key(dict(CONFIG, user="v"), "SELECT * FROM a", None) != key1
+    assert cache.make_key(CONFIG, "SELECT * FROM a", "jsonl") != key1
+    cache.put(key1, result("123456"), "SELECT * FROM a", cache.token("SELECT * FROM a"))
+    assert cache.get(key1)[0].text == "123456"
+    cache.put(key2, result("7890"), "SELECT * FROM b", cache.token("SELECT * FROM b"))
+    cache.get(key1)
+    cache.put(cache.make_key(CONFIG, "SELECT 1 FROM c", None), result("x"), "SELECT 1 FROM c", cache.token("SELECT 1 FROM c"))
+    # key2 was least recently used
+    assert cache.get(key2) is None
+    assert cache.stats()["evictions"] == 1
+    with patch("polardb_mysql_mcp_server.result_cache.time.monotonic", return_value=10 ** 9):
+        assert cache.get(key1) is None
+    cache.put(key2, result("x" * 11), "SELECT * FROM b", cache.token("SELECT * FROM b"))
+    assert cache.get(key2) is None
+    assert cache.stats()["hit_rate"] == 0.4
+
+
+def test_writes_invalidate_the_tables_they_touch():
+    cache = ResultCache(enabled=True)
+    orders = cache.make_key(CONFIG, "SELECT * FROM orders", None)
+    users = cache.make_key(CONFIG, "SELECT * FROM users u JOIN roles r ON u.role = r.id", None)
+    base_tables = {"orders", "users", "roles"}
+    for key, query in ((orders, "SELECT * FROM orders"), (users, "SELECT * FROM users u JOIN roles r ON u.role = r.id")):
+        cache.put(key, result("x"), query, cache.token(query), base_tables)
+    cache.invalidate_statement("UPDATE `roles` SET name = 'x' WHERE id = 1", {"UPDATE"})
+    assert cache.get(users) is None and cache.get(orders) is not None
+    cache.invalidate_statement("ALTER TABLE other ADD COLUMN c int", {"DDL"})
+    assert cache.get(orders) is None
+
+
+def test_writes_drop_entries_that_may_read_a_view():
+    cache = ResultCache(enabled=True)
+    base_tables = {"orders", "users"}
+    entries = {}
+    for query, tables in (("SELECT * FROM orders", base_tables), ("SELECT * FROM order_totals", base_tables),
+                          ("SELECT * FROM users", None)):
+        entries[query] = cache.make_key(CONFIG, query, None)
+        cache.put(entries[query], result("x"), query, cache.token(query), tables)
+    # order_totals is not a base table and users was cached without knowing
+    cache.invalidate_statement("INSERT INTO audit VALUES (1)", {"INSERT"})
+    assert cache.get(entries["SELECT * FROM orders"]) is not None
+    assert cache.get(entries["SELECT * FROM order_totals"]) is None
+    assert cache.get(entries["SELECT * FROM users"]) is None
+
+
+def test_reads_started_before_a_write_are_not_cached():
+    cache = ResultCache(enabled=True)
+    query = "SELECT * FROM orders"
+    key = cache.make_key(CONFIG, query, None)
+    token = cache.token(query)
+    cache.invalidate_statement("DELETE FROM orders", {"DELETE"})
+    cache.put(key, result("stale"), query, token, {"orders"})
+    assert cache.get(key) is None
+    token = cache.token(query)
+    cache.invalidate_statement("DELETE FROM users", {"DELETE"})
+    cache.put(key, result("fresh"), query, token, {"orders", "users"})
+    assert cache.get(key)[0].text == "fresh"
+    token = cache.token(query)
+    cache.invalidate_statement("TRUNCATE TABLE x", {"DDL"})
+    cache.put(key, result("stale"), query, token, {"orders"})
+    assert cache.get(key) is None
+
+
+def test_doc_import_invalidates_the_table_it_writes():
+    from polardb_mysql_mcp_server import server
+
+    class FakeDocImport:
+        def __init__(self, config):
+            pass
+
+        def import_doc(self, *args):
+            return "imported"
+
+    cache = ResultCache(enabled=True)
+    keys = {}
+    for query in ("SELECT * FROM default_knowledge_base", "SELECT * FROM orders"):
+        keys[query] = cache.make_key(CONFIG, query, None)
+        cache.put(keys[query], result("x"), query, cache.token(query), {"default_knowledge_base", "orders"})
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_result_cache", return_value=cache), \
+            patch.object(server, "DocImport", FakeDocImport):
+        server.polar4ai_import_doc({"dir": "/docs"})
+    assert cache.get(keys["SELECT * FROM default_knowledge_base"]) is None
+    assert cache.get(keys["SELECT * FROM orders"]) is not None
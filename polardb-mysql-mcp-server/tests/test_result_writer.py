@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+from polardb_mysql_mcp_server import server
+from polardb_mysql_mcp_server.encoders import get_encoder
+from polardb_mysql_mcp_server.result_writer import ResultWriter
+
+
+def test_result_writer_chunks_without_truncation():
+    writer = ResultWriter(get_encoder("csv", ["id", "name"]), max_rows=0, max_bytes=0, chunk_bytes=16)
+    assert writer.add_rows([(1, "a"), (2, "b")])
+    assert writer.add_rows([(3, "c")])
+    chunks = writer.finish()
+    assert len(chunks) > 1
+    assert all(len(c.text.encode()) <= 16 for c in chunks)
+    assert "".join(c.text for c in chunks) == "id,name\r\n1,a\r\n2,b\r\n3,c\r\n"
+    assert not writer.truncated
+
+
+def test_result_writer_stops_at_row_budget():
+    writer = ResultWriter(get_encoder("csv", ["id"]), max_rows=2, max_bytes=0)
+    assert not writer.add_rows([(1,), (2,), (3,)])
+    chunks = writer.finish()
+    assert chunks[0].text == "id\r\n1\r\n2\r\n"
+    assert "truncated after 2 rows" in chunks[-1].text
+
+
+def test_result_writer_stops_at_byte_budget():
+    writer = ResultWriter(get_encoder("csv", ["v"]), max_rows=0, max_bytes=13)
+    assert not writer.add_rows([("aaa",), ("bbb",), ("ccc",)])
+    assert writer.row_count == 2
+    assert writer.truncated
+
+
+def test_result_writer_keeps_columnar_blocks_separate():
+    writer = ResultWriter(get_encoder("columnar_json", ["id"]), max_rows=0, max_bytes=0, chunk_bytes=1024)
+    writer.add_rows([(1,), (2,)])
+    writer.add_rows([(3,)])
+    chunks = writer.finish()
+    assert [c.text for c in chunks] == ['{"columns":["id"],"data":[[1,2]]}', '{"columns":["id"],"data":[[3]]}']
+
+
+CONFIG = {"host": "h", "port": 3306, "user": "u", "password": "p", "database": "db", "read_timeout": 1}
+
+
+class FakeCursor:
+    def __init__(self, rows, rowcount=-1):
+        self.rows = rows
+        self.rowcount = rowcount
+        self.description = [("id",)] if rows is not None else None
+        self.statements = []
+        self.closed = False
+
+    def execute(self, query):
+        self.statements.append(query)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        # like mysql-connector, close() forgets the affected row count
+        self.rowcount = -1
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeConnection:
+    connection_id = 7
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def consume_results(self):
+        raise RuntimeError("connection lost while discarding")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class DrainedConnection(FakeConnection):
+    def consume_results(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.discarded = False
+
+    @contextmanager
+    def connection(self):
+        yield self.conn
+
+    def discard(self, conn):
+        self.discarded = True
+
+
+def _execute(cursor, query, env=None):
+    pool = FakePool(FakeConnection(cursor))
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=pool), \
+            patch.object(server, "connect", side_effect=server.Error("no killer connection")), \
+            patch.object(server, "enable_update", True), \
+            patch.dict("os.environ", env or {}):
+        return pool, server.execute_sql({"query": query})
+
+
+def test_execute_sql_reports_rows_affected():
+    _, result = _execute(FakeCursor(None, rowcount=3), "UPDATE t SET a = 1")
+    assert result[0].text == "Query executed successfully. Rows affected: 3"
+
+
+def test_truncated_result_survives_a_failing_discard():
+    pool, result = _execute(
+        FakeCursor([(i,) for i in range(10)]), "SELECT id FROM t",
+        {"POLARDB_MYSQL_MAX_ROWS": "2", "POLARDB_MYSQL_FETCH_SIZE": "5"},
+    )
+    assert pool.discarded
+    assert result[0].text == "id\r\n0\r\n1\r\n"
+    assert "truncated after 2 rows" in result[-1].text
+
+
+def test_truncated_result_closes_the_streaming_cursor():
+    cursor = FakeCursor([(i,) for i in range(10)])
+    killer = FakeCursor(None)
+    pool = FakePool(DrainedConnection(cursor))
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=pool), \
+            patch.object(server, "connect", return_value=FakeConnection(killer)), \
+            patch.dict("os.environ", {"POLARDB_MYSQL_MAX_ROWS": "2", "POLARDB_MYSQL_FETCH_SIZE": "5"}):
+        server.execute_sql({"query": "SELECT id FROM t"})
+    assert killer.statements == ["KILL QUERY 7"]
+    assert cursor.closed
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+from polardb_mysql_mcp_server.routing import QueryRouter, is_read_only, is_analytic
+
+CONFIG = {"host": "primary", "port": 3306, "user": "u", "password": "p", "database": "db"}
+
+
+def test_read_only_and_analytic_classification():
+    assert is_read_only("SELECT * FROM t WHERE a = 'for update'", set())
+    assert is_read_only("/* report */ (SELECT 1) UNION (SELECT 2)", set())
+    assert is_read_only("SHOW TABLES", set())
+    assert not is_read_only("SELECT * FROM t FOR UPDATE", set())
+    assert not is_read_only("SELECT a INTO @x FROM t", set())
+    assert not is_read_only("SELECT LAST_INSERT_ID()", set())
+    assert not is_read_only("/*polar4ai*/SELECT * FROM PREDICT(MODEL m) WITH ()", set())
+    assert not is_read_only("DELETE FROM t", {"DELETE"})
+    assert is_analytic("SELECT city, COUNT(*) FROM t GROUP BY city")
+    assert is_analytic("SELECT a, ROW_NUMBER() OVER (ORDER BY a) FROM t")
+    assert not is_analytic("SELECT * FROM t WHERE note = 'sum(x)'")
+    assert not is_analytic("SHOW TABLES")
+
+
+def test_router_sends_reads_to_reader_and_analytics_to_imci():
+    router = QueryRouter(reader_host="reader", imci_host="imci", imci_port=3307, auto_imci=True)
+    endpoint, config, query = router.route(CONFIG, "SELECT * FROM t", set())
+    assert (endpoint, config["host"], query) == ("reader", "reader", "SELECT * FROM t")
+    endpoint, config, query = router.route(CONFIG, "SELECT COUNT(*) FROM t", set())
+    assert (endpoint, config["host"], config["port"]) == ("imci", "imci", 3307)
+    assert query == "/*force_imci*/ SELECT COUNT(*) FROM t"
+    endpoint, config, _ = router.route(CONFIG, "UPDATE t SET a = 1", {"UPDATE"})
+    assert (endpoint, config) == ("primary", CONFIG)
+    assert router.stats() == {"reader": 1, "imci": 1, "imci_hints": 1, "primary": 1}
+
+
+def test_router_falls_back_to_primary():
+    assert QueryRouter().route(CONFIG, "SELECT COUNT(*) FROM t", set()) == (
+        "primary", CONFIG, "SELECT COUNT(*) FROM t")
+    # the hint alone lets a cluster endpoint proxy pick the column store node
+    assert QueryRouter(auto_imci=True).route(CONFIG, "select sum(a) from t", set()) == (
+        "primary", CONFIG, "/*force_imci*/ select sum(a) from t")
+
+
+def test_reads_stay_on_primary_right_after_a_write():
+    router = QueryRouter(reader_host="reader", read_after_write_window=5)
+    with patch("polardb_mysql_mcp_server.routing.time.monotonic", return_value=100):
+        router.route(CONFIG, "INSERT INTO t VALUES (1)", {"INSERT"})
+        assert router.route(CONFIG, "SELECT * FROM t", set())[0] == "primary"
+    with patch("polardb_mysql_mcp_server.routing.time.monotonic", return_value=106):
+        assert router.route(CONFIG, "SELECT * FROM t", set())[0] == "reader"
+        router.note_write()
+        assert router.route(CONFIG, "SELECT * FROM t", set())[0] == "primary"
+    assert router.stats() == {"primary": 3, "reader": 1, "read_after_write": 2}
+    router = QueryRouter(reader_host="reader", read_after_write_window=0)
+    router.route(CONFIG, "INSERT INTO t VALUES (1)", {"INSERT"})
+    assert router.route(CONFIG, "SELECT * FROM t", set())[0] == "reader"
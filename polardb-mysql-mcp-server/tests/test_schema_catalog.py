@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import patch
+from polardb_mysql_mcp_server.schema_catalog import SchemaCatalog
+
+
+class FakeCatalogDb:
+    def __init__(self):
+        self.probe = (2, None, 3)
+        self.lower_case_table_names = 1
+        self.columns = [
+            ("orders", "id", "int", "order id"),
+            ("orders", "total", "decimal(10,2)", ""),
+            ("users", "id", "int", ""),
+        ]
+        self.queries = []
+
+    async def fetch(self, sql, params=None):
+        self.queries.append(sql)
+        # let concurrent callers interleave like real queries would
+        await asyncio.sleep(0)
+        if "COUNT(*)" in sql:
+            return ["c", "h"], [self.probe]
+        if "lower_case_table_names" in sql:
+            return ["l"], [(self.lower_case_table_names,)]
+        if "STATISTICS" in sql:
+            return ["t", "i", "n", "c"], [
+                ("orders", "PRIMARY", 0, "id"),
+                ("orders", "idx_total", 1, "total"),
+                ("users", "PRIMARY", 0, "id"),
+            ]
+        if "INFORMATION_SCHEMA.COLUMNS" in sql:
+            return ["t", "c", "ty", "co"], self.columns
+        return ["t", "ty", "r", "c"], [(t, "BASE TABLE", 10, "") for t in sorted({row[0] for row in self.columns})]
+
+
+def test_catalog_serves_from_memory_until_probe_sees_a_change():
+    db = FakeCatalogDb()
+    catalog = SchemaCatalog("db", ttl=300, probe_interval=3600)
+
+    async def run():
+        assert await catalog.tables(db.fetch) == ["orders", "users"]
+        assert await catalog.table_columns(db.fetch, "ORDERS") == [
+            ("id", "int", "order id"), ("total", "decimal(10,2)", "")]
+        loaded = len(db.queries)
+        assert await catalog.table_columns(db.fetch, "users") == [("id", "int", "")]
+        assert await catalog.primary_key(db.fetch, "users") == ["id"]
+        assert len(db.queries) == loaded
+        # an unknown table forces a probe, which finds the new table
+        db.probe = (3, None, 4)
+        db.columns.append(("items", "sku", "varchar(32)", ""))
+        assert await catalog.table_columns(db.fetch, "items") == [("sku", "varchar(32)", "")]
+        assert catalog.stats()["loads"] == 2
+        # missing tables stay empty without reloading
+        assert await catalog.table_columns(db.fetch, "nope") == []
+        assert catalog.stats()["loads"] == 2
+
+    asyncio.run(run())
+
+
+def test_catalog_reloads_after_invalidate_and_ttl():
+    db = FakeCatalogDb()
+    catalog = SchemaCatalog("db", ttl=300, probe_interval=3600)
+
+    async def run():
+        await catalog.tables(db.fetch)
+        catalog.invalidate()
+        await catalog.tables(db.fetch)
+        assert catalog.stats()["loads"] == 2
+        with patch("polardb_mysql_mcp_server.schema_catalog.time.monotonic", return_value=10 ** 9):
+            await catalog.tables(db.fetch)
+        assert catalog.stats()["loads"] == 3
+
+    asyncio.run(run())
+
+
+def test_concurrent_callers_share_one_reload():
+    db = FakeCatalogDb()
+    catalog = SchemaCatalog("db", ttl=300, probe_interval=0)
+
+    async def run():
+        await asyncio.gather(*(catalog.tables(db.fetch) for _ in range(5)))
+        assert catalog.stats()["loads"] == 1
+        db.probe = (3, None, 4)
+        await asyncio.gather(*(catalog.tables(db.fetch) for _ in range(5)))
+        assert catalog.stats()["loads"] == 2
+
+    asyncio.run(run())
+    # the probe only counts rows, it never reads index or column definitions
+    probes = [sql for sql in db.queries if "MAX(CREATE_TIME)" in sql]
+    assert probes and not any("STATISTICS" in sql or "CRC32" in sql for sql in probes)
+
+
+def test_case_sensitive_names_and_ttl_of_zero():
+    db = FakeCatalogDb()
+    db.lower_case_table_names = 0
+    catalog = SchemaCatalog("db", ttl=0)
+
+    async def run():
+        assert await catalog.table_columns(db.fetch, "ORDERS") == []
+        assert await catalog.primary_key(db.fetch, "orders") == ["id"]
+
+    asyncio.run(run())
+    # every call loads, without probing or keeping a snapshot
+    assert catalog.stats()["loads"] == 2 and catalog.stats()["probes"] == 0
+    assert catalog.current() is None
+
+
+def test_schema_resource_formats_snapshot_within_budget():
+    from polardb_mysql_mcp_server.server import _table_schemas
+    from polardb_mysql_mcp_server.schema_format import format_schema, parse_schema_query
+    db = FakeCatalogDb()
+    snapshot = asyncio.run(SchemaCatalog("db").snapshot(db.fetch))
+    tables = _table_schemas(snapshot)
+    assert format_schema(tables, *parse_schema_query("pattern=ORD*")) == (
+        "table orders ~10 rows\n"
+        "  id int -- order id\n"
+        "  total decimal(10,2)\n"
+        "  primary key (id)\n"
+        "  index idx_total (total)"
+    )
+    text = format_schema(tables, None, 120)
+    assert text.startswith("table orders")
+    assert text.endswith("-- 1 more tables omitted (max_bytes=120); use pattern= to narrow the snapshot")
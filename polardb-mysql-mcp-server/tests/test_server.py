@@ -11,6 +11,7 @@ import ast
 logger = logging.getLogger("test-polardb-mysql-mcp-server")
 from polardb_mysql_mcp_server.server import ( 
     get_sql_operation_type,
+    get_sql_operations,
     get_db_config,
     exec_sql,
     polar4ai_update_index_for_text_2_sql,
@@ -46,6 +47,50 @@ def test_get_sql_operation_type():
     assert get_sql_operation_type("SELECT * FROM test") == "OTHER"
 
 
+def test_get_sql_operations_fast_path_and_cache():
+    from polardb_mysql_mcp_server import server
+    with patch.object(server, "_classify_sql", wraps=server._classify_sql) as classify:
+        assert get_sql_operations("SELECT updated_at FROM t WHERE id = 1") == (set(), 1)
+        classify.assert_not_called()
+        query = "SELECT 1; /*!50000 DELETE FROM t */"
+        assert get_sql_operations(query) == ({"DELETE"}, 2)
+        assert get_sql_operations(query) == ({"DELETE"}, 2)
+        assert classify.call_count == 1
+    assert get_sql_operations("UPDATE t SET a = 1") == ({"UPDATE"}, 1)
+    assert get_sql_operations("  ") == (set(), 0)
+
+
+def test_get_sql_operations_fast_path_matches_sqlparse():
+    from polardb_mysql_mcp_server.server import _classify_sql
+    for sql in (
+        "SELECT updated_at, last_update FROM t",
+        "SELECT 1e5DELETE",
+        "SELECT 1.5e3DROP FROM t",
+        "SELECT 0xAREPLACE",
+        "SELECT 1DELETE, x1DELETE FROM t",
+        "SELECT a FROM t WHERE b = 'UPDATE'",
+    ):
+        operations, statement_count = _classify_sql(sql)
+        assert get_sql_operations(sql) == (set(operations), statement_count), sql
+
+
+def test_strip_mysql_exec_comments():
+    from polardb_mysql_mcp_server.server import _strip_mysql_exec_comments
+    assert _strip_mysql_exec_comments("SELECT 1 /*!50000 DELETE FROM t */") == "SELECT 1  DELETE FROM t  "
+    # lookalikes inside literals, identifiers and comments are not code
+    for sql in (
+        "SELECT '/*!50000 DELETE FROM t */'",
+        "SELECT `/*!DROP TABLE t*/` FROM t",
+        "SELECT 1 -- /*!DELETE FROM t */",
+        "SELECT 1 /* /*!DELETE FROM t */",
+    ):
+        assert _strip_mysql_exec_comments(sql) == sql
+    assert get_sql_operations("SELECT 'it''s /*!DELETE FROM t*/'") == (set(), 1)
+    # ambiguous escaping unwraps everything after it, as before
+    assert "/*!" not in _strip_mysql_exec_comments(r"SELECT 'a\' /*!DELETE FROM t */ '")
+    assert get_sql_operations("SELECT 'x', /*!50000 DELETE FROM t */ 1") == ({"DELETE"}, 1)
+    assert get_sql_operations("SELECT 1 #x\n/*!DROP TABLE t*/") == ({"DDL"}, 1)
+
 def prepare_data(config,table_name):
     table_students = table_name
     create_table_sql = f"""
@@ -205,3 +250,18 @@ def test_polar4ai_search_doc():
     assert ok
     rows, ok = exec_sql(config, sql2)
     assert ok
+
+
+def test_polar4ai_tools_run_natively_on_async_backend(monkeypatch):
+    from polardb_mysql_mcp_server import server
+    monkeypatch.setenv("POLARDB_MYSQL_USER", "u")
+    monkeypatch.setenv("POLARDB_MYSQL_PASSWORD", "p")
+    monkeypatch.setenv("POLARDB_MYSQL_DATABASE", "d")
+    monkeypatch.setattr(server, "use_async_backend", True)
+    exec_async = AsyncMock(return_value=([("select avg(total_score) from t",)], True))
+    monkeypatch.setattr(server, "exec_sql_async", exec_async)
+    with patch.object(server.asyncio, "to_thread") as to_thread:
+        result = asyncio.run(server.call_tool("polar4ai_text_2_sql", {"text": "平均分"}))
+    to_thread.assert_not_called()
+    assert result[0].text == "select avg(total_score) from t"
+    assert "_polar4ai_nl2sql" in exec_async.call_args.args[1]
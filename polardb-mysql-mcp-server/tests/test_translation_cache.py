@@ -0,0 +1,41 @@
+from unittest.mock import patch
+from polardb_mysql_mcp_server import server
+from polardb_mysql_mcp_server.translation_cache import TranslationCache
+
+CONFIG = {"host": "h", "port": 3306, "user": "u", "password": "p", "database": "db", "read_timeout": 1}
+
+
+def test_translation_shared_by_text_2_sql_and_chart_until_index_rebuild():
+    statements = []
+
+    def exec_sql(config, sql):
+        statements.append(sql)
+        if "_polar4ai_nl2sql" in sql:
+            return [("SELECT COUNT(*) FROM orders;",)], True
+        if "_polar4ai_nl2chart" in sql:
+            return [("<img>",)], True
+        if sql == "/*polar4ai*/show tables;":
+            return [("schema_index",)], True
+        if sql.startswith("/*polar4ai*/SELECT COUNT(*)"):
+            return [(3,)], True
+        return [("task-1",)], True
+
+    cache = TranslationCache(max_entries=8)
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "exec_sql", side_effect=exec_sql), \
+            patch.object(server, "get_translation_cache", return_value=cache):
+        first = server.polar4ai_text_2_sql({"text": "how many  orders"})
+        assert first[0].text == "SELECT COUNT(*) FROM orders;"
+        assert server.polar4ai_text_2_sql({"text": " how many orders "})[0].text == first[0].text
+        assert server.polar4ai_text_2_chart({"text": "how many orders"})[0].text == "<img>"
+        nl2sql = [sql for sql in statements if "_polar4ai_nl2sql" in sql]
+        assert len(nl2sql) == 1
+        assert statements[-1].startswith("/*polar4ai*/SELECT * FROM PREDICT (MODEL _polar4ai_nl2chart,SELECT COUNT(*) FROM orders)")
+        # an index that is kept as is leaves the translations valid
+        server.polar4ai_update_index_for_text_2_sql({"force_update": False})
+        server.polar4ai_text_2_sql({"text": "how many orders"})
+        assert sum("_polar4ai_nl2sql" in sql for sql in statements) == 1
+        server.polar4ai_update_index_for_text_2_sql({"force_update": True})
+        server.polar4ai_text_2_sql({"text": "how many orders"})
+        assert sum("_polar4ai_nl2sql" in sql for sql in statements) == 2
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 2, "invalidations": 1}
@@ -0,0 +1,140 @@
+import os
+import secrets
+import threading
+import time
+
+DEFAULT_CURSOR_IDLE_TIMEOUT = 300
+DEFAULT_MAX_CURSORS = 4
+
+
+def get_cursor_settings():
+    """Get server-side cursor settings from environment variables. Every open
+    cursor pins a pooled connection with an open transaction, so max_cursors
+    should stay below the pool size."""
+    return {
+        "idle_timeout": float(os.getenv("POLARDB_POSTGRESQL_CURSOR_IDLE_TIMEOUT", str(DEFAULT_CURSOR_IDLE_TIMEOUT))),
+        "max_cursors": int(os.getenv("POLARDB_POSTGRESQL_MAX_CURSORS", str(DEFAULT_MAX_CURSORS))),
+    }
+
+
+class OpenCursor:
+    """A result set left open on a pinned connection between fetch_cursor calls.
+
+    conn and cursor belong to the backend that opened it; release is whatever
+    the backend needs to give the connection back (the pool, config, ...).
+    """
+
+    def __init__(self, query, columns, conn, cursor, release=None):
+        self.cursor_id = secrets.token_hex(8)
+        self.query = query
+        self.columns = columns
+        self.conn = conn
+        self.cursor = cursor
+        self.release = release
+        self.row_count = 0
+        self.exhausted = False
+        self.busy = False
+        self.used_at = time.monotonic()
+
+
+class CursorRegistry:
+    """Open cursors by id, closed by the caller after ``idle_timeout`` seconds
+    without a fetch; ``next_expiry`` tells a reaper how long it can sleep. A
+    cursor is checked out while a fetch runs so two requests never read the
+    same stream at once."""
+
+    def __init__(self, idle_timeout=DEFAULT_CURSOR_IDLE_TIMEOUT, max_cursors=DEFAULT_MAX_CURSORS):
+        self.idle_timeout = idle_timeout
+        self.max_cursors = max_cursors
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.expired = 0
+
+    def pop_expired(self):
+        """Remove and return the idle cursors, which the caller must close."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                c for c in self._cursors.values()
+                if not c.busy and now - c.used_at > self.idle_timeout
+            ]
+            for c in expired:
+                del self._cursors[c.cursor_id]
+            self.expired += len(expired)
+        return expired
+
+    def next_expiry(self):
+        """Seconds until the next idle cursor expires, or None if no cursor is open."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._cursors:
+                return None
+            idle = [c.used_at for c in self._cursors.values() if not c.busy]
+            if not idle:
+                return self.idle_timeout
+            return max(min(idle) + self.idle_timeout - now, 0.0)
+
+    def _check_capacity_locked(self):
+        if len(self._cursors) >= self.max_cursors:
+            raise ValueError(
+                f"Too many open cursors (max {self.max_cursors}); close one with close_cursor "
+                f"or wait {int(self.idle_timeout)}s for an idle one to expire"
+            )
+
+    def check_capacity(self):
+        """Fail early, before a query runs, when no cursor can be added."""
+        with self._lock:
+            self._check_capacity_locked()
+
+    def add(self, cursor):
+        """Register cursor, or raise ValueError if max_cursors are open by now;
+        the caller then still owns the cursor and must close it."""
+        with self._lock:
+            self._check_capacity_locked()
+            self._cursors[cursor.cursor_id] = cursor
+            self.opened += 1
+        return cursor.cursor_id
+
+    def checkout(self, cursor_id):
+        with self._lock:
+            cursor = self._cursors.get(cursor_id)
+            if cursor is None:
+                raise ValueError(f"Unknown or expired cursor: {cursor_id}")
+            if cursor.busy:
+                raise ValueError(f"Cursor {cursor_id} is being read by another request")
+            cursor.busy = True
+            return cursor
+
+    def checkin(self, cursor):
+        """Return a cursor after a fetch; exhausted cursors are removed and
+        must be closed by the caller."""
+        with self._lock:
+            cursor.busy = False
+            cursor.used_at = time.monotonic()
+            if cursor.exhausted:
+                self._cursors.pop(cursor.cursor_id, None)
+
+    def pop(self, cursor_id):
+        with self._lock:
+            cursor = self._cursors.get(cursor_id)
+            if cursor is None or cursor.busy:
+                return None
+            return self._cursors.pop(cursor_id)
+
+    def stats(self):
+        with self._lock:
+            return {"open": len(self._cursors), "opened": self.opened, "expired": self.expired}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_cursor_registry() -> CursorRegistry:
+    """Return the process-wide cursor registry configured from the environment."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CursorRegistry(**get_cursor_settings())
+        return _registry
@@ -0,0 +1,192 @@
+import base64
+import csv
+import datetime
+import io
+import json
+
+DEFAULT_FORMAT = "csv"
+
+# values of these types are written as-is by the csv and json modules
+_NATIVE_TYPES = (str, int, float)
+
+
+def _bytes_text(value):
+    try:
+        return bytes(value).decode("utf-8")
+    except UnicodeDecodeError:
+        return "0x" + bytes(value).hex()
+
+
+def _json_converter(sample):
+    """Pick one converter for a whole column from its first non-null value."""
+    if isinstance(sample, (_NATIVE_TYPES, bool, list, dict)):
+        return None
+    if isinstance(sample, (bytes, bytearray)):
+        return _bytes_text
+    if isinstance(sample, (datetime.datetime, datetime.date, datetime.time)):
+        return lambda v: v.isoformat()
+    if isinstance(sample, (set, frozenset)):
+        return lambda v: sorted(v)
+    return str
+
+
+def _text_converter(sample):
+    if isinstance(sample, _NATIVE_TYPES):
+        return None
+    if isinstance(sample, (bytes, bytearray)):
+        return _bytes_text
+    if isinstance(sample, (set, frozenset)):
+        return lambda v: ",".join(sorted(v))
+    if isinstance(sample, (list, dict)):
+        return lambda v: json.dumps(v, ensure_ascii=False, default=str)
+    return str
+
+
+def _convert_columns(rows, column_count, pick_converter):
+    """Transpose rows into columns, converting each column with a single
+    converter chosen from its first non-null value instead of per cell."""
+    if not rows:
+        return [[] for _ in range(column_count)]
+    columns = []
+    for values in zip(*rows):
+        sample = next((v for v in values if v is not None), None)
+        convert = pick_converter(sample) if sample is not None else None
+        if convert is None:
+            columns.append(list(values))
+        else:
+            columns.append([None if v is None else convert(v) for v in values])
+    return columns
+
+
+class ResultEncoder:
+    """Encodes a result set batch by batch.
+
+    ``header()`` is emitted once before the first batch. When ``concatenable``
+    is true, encoded batches may be concatenated into one text chunk;
+    otherwise every batch is a standalone document and gets its own chunk.
+    """
+
+    name = ""
+    concatenable = True
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    def header(self) -> str:
+        return ""
+
+    def encode(self, rows) -> str:
+        raise NotImplementedError
+
+
+class CsvEncoder(ResultEncoder):
+    """RFC 4180 CSV with a header row."""
+
+    name = "csv"
+
+    def _write(self, rows):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue()
+
+    def header(self):
+        return self._write([self.columns])
+
+    def encode(self, rows):
+        columns = _convert_columns(rows, len(self.columns), _text_converter)
+        return self._write(zip(*columns))
+
+
+class JsonLinesEncoder(ResultEncoder):
+    """One JSON object per row."""
+
+    name = "jsonl"
+
+    def encode(self, rows):
+        columns = _convert_columns(rows, len(self.columns), _json_converter)
+        names = self.columns
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+        return "".join(dumps(dict(zip(names, row))) + "\n" for row in zip(*columns))
+
+
+class ColumnarJsonEncoder(ResultEncoder):
+    """{"columns": [...], "data": [[column 0 values], [column 1 values], ...]}"""
+
+    name = "columnar_json"
+    concatenable = False
+
+    def encode(self, rows):
+        columns = _convert_columns(rows, len(self.columns), _json_converter)
+        return json.dumps(
+            {"columns": self.columns, "data": columns},
+            ensure_ascii=False, separators=(",", ":"), default=str,
+        )
+
+
+class ArrowEncoder(ResultEncoder):
+    """Base64 encoded Arrow IPC stream, requires pyarrow."""
+
+    name = "arrow"
+    concatenable = False
+
+    def __init__(self, columns):
+        super().__init__(columns)
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise ValueError("format 'arrow' requires pyarrow to be installed") from e
+        self._pa = pyarrow
+
+    def _array(self, values):
+        pa = self._pa
+        try:
+            return pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # mixed or unsupported types: fall back to text for this column
+            return pa.array(
+                [None if v is None else (_text_converter(v) or str)(v) for v in values],
+                type=pa.string(),
+            )
+
+    def encode(self, rows):
+        pa = self._pa
+        if rows:
+            arrays = [self._array(list(values)) for values in zip(*rows)]
+        else:
+            arrays = [pa.array([], type=pa.null()) for _ in self.columns]
+        table = pa.Table.from_arrays(arrays, names=self.columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+ENCODERS = {
+    CsvEncoder.name: CsvEncoder,
+    JsonLinesEncoder.name: JsonLinesEncoder,
+    ColumnarJsonEncoder.name: ColumnarJsonEncoder,
+    ArrowEncoder.name: ArrowEncoder,
+}
+
+
+def register_encoder(encoder_class):
+    ENCODERS[encoder_class.name] = encoder_class
+
+
+def get_encoder(fmt, columns) -> ResultEncoder:
+    fmt = fmt or DEFAULT_FORMAT
+    encoder_class = ENCODERS.get(fmt)
+    if encoder_class is None:
+        raise ValueError(f"Invalid format: {fmt!r}, expected one of {sorted(ENCODERS)}")
+    return encoder_class(columns)
+
+
+def check_format(fmt):
+    """Raise ValueError if fmt is unknown or its dependencies are missing."""
+    get_encoder(fmt, [])
+
+
+def encode_result(columns, rows, fmt=None) -> str:
+    """Encode a complete, already fetched result set."""
+    encoder = get_encoder(fmt, columns)
+    return encoder.header() + encoder.encode(rows)
@@ -0,0 +1,47 @@
+import os
+
+DEFAULT_EXPORT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_EXPORT_INLINE_MAX_BYTES = 1024 * 1024
+EXPORT_CHUNK_CHARS = 64 * 1024
+EXPORT_FORMATS = ("csv", "binary")
+
+
+def get_export_settings():
+    """Get export_query settings from environment variables. Without a
+    directory, exports can only be returned inline as CSV."""
+    directory = os.getenv("POLARDB_POSTGRESQL_EXPORT_DIR") or None
+    return {
+        "directory": os.path.realpath(directory) if directory else None,
+        "max_bytes": int(os.getenv("POLARDB_POSTGRESQL_EXPORT_MAX_BYTES", str(DEFAULT_EXPORT_MAX_BYTES))),
+        "inline_max_bytes": int(
+            os.getenv("POLARDB_POSTGRESQL_EXPORT_INLINE_MAX_BYTES", str(DEFAULT_EXPORT_INLINE_MAX_BYTES))
+        ),
+    }
+
+
+class ExportTooLarge(Exception):
+    """Raised inside a COPY block to stop it once the size limit is reached;
+    leaving the block with an exception cancels the COPY on the server."""
+
+
+def export_path(directory, name):
+    """Absolute path of file name in the export directory, refusing names
+    that resolve outside of it."""
+    if directory is None:
+        raise ValueError("Exporting to a file needs POLARDB_POSTGRESQL_EXPORT_DIR to be set")
+    if not name or not isinstance(name, str):
+        raise ValueError(f"Invalid export file name: {name!r}")
+    path = os.path.realpath(os.path.join(directory, name))
+    if os.path.commonpath([directory, path]) != directory or path == directory:
+        raise ValueError(f"Export file {name!r} is outside of the export directory")
+    return path
+
+
+def copy_statement(query, fmt):
+    """COPY ... TO STDOUT around query. The query goes on its own lines so a
+    trailing -- comment cannot swallow the closing parenthesis."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid export format: {fmt!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    body = query.strip().rstrip(";")
+    options = "FORMAT csv, HEADER" if fmt == "csv" else "FORMAT binary"
+    return f"COPY (\n{body}\n) TO STDOUT WITH ({options})"
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import threading
+
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+logger = logging.getLogger("polardb-postgresql-mcp-server")
+
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 30
+DEFAULT_POOL_MAX_LIFETIME = 3600
+DEFAULT_POOL_MAX_IDLE = 300
+
+
+def get_pool_settings():
+    """Get connection pool settings from environment variables."""
+    settings = {
+        "min_size": int(os.getenv("POLARDB_POSTGRESQL_POOL_MIN_SIZE", str(DEFAULT_POOL_MIN_SIZE))),
+        "max_size": int(os.getenv("POLARDB_POSTGRESQL_POOL_MAX_SIZE", str(DEFAULT_POOL_MAX_SIZE))),
+        "timeout": float(os.getenv("POLARDB_POSTGRESQL_POOL_TIMEOUT", str(DEFAULT_POOL_TIMEOUT))),
+        "max_lifetime": float(os.getenv("POLARDB_POSTGRESQL_POOL_MAX_LIFETIME", str(DEFAULT_POOL_MAX_LIFETIME))),
+        "max_idle": float(os.getenv("POLARDB_POSTGRESQL_POOL_MAX_IDLE", str(DEFAULT_POOL_MAX_IDLE))),
+    }
+    if settings["max_size"] <= 0 or not 0 <= settings["min_size"] <= settings["max_size"]:
+        raise ValueError(f"Invalid pool size: min {settings['min_size']}, max {settings['max_size']}")
+    return settings
+
+
+def _session_sql(config):
+    """Statements that put a session in the state every tool expects."""
+    return f"SET statement_timeout = {int(config['statement_timeout']) * 1000}"
+
+
+def _connect_kwargs(config):
+    return {k: v for k, v in config.items() if k != "statement_timeout"}
+
+
+def _callbacks(config):
+    """configure runs once per new connection; reset runs whenever one is
+    returned, after the pool has rolled back any open transaction. DISCARD ALL
+    undoes whatever a tool or a user query left behind, SETs, temporary
+    tables, prepared statements, advisory locks and LISTENs included, and the
+    session SETs are then applied again. DISCARD ALL cannot run inside the
+    implicit transaction of a multi-statement query, so it is sent on its own."""
+    session_sql = _session_sql(config)
+
+    def configure(conn):
+        conn.autocommit = True
+        conn.execute(session_sql)
+
+    def reset(conn):
+        conn.autocommit = True
+        conn.execute("DISCARD ALL")
+        conn.execute(session_sql)
+
+    async def configure_async(conn):
+        await conn.set_autocommit(True)
+        await conn.execute(session_sql)
+
+    async def reset_async(conn):
+        await conn.set_autocommit(True)
+        await conn.execute("DISCARD ALL")
+        await conn.execute(session_sql)
+
+    return configure, reset, configure_async, reset_async
+
+
+def _pool_key(config):
+    return tuple(sorted((k, repr(v)) for k, v in config.items()))
+
+
+def _pool_name(config):
+    return f"{config.get('host')}:{config.get('port')}/{config.get('dbname')}"
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config) -> ConnectionPool:
+    """Return the process-wide pool for this connection config, creating it on first use."""
+    key = _pool_key(config)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            settings = get_pool_settings()
+            configure, reset, _, _ = _callbacks(config)
+            pool = ConnectionPool(
+                kwargs=_connect_kwargs(config), configure=configure, reset=reset,
+                name=_pool_name(config), open=True, **settings,
+            )
+            _pools[key] = pool
+            logger.info(
+                f"Created connection pool for {_pool_name(config)} (min={settings['min_size']}, "
+                f"max={settings['max_size']}, timeout={settings['timeout']}s, "
+                f"max_lifetime={settings['max_lifetime']}s, max_idle={settings['max_idle']}s)"
+            )
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+_async_pools = {}
+
+
+async def get_async_pool(config) -> AsyncConnectionPool:
+    """Return the pool for this connection config on the running event loop."""
+    key = (id(asyncio.get_running_loop()),) + _pool_key(config)
+    pool = _async_pools.get(key)
+    if pool is None:
+        settings = get_pool_settings()
+        _, _, configure, reset = _callbacks(config)
+        pool = AsyncConnectionPool(
+            kwargs=_connect_kwargs(config), configure=configure, reset=reset,
+            name=_pool_name(config), open=False, **settings,
+        )
+        await pool.open()
+        if key in _async_pools:
+            # another task created the pool while this one was opening
+            await pool.close()
+            return _async_pools[key]
+        _async_pools[key] = pool
+        logger.info(
+            f"Created async connection pool for {_pool_name(config)} (min={settings['min_size']}, "
+            f"max={settings['max_size']}, timeout={settings['timeout']}s, "
+            f"max_lifetime={settings['max_lifetime']}s, max_idle={settings['max_idle']}s)"
+        )
+    return pool
+
+
+async def close_async_pools():
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _async_pools if k[0] == loop_id]:
+        await _async_pools.pop(key).close()
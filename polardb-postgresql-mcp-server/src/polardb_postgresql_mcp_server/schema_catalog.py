@@ -0,0 +1,277 @@
+import logging
+import os
+import threading
+import time
+
+from polardb_postgresql_mcp_server.schema_format import TableSchema
+
+logger = logging.getLogger("polardb-postgresql-mcp-server")
+
+DEFAULT_SCHEMA_CACHE_TTL = 300
+DEFAULT_SCHEMA_PROBE_INTERVAL = 10
+
+_RELATION_KINDS = {"r": "table", "p": "table", "v": "view", "m": "materialized view", "f": "foreign table"}
+_SCHEMAS_SQL = """
+    SELECT schema_name FROM information_schema.schemata WHERE schema_name NOT IN
+    ('cron','information_schema', 'pg_bitmapindex','pg_catalog','pg_toast','polar_catalog','polar_feature_utils')
+    ORDER BY schema_name
+"""
+# a row's xmin changes whenever it is rewritten, relfilenode when the table is;
+# column renames and type changes only touch pg_attribute, which is hashed too
+_SCHEMAS_PROBE_SQL = "SELECT md5(string_agg(oid::text || ':' || xmin::text, ',' ORDER BY oid)) FROM pg_namespace"
+_RELATIONS_PROBE_SQL = """
+    SELECT md5(
+        coalesce((
+            SELECT string_agg(c.oid::text || ':' || c.relfilenode::text || ':' || c.xmin::text, ',' ORDER BY c.oid)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s
+        ), '') || '|' || coalesce((
+            SELECT string_agg(
+                a.attrelid::text || ':' || a.attnum::text || ':' || a.attname || ':'
+                    || a.atttypid::text || ':' || a.atttypmod::text,
+                ',' ORDER BY a.attrelid, a.attnum)
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+                AND a.attnum > 0 AND NOT a.attisdropped
+        ), '')
+    )
+"""
+_SCHEMA_TABLES_SQL = """
+    SELECT c.relname, c.relkind, c.reltuples::bigint, obj_description(c.oid, 'pg_class')
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+    ORDER BY c.relname
+"""
+_SCHEMA_COLUMNS_SQL = """
+    SELECT c.relname, a.attname, pg_catalog.format_type(a.atttypid, a.atttypmod),
+        col_description(a.attrelid, a.attnum)
+    FROM pg_attribute a
+    JOIN pg_class c ON c.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+        AND a.attnum > 0 AND NOT a.attisdropped
+    ORDER BY c.relname, a.attnum
+"""
+_SCHEMA_INDEXES_SQL = """
+    SELECT t.relname, ic.relname, i.indisprimary, i.indisunique,
+        ARRAY(
+            SELECT a.attname
+            FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+            LEFT JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+            ORDER BY k.ord
+        )
+    FROM pg_index i
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = %s
+    ORDER BY t.relname, ic.relname
+"""
+
+
+def get_schema_cache_settings():
+    """Get schema cache settings from environment variables, a ttl of 0 disables the cache."""
+    return {
+        "ttl": float(os.getenv("POLARDB_POSTGRESQL_SCHEMA_CACHE_TTL", str(DEFAULT_SCHEMA_CACHE_TTL))),
+        "probe_interval": float(
+            os.getenv("POLARDB_POSTGRESQL_SCHEMA_PROBE_INTERVAL", str(DEFAULT_SCHEMA_PROBE_INTERVAL))
+        ),
+    }
+
+
+class SchemaSnapshot:
+    """Metadata of every relation of one schema as loaded at one point in time.
+
+    tables:   TableSchema of every table, view and foreign table in name order
+    relkinds: relation name -> pg_class.relkind
+    """
+
+    def __init__(self, tables, relkinds):
+        self.tables = tables
+        self.relkinds = relkinds
+        self._by_name = {table.name: table for table in tables}
+
+    def table(self, name):
+        """TableSchema of name, or None if it is not in the snapshot. Falls back
+        to the lower case name, as PostgreSQL folds unquoted identifiers."""
+        table = self._by_name.get(name)
+        if table is None:
+            table = self._by_name.get(name.lower())
+        return table
+
+
+class _Entry:
+    """A cached value with the probe result it was loaded under."""
+
+    def __init__(self, value, probe):
+        self.value = value
+        self.probe = probe
+        self.loaded_at = time.monotonic()
+        self.probed_at = self.loaded_at
+
+
+class SchemaCatalog:
+    """In-memory copy of the catalog of one database: its schema names and,
+    per schema, the relations with their columns, keys and indexes.
+
+    Each is loaded with bulk pg_catalog queries and served from memory until
+    ``ttl`` expires, ``invalidate()`` is called, or a cheap probe (run at most
+    every ``probe_interval`` seconds) sees a different hash of the oids,
+    relfilenodes and xmins of the schema's pg_class rows and of the names and
+    types of their pg_attribute rows, which changes on CREATE, DROP, ALTER,
+    column renames and table rewrites. Comment changes and row estimates only
+    show up after the ttl. A ttl of 0 or less bypasses the catalog: every
+    call loads from the server and nothing is kept.
+
+    ``fetch`` passed to the read methods is a coroutine function taking
+    (sql, params) and returning (columns, rows), so the catalog works with
+    either database backend.
+    """
+
+    def __init__(self, database, ttl=DEFAULT_SCHEMA_CACHE_TTL,
+                 probe_interval=DEFAULT_SCHEMA_PROBE_INTERVAL):
+        self.database = database
+        self.ttl = ttl
+        self.probe_interval = probe_interval
+        self._schemas = None
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.probes = 0
+        self.hits = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._schemas = None
+            self._snapshots.clear()
+
+    async def _probe(self, fetch, sql, params):
+        _, rows = await fetch(sql, params)
+        with self._lock:
+            self.probes += 1
+        return rows[0][0] if rows else None
+
+    async def _cached(self, entry, fetch, probe_sql, params, load, force_probe=False):
+        """entry if it is still current, otherwise a new _Entry from load(fetch)."""
+        now = time.monotonic()
+        if entry is None or now - entry.loaded_at > self.ttl:
+            probe = await self._probe(fetch, probe_sql, params)
+            return _Entry(await load(fetch), probe)
+        if force_probe or now - entry.probed_at >= self.probe_interval:
+            probe = await self._probe(fetch, probe_sql, params)
+            entry.probed_at = now
+            if probe != entry.probe:
+                return _Entry(await load(fetch), probe)
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    async def _load_schemas(self, fetch):
+        _, rows = await fetch(_SCHEMAS_SQL, None)
+        with self._lock:
+            self.loads += 1
+        return [row[0] for row in rows]
+
+    async def schemas(self, fetch):
+        """Names of the user schemas of the database."""
+        if self.ttl <= 0:
+            return await self._load_schemas(fetch)
+        entry = await self._cached(self._schemas, fetch, _SCHEMAS_PROBE_SQL, None, self._load_schemas)
+        with self._lock:
+            self._schemas = entry
+        return entry.value
+
+    async def _load_snapshot(self, fetch, schema):
+        _, column_rows = await fetch(_SCHEMA_COLUMNS_SQL, (schema,))
+        columns = {}
+        for table, name, column_type, comment in column_rows:
+            columns.setdefault(table, []).append((name, column_type, comment))
+        _, index_rows = await fetch(_SCHEMA_INDEXES_SQL, (schema,))
+        primary_keys = {}
+        indexes = {}
+        for table, index_name, is_primary, is_unique, index_columns in index_rows:
+            if is_primary:
+                primary_keys[table] = index_columns
+            else:
+                indexes.setdefault(table, []).append((index_name, is_unique, index_columns))
+        _, table_rows = await fetch(_SCHEMA_TABLES_SQL, (schema,))
+        tables = [
+            TableSchema(
+                table,
+                kind=_RELATION_KINDS.get(relkind, "table"),
+                rows=row_estimate,
+                comment=comment,
+                columns=columns.get(table, []),
+                primary_key=primary_keys.get(table, []),
+                indexes=indexes.get(table, []),
+            )
+            for table, relkind, row_estimate, comment in table_rows
+        ]
+        with self._lock:
+            self.loads += 1
+        logger.info(f"Loaded schema {self.database}.{schema}: {len(tables)} relations, {len(column_rows)} columns")
+        return SchemaSnapshot(tables, {row[0]: row[1] for row in table_rows})
+
+    async def snapshot(self, fetch, schema, force_probe=False) -> SchemaSnapshot:
+        """Return a current snapshot of schema, reloading it if stale or changed."""
+
+        if self.ttl <= 0:
+            return await self._load_snapshot(fetch, schema)
+
+        async def load(fetch):
+            return await self._load_snapshot(fetch, schema)
+
+        entry = await self._cached(
+            self._snapshots.get(schema), fetch, _RELATIONS_PROBE_SQL, (schema, schema), load, force_probe
+        )
+        with self._lock:
+            self._snapshots[schema] = entry
+        return entry.value
+
+    async def table(self, fetch, schema, name):
+        """TableSchema of schema.name or None; an unknown table triggers a probe
+        first in case it was created since the last one."""
+        table = (await self.snapshot(fetch, schema)).table(name)
+        if table is None and self.ttl > 0:
+            table = (await self.snapshot(fetch, schema, force_probe=True)).table(name)
+        return table
+
+    def stats(self):
+        with self._lock:
+            return {
+                "database": self.database,
+                "loads": self.loads,
+                "probes": self.probes,
+                "hits": self.hits,
+                "schemas": len(self._snapshots),
+            }
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _catalog_key(config):
+    return (config.get("host"), config.get("port"), config.get("dbname"))
+
+
+def get_schema_catalog(config) -> SchemaCatalog:
+    """Return the process-wide catalog of the configured database."""
+    key = _catalog_key(config)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = SchemaCatalog(config.get("dbname"), **get_schema_cache_settings())
+            _catalogs[key] = catalog
+        return catalog
+
+
+def invalidate_schema_catalog(config):
+    with _catalogs_lock:
+        catalog = _catalogs.get(_catalog_key(config))
+    if catalog is not None:
+        catalog.invalidate()
@@ -12,9 +12,30 @@ from mcp.types import Resource, ResourceTemplate, Tool, TextContent
 from pydantic import AnyUrl
 from dotenv import load_dotenv
 import asyncio
+import io
+from contextlib import asynccontextmanager
 import re
 import sqlparse
+import collections
+import hashlib
+import threading
+import time
+import secrets
 from psycopg import sql as psycopg_sql
+from polardb_postgresql_mcp_server.encoders import ENCODERS, check_format, encode_result
+from polardb_postgresql_mcp_server.data_query import parse_data_query, decode_cursor, encode_cursor
+from polardb_postgresql_mcp_server.schema_format import parse_schema_query, format_schema
+from polardb_postgresql_mcp_server.schema_catalog import get_schema_catalog, invalidate_schema_catalog
+from polardb_postgresql_mcp_server.cost_guard import CostEstimate, get_cost_guard
+from polardb_postgresql_mcp_server.cursors import OpenCursor, get_cursor_registry
+from polardb_postgresql_mcp_server.bulk_load import (
+    BULK_LOAD_FORMATS, detect_format, get_bulk_load_settings, import_path, load_summary, read_csv_header,
+    read_jsonl_rows,
+)
+from polardb_postgresql_mcp_server.export import (
+    EXPORT_CHUNK_CHARS, EXPORT_FORMATS, ExportTooLarge, copy_statement, export_path, get_export_settings,
+)
+from polardb_postgresql_mcp_server.pool import get_pool, get_async_pool, close_pools, close_async_pools
 
 _IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
 
@@ -49,37 +70,125 @@ _RESTRICTED_KEYWORDS = {
 
 
 _DOLLAR_TAG_RE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+# candidate delimiters: dollar tags, comments, quotes
+_PG_SCAN_RE = re.compile(r"\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$|/\*|--|['\"]")
+# a literal without backslashes ends at the same quote for E'' strings and
+# either standard_conforming_strings setting, so only those are skipped
+_PG_QUOTED_RE = {
+    "'": re.compile(r"'(?:[^'\\]|'')*'"),
+    '"': re.compile(r'"(?:[^"]|"")*"'),
+}
+_PG_NEWLINE_RE = re.compile(r"[\r\n]")
 
 
-def _strip_dollar_quotes(sql_text):
-    """Replace $tag$...$tag$ bodies with bare whitespace-padded contents so
-    embedded statements inside DO/CREATE FUNCTION blocks are visible to the
-    keyword scanner. PostgreSQL dollar-quote tags must match exactly to close.
-    """
-    out = []
-    i = 0
-    n = len(sql_text)
-    while i < n:
-        m = _DOLLAR_TAG_RE.match(sql_text, i)
+def _unwrap_dollar_quotes(sql_text, pos, out):
+    """Unwrap every dollar-quoted body from pos on, ignoring quotes and comments."""
+    while True:
+        m = _DOLLAR_TAG_RE.search(sql_text, pos)
         if not m:
-            out.append(sql_text[i])
-            i += 1
-            continue
+            break
         tag = m.group(0)
         end = sql_text.find(tag, m.end())
+        out.append(sql_text[pos:m.start()])
         if end == -1:
             # unterminated dollar quote; keep remainder as-is to be conservative
             out.append(sql_text[m.end():])
-            break
+            return "".join(out)
         out.append(" ")
         out.append(sql_text[m.end():end])
         out.append(" ")
-        i = end + len(tag)
+        pos = end + len(tag)
+    out.append(sql_text[pos:])
     return "".join(out)
 
 
+def _strip_dollar_quotes(sql_text):
+    """Replace $tag$...$tag$ bodies with bare whitespace-padded contents so
+    embedded statements inside DO/CREATE FUNCTION blocks are visible to the
+    keyword scanner. PostgreSQL dollar-quote tags must match exactly to close.
+
+    Jumps between candidate delimiters and copies slices, so dollar signs in
+    string literals, quoted identifiers and comments are left alone. When the
+    lexing is ambiguous (backslashes in a literal, nested or unterminated
+    comments, a tag glued to an identifier) the rest of the text is unwrapped
+    unconditionally, so this never hides more than it used to.
+    """
+    out = []
+    last = 0
+    pos = 0
+    while True:
+        m = _PG_SCAN_RE.search(sql_text, pos)
+        if not m:
+            out.append(sql_text[last:])
+            return "".join(out)
+        token = m.group(0)
+        start = m.start()
+        if token[0] == "$":
+            # "a$b$" is an identifier, not a dollar quote
+            if start and (sql_text[start - 1].isalnum() or sql_text[start - 1] in "_$"):
+                break
+            end = sql_text.find(token, m.end())
+            if end == -1:
+                break
+            out.append(sql_text[last:start])
+            out.append(" ")
+            out.append(sql_text[m.end():end])
+            out.append(" ")
+            last = pos = end + len(token)
+        elif token == "/*":
+            end = sql_text.find("*/", m.end())
+            if end == -1 or "/*" in sql_text[m.end():end]:
+                break
+            pos = end + 2
+        elif token == "--":
+            newline = _PG_NEWLINE_RE.search(sql_text, m.end())
+            if newline is None:
+                out.append(sql_text[last:])
+                return "".join(out)
+            pos = newline.end()
+        else:
+            quoted = _PG_QUOTED_RE[token].match(sql_text, start)
+            if quoted is None:
+                break
+            pos = quoted.end()
+    out.append(sql_text[last:start])
+    return _unwrap_dollar_quotes(sql_text, start, out)
+
+
+# sqlparse splits a word that starts with a digit into a number and the rest
+# (1e5DELETE, 0xAUPDATE), so a keyword ending such a word counts as well
+_RESTRICTED_KEYWORD_RE = re.compile(
+    r"\b(?:\d\w*?)?(?:" + "|".join(_RESTRICTED_KEYWORDS) + r")\b", re.IGNORECASE
+)
+_SQL_OPERATIONS_CACHE_SIZE = 1024
+_sql_operations_cache = collections.OrderedDict()
+_sql_operations_cache_lock = threading.Lock()
+
+
 def get_sql_operations(sql_text):
     """Return (set of restricted ops anywhere in sql, non-empty statement count)."""
+    if not any(marker in sql_text for marker in (";", "--", "/*")):
+        # a single comment-free statement with no restricted keyword anywhere in
+        # its text cannot classify as restricted, so sqlparse can be skipped
+        if not _RESTRICTED_KEYWORD_RE.search(sql_text):
+            return set(), (1 if sql_text.strip() else 0)
+    # keyed by a digest so huge generated statements are not kept alive
+    key = hashlib.blake2b(sql_text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _sql_operations_cache_lock:
+        cached = _sql_operations_cache.get(key)
+        if cached is not None:
+            _sql_operations_cache.move_to_end(key)
+    if cached is None:
+        cached = _classify_sql(sql_text)
+        with _sql_operations_cache_lock:
+            _sql_operations_cache[key] = cached
+            while len(_sql_operations_cache) > _SQL_OPERATIONS_CACHE_SIZE:
+                _sql_operations_cache.popitem(last=False)
+    operations, statement_count = cached
+    return set(operations), statement_count
+
+
+def _classify_sql(sql_text):
     normalized = _strip_dollar_quotes(sql_text)
     parsed = sqlparse.parse(normalized)
     statement_count = sum(
@@ -96,13 +205,19 @@ def get_sql_operations(sql_text):
             kw = token.value.upper()
             if kw in _RESTRICTED_KEYWORDS:
                 operations.add(_RESTRICTED_KEYWORDS[kw])
-    return operations, statement_count
+    return frozenset(operations), statement_count
 
 
 enable_delete = False
 enable_update = False
 enable_insert = False
 enable_ddl = False
+use_async_backend = False
+DEFAULT_CURSOR_FETCH_ROWS = 1000
+MAX_CURSOR_FETCH_ROWS = 10000
+DEFAULT_BATCH_CONCURRENCY = 4
+MAX_BATCH_STATEMENTS = 50
+BULK_LOAD_CHUNK_BYTES = 1024 * 1024
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(name)s - %(message)s'
@@ -110,8 +225,8 @@ logging.basicConfig(
 logger = logging.getLogger("polardb-postgresql-mcp-server")
 VERSION = "0.0.1"
 def get_db_config():
-    """Get database configuration from environment variables."""
-    statement_timeout_s = int(os.getenv("POLARDB_POSTGRESQL_STATEMENT_TIMEOUT", "60"))
+    """Get database configuration from environment variables. statement_timeout
+    is applied by the pool once per session, the rest are connection parameters."""
     config = {
         "host": os.getenv("POLARDB_POSTGRESQL_HOST", "localhost"),
         "port": int(os.getenv("POLARDB_POSTGRESQL_PORT", "5432")),
@@ -119,7 +234,7 @@ def get_db_config():
         "password": os.getenv("POLARDB_POSTGRESQL_PASSWORD"),
         "dbname": os.getenv("POLARDB_POSTGRESQL_DBNAME"),
         "application_name": f"polardb-postgresql-mcp-server-{VERSION}",
-        "options": f"-c statement_timeout={statement_timeout_s * 1000}",
+        "statement_timeout": int(os.getenv("POLARDB_POSTGRESQL_STATEMENT_TIMEOUT", "60")),
     }
     
     if not all([config["user"], config["password"], config["dbname"]]):
@@ -155,6 +270,13 @@ async def list_resource_templates() -> list[ResourceTemplate]:
             description="List all tables in a specific schema",
             mimeType="text/plain"
         ),
+        ResourceTemplate(
+            uriTemplate=f"polardb-postgresql://{{schema}}/schema",
+            name="schema_snapshot",
+            description="All tables of a schema with columns, types, comments, primary keys, indexes and "
+                        "row estimates in one compact snapshot; optional ?pattern=orders*,user_* and ?max_bytes=N",
+            mimeType="text/plain"
+        ),
         ResourceTemplate(
             uriTemplate=f"polardb-postgresql://{{schema}}/{{table}}/field",  
             name="table_field_info",
@@ -164,7 +286,11 @@ async def list_resource_templates() -> list[ResourceTemplate]:
         ResourceTemplate(
             uriTemplate=f"polardb-postgresql://{{schema}}/{{table}}/data", 
             name="table_data",
-            description="get data from the table,default limit 50 rows",
+            description="get data from the table,default limit 50 rows. Optional query parameters: "
+                        "columns=a,b (projection), limit=N (at most 1000), after=<key> (keyset page after "
+                        "this primary key value, JSON array for composite keys; see the trailing next: line), "
+                        "sample=<percent> with sample_method=bernoulli|system (TABLESAMPLE; the limit takes random "
+                        "rows of the whole sample, so its cost grows with the percentage)",
             mimeType="text/plain"
         )
     ]
@@ -179,78 +305,217 @@ async def read_resource(uri: AnyUrl) -> str:
     if not uri_str.startswith(prefix):
         logger.error(f"Invalid URI scheme: {uri_str}")
         raise ValueError(f"Invalid URI scheme: {uri_str}")
+    path, _, query_string = uri_str[len(prefix):].partition('?')
+    parts = path.split('/')
     try:
-        with psycopg.connect(**config) as conn:
-            conn.autocommit = True
-            with conn.cursor() as cursor: 
-                parts = uri_str[len(prefix):].split('/')
-                if len(parts) == 1 and parts[0] == "schemas": 
-                    #polardb-postgresql://schemas,list all schemas
-                    query = """
-                            SELECT schema_name FROM information_schema.schemata WHERE schema_name NOT IN 
-                            ('cron','information_schema', 'pg_bitmapindex','pg_catalog','pg_toast','polar_catalog','polar_feature_utils')
-                            ORDER BY schema_name;
-                        """
-                    cursor.execute(query)
-                    rows = cursor.fetchall()
-                    return "\n".join([row[0] for row in rows])
-                elif len(parts) == 2 and parts[1] == "tables":
-                    #polardb-postgresql://{schema}/tables,list all tables in a schema
-                    query = """
-                   SELECT 
-                        c.relname AS table_name,              
-                        obj_description(c.oid) AS table_comment 
-                    FROM 
-                        pg_class c
-                    JOIN 
-                        pg_namespace n ON n.oid = c.relnamespace
-                    WHERE 
-                        c.relkind = 'r'
-                        AND n.nspname = %s
-                    ORDER BY 
-                        c.relname;
-                    """
-                    cursor.execute(query, (parts[0],))
-                    rows = cursor.fetchall()
-                    return "\n".join([f"{row[0]} ({row[1]})" for row in rows])
-                elif len(parts) == 3 and parts[2] == "field":
-                    # polardb-postgresql://{schema}/{table}/field,list all field info(name,type,comment) in a table
-                    schema = _validate_identifier(parts[0], "schema")
-                    table = _validate_identifier(parts[1], "table")
-                    query = """
-                    SELECT a.attname AS column_name,              
-                        pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type, 
-                        col_description(a.attrelid, a.attnum) AS column_comment 
-                    FROM 
-                        pg_catalog.pg_attribute a
-                    WHERE 
-                        a.attnum > 0                            
-                        AND NOT a.attisdropped                  
-                        AND a.attrelid = %s::regclass 
-                    ORDER BY 
-                        a.attnum;   
-                    """
-                    cursor.execute(query, (f"{schema}.{table}",))
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return "\n".join(result)
-                elif len(parts) == 3 and parts[2] == "data":
-                    # polardb-postgresql://{schema}/{table}/data,list all data in a table
-                    schema = _validate_identifier(parts[0], "schema")
-                    table = _validate_identifier(parts[1], "table")
-                    query = psycopg_sql.SQL("SELECT * FROM {}.{} LIMIT 50").format(
-                        psycopg_sql.Identifier(schema),
-                        psycopg_sql.Identifier(table),
-                    )
-                    cursor.execute(query)
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return "\n".join(result)
-                else:
-                    raise ValueError(f"Invalid URI: {uri_str}")
+        result = await _catalog_resource(config, parts, query_string)
+        if result is not None:
+            return result
+        primary_key = None
+        if len(parts) == 3 and parts[2] == "data" and query_string:
+            table = await get_schema_catalog(config).table(_catalog_fetch(config), parts[0], parts[1])
+            if table is not None:
+                primary_key = table.primary_key
+        return await _run_read_steps(config, _resource_steps(uri_str, parts, query_string, primary_key))
     except Error as e:
         logger.error(f"Database error: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
+
+
+def _catalog_fetch(config):
+    """fetch function for the schema catalog: one query on a pooled connection."""
+
+    def steps(sql, params):
+        return (yield sql, params)
+
+    async def fetch(sql, params):
+        return await _run_read_steps(config, steps(sql, params))
+
+    return fetch
+
+
+async def _catalog_resource(config, parts, query_string):
+    """Text of the schemas, tables, schema and field resources, served from
+    the cached catalog, or None for the other resources."""
+    catalog = get_schema_catalog(config)
+    fetch = _catalog_fetch(config)
+    if len(parts) == 1 and parts[0] == "schemas":
+        #polardb-postgresql://schemas,list all schemas
+        return "\n".join(await catalog.schemas(fetch))
+    elif len(parts) == 2 and parts[1] == "tables":
+        #polardb-postgresql://{schema}/tables,list all tables in a schema
+        snapshot = await catalog.snapshot(fetch, parts[0])
+        return "\n".join(
+            f"{table.name} ({table.comment})" for table in snapshot.tables if snapshot.relkinds[table.name] == "r"
+        )
+    elif len(parts) == 2 and parts[1] == "schema":
+        # polardb-postgresql://{schema}/schema,all tables of a schema in one snapshot
+        patterns, max_bytes = parse_schema_query(query_string)
+        return format_schema((await catalog.snapshot(fetch, parts[0])).tables, patterns, max_bytes)
+    elif len(parts) == 3 and parts[2] == "field":
+        # polardb-postgresql://{schema}/{table}/field,list all field info(name,type,comment) in a table
+        table = await catalog.table(fetch, parts[0], parts[1])
+        if table is not None:
+            return "\n".join(",".join(map(str, column)) for column in table.columns)
+    return None
+
+
+def _resource_steps(uri_str, parts, query_string, primary_key=None):
+    """Steps of read_resource: every (sql, params) yielded is run and its
+    (columns, rows) sent back in, on whichever backend drives them."""
+    if len(parts) == 3 and parts[2] == "field":
+        # a table the catalog does not know, let the database report the error
+        schema = _validate_identifier(parts[0], "schema")
+        table = _validate_identifier(parts[1], "table")
+        query = """
+        SELECT a.attname AS column_name,              
+            pg_catalog.format_type(a.atttypid, a.atttypmod) AS data_type, 
+            col_description(a.attrelid, a.attnum) AS column_comment 
+        FROM 
+            pg_catalog.pg_attribute a
+        WHERE 
+            a.attnum > 0                            
+            AND NOT a.attisdropped                  
+            AND a.attrelid = %s::regclass 
+        ORDER BY 
+            a.attnum;   
+        """
+        _, rows = yield query, (f"{schema}.{table}",)
+        result = [",".join(map(str, row)) for row in rows]
+        return "\n".join(result)
+    elif len(parts) == 3 and parts[2] == "data":
+        # polardb-postgresql://{schema}/{table}/data,list all data in a table
+        schema = _validate_identifier(parts[0], "schema")
+        table = _validate_identifier(parts[1], "table")
+        if query_string:
+            return (yield from _table_data_steps(schema, table, parse_data_query(query_string), primary_key))
+        query = psycopg_sql.SQL("SELECT * FROM {}.{} LIMIT 50").format(
+            psycopg_sql.Identifier(schema),
+            psycopg_sql.Identifier(table),
+        )
+        _, rows = yield query, None
+        result = [",".join(map(str, row)) for row in rows]
+        return "\n".join(result)
+    else:
+        raise ValueError(f"Invalid URI: {uri_str}")
+
+
+def _run_steps(config, steps):
+    """Drive a read step generator on one pooled connection."""
+    with get_pool(config).connection() as conn:
+        with conn.cursor() as cursor:
+            try:
+                step = next(steps)
+                while True:
+                    cursor.execute(*step)
+                    columns = [desc[0] for desc in cursor.description]
+                    step = steps.send((columns, cursor.fetchall()))
+            except StopIteration as stop:
+                return stop.value
+
+
+async def _execute_cancellable(conn, cursor, query, params=None):
+    """cursor.execute on an AsyncConnection that also stops the statement on
+    the server when the calling task is cancelled, because the client went
+    away or cancelled the request. The cancel request is sent synchronously:
+    anyio keeps cancelling the task, so an awaited one could be cut short."""
+    try:
+        await cursor.execute(query, params)
+    except asyncio.CancelledError:
+        if not conn.closed:
+            try:
+                conn.cancel()
+            except psycopg.Error as e:
+                logger.info(f"Could not cancel statement on the server: {e}")
+        raise
+
+
+async def _run_steps_async(config, steps):
+    pool = await get_async_pool(config)
+    async with pool.connection() as conn:
+        async with conn.cursor() as cursor:
+            try:
+                step = next(steps)
+                while True:
+                    await _execute_cancellable(conn, cursor, *step)
+                    columns = [desc[0] for desc in cursor.description]
+                    step = steps.send((columns, await cursor.fetchall()))
+            except StopIteration as stop:
+                return stop.value
+
+
+async def _run_read_steps(config, steps):
+    """Run read steps natively on the event loop with the async backend, or
+    in a worker thread otherwise."""
+    if use_async_backend:
+        return await _run_steps_async(config, steps)
+    return await asyncio.to_thread(_run_steps, config, steps)
+
+
+_PRIMARY_KEY_SQL = """
+    SELECT a.attname
+    FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indrelid = %s::regclass AND i.indisprimary
+    ORDER BY array_position(i.indkey::int2[], a.attnum)
+"""
+
+
+def _table_data_steps(schema, table, query, primary_key=None):
+    """table_data resource with projection, keyset pagination on the primary
+    key and TABLESAMPLE sampling, shuffled so the limit keeps rows from the
+    whole sample. Returns the same text as the plain resource,
+    plus a trailing "next:" line with the URI of the following page. The
+    primary key is looked up unless the cached catalog already had it."""
+    if primary_key is None:
+        _, rows = yield _PRIMARY_KEY_SQL, (f"{schema}.{table}",)
+        primary_key = [row[0] for row in rows]
+    if query.columns:
+        selected = [_validate_identifier(c, "column") for c in query.columns]
+        # key columns are fetched too, to build the cursor, but not shown
+        extra = [c for c in primary_key if c not in selected]
+        select_list = psycopg_sql.SQL(", ").join(psycopg_sql.Identifier(c) for c in selected + extra)
+    else:
+        selected = None
+        select_list = psycopg_sql.SQL("*")
+    key = psycopg_sql.SQL(", ").join(psycopg_sql.Identifier(c) for c in primary_key)
+    clauses = []
+    params = []
+    paged = False
+    if query.sample is not None:
+        method = {"bernoulli": "BERNOULLI", "system": "SYSTEM"}[query.sample_method]
+        # sampled rows come in physical order, a LIMIT alone would keep the
+        # start of the table; the ORDER BY is a top-N sort of the sample only
+        clauses.append(psycopg_sql.SQL(f"TABLESAMPLE {method} (%s) ORDER BY random()"))
+        params.append(query.sample)
+    elif primary_key:
+        paged = True
+        if query.after is not None:
+            values = decode_cursor(query.after, len(primary_key))
+            clauses.append(psycopg_sql.SQL("WHERE ({}) > ({})").format(
+                key, psycopg_sql.SQL(", ").join(psycopg_sql.Placeholder() for _ in values)
+            ))
+            params.extend(values)
+        clauses.append(psycopg_sql.SQL("ORDER BY {}").format(key))
+    elif query.after is not None:
+        raise ValueError(f"Table {schema}.{table} has no primary key to page on")
+    sql = psycopg_sql.SQL("SELECT {} FROM {}.{} {} LIMIT {}").format(
+        select_list,
+        psycopg_sql.Identifier(schema),
+        psycopg_sql.Identifier(table),
+        psycopg_sql.SQL(" ").join(clauses),
+        psycopg_sql.Literal(query.limit),
+    )
+    columns, rows = yield sql, params
+    shown = len(selected) if selected else len(columns)
+    result = [",".join(map(str, row[:shown])) for row in rows]
+    if paged and len(rows) == query.limit:
+        last = rows[-1]
+        cursor_value = encode_cursor([last[columns.index(c)] for c in primary_key])
+        result.append(f"next: polardb-postgresql://{schema}/{table}/data?{query.next_page(cursor_value)}")
+    return "\n".join(result)
+
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available PolarDB PostgreSQL tools."""
@@ -265,10 +530,145 @@ async def list_tools() -> list[Tool]:
                     "query": {
                         "type": "string",
                         "description": "The SQL query to execute"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(ENCODERS),
+                        "description": "Result format: csv (RFC 4180, default), jsonl (one JSON object per row), "
+                                       "columnar_json ({columns, data} with one array per column) or "
+                                       "arrow (base64 Arrow IPC stream)"
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
+        Tool(
+            name="execute_sql_batch",
+            description="Run several independent read-only SQL queries concurrently in one call, e.g. row "
+                        "counts, distinct values or min/max of several tables, and return each result with "
+                        "its timing",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": f"The read-only queries to run, at most {MAX_BATCH_STATEMENTS}"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(ENCODERS),
+                        "description": "Result format, as for execute_sql"
+                    }
+                },
+                "required": ["queries"]
+            }
+        ),
+        Tool(
+            name="open_cursor",
+            description="Run a query that returns rows and keep its result open on the server, so a huge "
+                        "result can be read page by page with fetch_cursor instead of re-running it with OFFSET",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The SELECT query to run"
                     }
                 },
                 "required": ["query"]
             }
+        ),
+        Tool(
+            name="fetch_cursor",
+            description="Fetch the next rows of a cursor opened with open_cursor; the cursor is closed "
+                        "once the result is exhausted",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor_id": {
+                        "type": "string",
+                        "description": "The cursor id returned by open_cursor"
+                    },
+                    "rows": {
+                        "type": "integer",
+                        "description": f"Number of rows to fetch (default: {DEFAULT_CURSOR_FETCH_ROWS})"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(ENCODERS),
+                        "description": "Result format, as for execute_sql"
+                    }
+                },
+                "required": ["cursor_id"]
+            }
+        ),
+        Tool(
+            name="close_cursor",
+            description="Close a cursor opened with open_cursor before reading all of its rows",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor_id": {
+                        "type": "string",
+                        "description": "The cursor id returned by open_cursor"
+                    }
+                },
+                "required": ["cursor_id"]
+            }
+        ),
+        Tool(
+            name="export_query",
+            description="Export the result of a read-only query with COPY ... TO STDOUT, much faster than "
+                        "execute_sql for large extracts. Writes a CSV or binary COPY file in the server's "
+                        "export directory, or returns CSV inline when no file is given",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The SELECT query whose result to export"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(EXPORT_FORMATS),
+                        "description": "csv with a header row (default) or PostgreSQL binary COPY format, "
+                                       "binary needs a file"
+                    },
+                    "file": {
+                        "type": "string",
+                        "description": "File name relative to POLARDB_POSTGRESQL_EXPORT_DIR, missing "
+                                       "subdirectories are created; it must not exist yet"
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
+        Tool(
+            name="bulk_load",
+            description="Load a local CSV or JSON lines file into an existing table with COPY ... FROM STDIN "
+                        "in one statement, instead of generating large INSERT statements; needs INSERT to be enabled",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file": {
+                        "type": "string",
+                        "description": "Path of the file relative to the server's import directory. A CSV file "
+                                       "needs a header row of column names, empty unquoted fields load as NULL; "
+                                       "in a JSON lines file the keys of the first object are the columns"
+                    },
+                    "table": {
+                        "type": "string",
+                        "description": "The target table, optionally qualified as schema.table"
+                    },
+                    "format": {
+                        "type": "string",
+                        "enum": list(BULK_LOAD_FORMATS),
+                        "description": "File format, by default taken from the extension (.csv, .jsonl, .ndjson)"
+                    }
+                },
+                "required": ["file", "table"]
+            }
         )
     ]
 
@@ -280,51 +680,483 @@ def get_sql_operation_type(sql):
         if op in operations:
             return op
     return 'OTHER'
-def execute_sql(arguments: str) -> str:
-    config = get_db_config()
-    query = arguments.get("query")
-    if not query:
-        raise ValueError("Query is required")
+
+
+def _authorize_sql(query):
+    """Classify query and check it against the enabled operations.
+    Returns (operations, rejection) where rejection is the tool response to
+    send back instead of running the query, or None if it may run."""
     operations, statement_count = get_sql_operations(query)
     logger.info(f"SQL operations: {operations}, statements: {statement_count}")
     if statement_count > 1:
         logger.info("multi-statement queries are not allowed")
-        return [TextContent(type="text", text="Multi-statement queries are not allowed")]
+        return operations, [TextContent(type="text", text="Multi-statement queries are not allowed")]
     global enable_delete,enable_update,enable_insert,enable_ddl
     if 'INSERT' in operations and not enable_insert:
         logger.info(f"INSERT operation is not enabled,please check POLARDB_POSTGRESQL_ENABLE_INSERT")
-        return [TextContent(type="text", text=f"INSERT operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"INSERT operation is not enabled in current tool")]
     if 'UPDATE' in operations and not enable_update:
         logger.info(f"UPDATE operation is not enabled,please check POLARDB_POSTGRESQL_ENABLE_UPDATE")
-        return [TextContent(type="text", text=f"UPDATE operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"UPDATE operation is not enabled in current tool")]
     if 'DELETE' in operations and not enable_delete:
         logger.info(f"DELETE operation is not enabled,please check POLARDB_POSTGRESQL_ENABLE_DELETE")
-        return [TextContent(type="text", text=f"DELETE operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"DELETE operation is not enabled in current tool")]
     if 'DDL' in operations and not enable_ddl:
         logger.info(f"DDL operation is not enabled,please check POLARDB_POSTGRESQL_ENABLE_DDL")
-        return [TextContent(type="text", text=f"DDL operation is not enabled in current tool")]
+        return operations, [TextContent(type="text", text=f"DDL operation is not enabled in current tool")]
+    return operations, None
+
+
+def _guard_verdict(conn, query):
+    """Check query against the cost guard on conn, returning None when the
+    guard is off, does not apply or the plan could not be read."""
+    guard = get_cost_guard()
+    if not guard.applies_to(query):
+        return None
+    estimate = guard.cached_estimate(query)
+    if estimate is None:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(guard.explain_sql(query))
+                estimate = CostEstimate.from_explain_json(cursor.fetchone()[0])
+        except (psycopg.Error, ValueError, LookupError, TypeError) as e:
+            logger.info(f"Cost guard could not explain query, running it unchecked: {e}")
+            return None
+        guard.store_estimate(query, estimate)
+    return guard.decide(query, estimate)
+
+
+def execute_sql(arguments: str) -> str:
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("Query is required")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    operations, rejection = _authorize_sql(query)
+    if rejection:
+        return rejection
     logger.info(f"will Executing SQL: {query}")
     try:
-        with psycopg.connect(**config) as conn:
-            conn.autocommit = True
+        with get_pool(config).connection() as conn:
+            verdict = _guard_verdict(conn, query)
+            if verdict is not None:
+                if verdict.action == "reject":
+                    return [TextContent(type="text", text=verdict.message())]
+                query = verdict.query
             with conn.cursor() as cursor:
                 cursor.execute(query)
                 if cursor.description is not None:
                     columns = [desc[0] for desc in cursor.description]
                     rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return [TextContent(type="text", text="\n".join([",".join(columns)] + result))]
+                    result = [TextContent(type="text", text=encode_result(columns, rows, result_format))]
+                    if verdict is not None and verdict.action != "allow":
+                        result.append(TextContent(type="text", text=verdict.message()))
+                    return result
                 else:
                     conn.commit()
+                    if 'DDL' in operations:
+                        invalidate_schema_catalog(config)
+                    return [TextContent(type="text", text=f"Query executed successfully")]
+    except Error as e:
+        logger.error(f"Error executing SQL '{query}': {e}")
+        return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+
+
+async def _guard_verdict_async(conn, query):
+    guard = get_cost_guard()
+    if not guard.applies_to(query):
+        return None
+    estimate = guard.cached_estimate(query)
+    if estimate is None:
+        try:
+            async with conn.cursor() as cursor:
+                await _execute_cancellable(conn, cursor, guard.explain_sql(query))
+                estimate = CostEstimate.from_explain_json((await cursor.fetchone())[0])
+        except (psycopg.Error, ValueError, LookupError, TypeError) as e:
+            logger.info(f"Cost guard could not explain query, running it unchecked: {e}")
+            return None
+        guard.store_estimate(query, estimate)
+    return guard.decide(query, estimate)
+
+
+async def execute_sql_async(arguments: str) -> str:
+    """execute_sql on psycopg's AsyncConnection, running on the event loop.
+    Cancelling the request cancels the statement on the server."""
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("Query is required")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    operations, rejection = _authorize_sql(query)
+    if rejection:
+        return rejection
+    logger.info(f"will Executing SQL: {query}")
+    try:
+        pool = await get_async_pool(config)
+        async with pool.connection() as conn:
+            verdict = await _guard_verdict_async(conn, query)
+            if verdict is not None:
+                if verdict.action == "reject":
+                    return [TextContent(type="text", text=verdict.message())]
+                query = verdict.query
+            async with conn.cursor() as cursor:
+                await _execute_cancellable(conn, cursor, query)
+                if cursor.description is not None:
+                    columns = [desc[0] for desc in cursor.description]
+                    rows = await cursor.fetchall()
+                    result = [TextContent(type="text", text=encode_result(columns, rows, result_format))]
+                    if verdict is not None and verdict.action != "allow":
+                        result.append(TextContent(type="text", text=verdict.message()))
+                    return result
+                else:
+                    if 'DDL' in operations:
+                        invalidate_schema_catalog(config)
                     return [TextContent(type="text", text=f"Query executed successfully")]
     except Error as e:
         logger.error(f"Error executing SQL '{query}': {e}")
         return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+
+
+def get_batch_concurrency():
+    return max(1, int(os.getenv("POLARDB_POSTGRESQL_BATCH_CONCURRENCY", str(DEFAULT_BATCH_CONCURRENCY))))
+
+
+async def execute_sql_batch(arguments):
+    """Run read-only queries through execute_sql at most
+    POLARDB_POSTGRESQL_BATCH_CONCURRENCY at a time. Results keep the order of
+    the queries, each behind a header with its index and elapsed time."""
+    queries = arguments.get("queries")
+    if not queries or not isinstance(queries, list):
+        raise ValueError("queries is required for tool execute_sql_batch")
+    if len(queries) > MAX_BATCH_STATEMENTS:
+        raise ValueError(f"execute_sql_batch takes at most {MAX_BATCH_STATEMENTS} queries")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    concurrency = get_batch_concurrency()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(query):
+        operations, _ = get_sql_operations(query)
+        if operations:
+            return [TextContent(type="text", text="execute_sql_batch only runs read-only queries")], 0.0
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                statement_arguments = {"query": query, "format": result_format}
+                if use_async_backend:
+                    result = await execute_sql_async(statement_arguments)
+                else:
+                    result = await asyncio.to_thread(execute_sql, statement_arguments)
+            except (ValueError, psycopg.Error) as e:
+                result = [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+            return result, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(run(str(query)) for query in queries))
+    wall_ms = (time.perf_counter() - started) * 1000
+    output = []
+    for i, (query, (result, elapsed_ms)) in enumerate(zip(queries, outcomes), 1):
+        output.append(TextContent(type="text", text=f"-- [{i}] {elapsed_ms:.1f} ms: {' '.join(str(query).split())}"))
+        output.extend(result)
+    output.append(TextContent(
+        type="text",
+        text=f"-- {len(queries)} queries in {wall_ms:.1f} ms "
+             f"(sum {sum(ms for _, ms in outcomes):.1f} ms, concurrency {concurrency})",
+    ))
+    return output
+
+
+def _release_cursor(cursor):
+    """Close a cursor, end its transaction and return the connection it holds
+    to its pool, which resets the session."""
+    try:
+        if not cursor.conn.closed:
+            cursor.cursor.close()
+            cursor.conn.rollback()
+    except psycopg.Error as e:
+        logger.info(f"Error closing cursor {cursor.cursor_id}: {e}")
+    finally:
+        cursor.release.putconn(cursor.conn)
+
+
+def open_cursor(arguments):
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("query is required for tool open_cursor")
+    operations, rejection = _authorize_sql(query)
+    if rejection:
+        return rejection
+    if operations:
+        return [TextContent(type="text", text="open_cursor only runs queries that return rows")]
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        _release_cursor(expired)
+    registry.check_capacity()
+    logger.info(f"will open cursor for SQL: {query}")
+    pool = get_pool(config)
+    conn = pool.getconn()
+    try:
+        # the transaction stays open between fetches; the server ends it itself
+        # shortly after the idle timeout if this process goes away
+        conn.autocommit = False
+        conn.execute(f"SET idle_in_transaction_session_timeout = '{int(registry.idle_timeout) + 60}s'")
+        cursor = conn.cursor(name=f"mcp_cursor_{secrets.token_hex(8)}")
+        cursor.execute(query)
+    except psycopg.Error as e:
+        pool.putconn(conn)
+        logger.error(f"Error opening cursor for SQL '{query}': {e}")
+        return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+    except BaseException:
+        pool.putconn(conn)
+        raise
+    if cursor.description is None:
+        pool.putconn(conn)
+        return [TextContent(type="text", text="Query returned no rows to read, no cursor was opened")]
+    entry = OpenCursor(query, [desc[0] for desc in cursor.description], conn, cursor, pool)
+    try:
+        registry.add(entry)
+    except ValueError:
+        _release_cursor(entry)
+        raise
+    return [TextContent(
+        type="text",
+        text=f"Opened cursor {entry.cursor_id} with columns: {', '.join(entry.columns)}. "
+             f"Read it with fetch_cursor; it is closed after {int(registry.idle_timeout)}s without a fetch",
+    )]
+
+
+def fetch_cursor(arguments):
+    cursor_id = arguments.get("cursor_id")
+    if not cursor_id:
+        raise ValueError("cursor_id is required for tool fetch_cursor")
+    result_format = arguments.get("format")
+    check_format(result_format)
+    rows = int(arguments.get("rows") or DEFAULT_CURSOR_FETCH_ROWS)
+    if rows <= 0:
+        raise ValueError("rows must be positive")
+    rows = min(rows, MAX_CURSOR_FETCH_ROWS)
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        _release_cursor(expired)
+    cursor = registry.checkout(cursor_id)
+    first_row = cursor.row_count + 1
+    try:
+        # one FETCH FORWARD per call; a short page means the result is exhausted
+        batch = cursor.cursor.fetchmany(rows)
+        cursor.row_count += len(batch)
+        cursor.exhausted = len(batch) < rows
+        result = [TextContent(type="text", text=encode_result(cursor.columns, batch, result_format))]
+        if cursor.exhausted:
+            status = (f"cursor {cursor_id}: rows {first_row}-{cursor.row_count}, end of result, cursor closed"
+                      if batch else f"cursor {cursor_id}: no more rows after {cursor.row_count}, cursor closed")
+        else:
+            status = f"cursor {cursor_id}: rows {first_row}-{cursor.row_count}, call fetch_cursor for more"
+        result.append(TextContent(type="text", text=status))
+        return result
+    except psycopg.Error as e:
+        logger.error(f"Error fetching cursor {cursor_id}: {e}")
+        cursor.exhausted = True
+        return [TextContent(type="text", text=f"Error fetching cursor, it was closed: {str(e)}")]
+    finally:
+        registry.checkin(cursor)
+        if cursor.exhausted:
+            _release_cursor(cursor)
+
+
+def close_cursor(arguments):
+    cursor_id = arguments.get("cursor_id")
+    if not cursor_id:
+        raise ValueError("cursor_id is required for tool close_cursor")
+    registry = get_cursor_registry()
+    for expired in registry.pop_expired():
+        _release_cursor(expired)
+    cursor = registry.pop(cursor_id)
+    if cursor is None:
+        return [TextContent(type="text", text=f"Unknown, expired or busy cursor: {cursor_id}")]
+    _release_cursor(cursor)
+    return [TextContent(type="text", text=f"Closed cursor {cursor_id} after {cursor.row_count} rows")]
+
+
+async def _reap_idle_cursors():
+    """Close cursors as their idle timeout passes, so the connections they pin
+    go back to the pool without waiting for the next cursor call. Returns once
+    no cursor is open; open_cursor starts it again."""
+    registry = get_cursor_registry()
+    while True:
+        delay = registry.next_expiry()
+        if delay is None:
+            return
+        await asyncio.sleep(delay + 0.1)
+        for expired in registry.pop_expired():
+            logger.info(f"Closing cursor {expired.cursor_id} after {int(registry.idle_timeout)}s idle")
+            await asyncio.to_thread(_release_cursor, expired)
+
+
+_cursor_reaper = None
+
+
+def _start_cursor_reaper():
+    global _cursor_reaper
+    if _cursor_reaper is None or _cursor_reaper.done():
+        _cursor_reaper = asyncio.create_task(_reap_idle_cursors())
+
+
+def export_query(arguments):
+    """Stream COPY (query) TO STDOUT into a file of the export directory or,
+    without a file, into inline CSV, stopping at the configured size limit."""
+    config = get_db_config()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("query is required for tool export_query")
+    fmt = arguments.get("format") or "csv"
+    statement = copy_statement(query, fmt)
+    operations, rejection = _authorize_sql(query)
+    if rejection:
+        return rejection
+    if operations:
+        return [TextContent(type="text", text="export_query only runs read-only queries")]
+    settings = get_export_settings()
+    name = arguments.get("file")
+    if name:
+        path = export_path(settings["directory"], name)
+        limit = settings["max_bytes"]
+        try:
+            # export_path keeps path, and so its parents, inside the export directory
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        except OSError as e:
+            raise ValueError(f"Cannot create the directory of export file {name!r}: {e.strerror}")
+        try:
+            sink = open(path, "xb")
+        except FileExistsError:
+            raise ValueError(f"Export file {name!r} already exists")
+    elif fmt == "binary":
+        raise ValueError("binary exports must be written to a file, pass file")
+    else:
+        path = None
+        limit = settings["inline_max_bytes"]
+        sink = io.BytesIO()
+    logger.info(f"will export SQL as {fmt} to {path or 'inline output'}: {query}")
+    truncated = False
+    started = time.perf_counter()
+    try:
+        with sink, get_pool(config).connection() as conn, conn.cursor() as cursor:
+            try:
+                with cursor.copy(statement) as copy:
+                    for data in copy:
+                        if sink.tell() + len(data) > limit:
+                            raise ExportTooLarge()
+                        sink.write(data)
+            except ExportTooLarge:
+                truncated = True
+            size = sink.tell()
+            rows = cursor.rowcount
+            inline = None if path else sink.getvalue().decode("utf-8")
+    except (psycopg.Error, OSError) as e:
+        logger.error(f"Error exporting SQL '{query}': {e}")
+        if path:
+            os.remove(path)
+        return [TextContent(type="text", text=f"Error exporting query: {str(e)}")]
+    elapsed = time.perf_counter() - started
+    if path and truncated:
+        os.remove(path)
+        return [TextContent(
+            type="text",
+            text=f"Export stopped: the result exceeds POLARDB_POSTGRESQL_EXPORT_MAX_BYTES ({limit} bytes), "
+                 f"no file was written",
+        )]
+    rate = f"{size / 1024 / 1024 / elapsed:.1f} MB/s" if elapsed > 0 else "n/a"
+    summary = f"{size} bytes in {elapsed * 1000:.1f} ms ({rate})"
+    if path:
+        return [TextContent(type="text", text=f"Exported {rows} rows, {summary} to {path}")]
+    result = [
+        TextContent(type="text", text=inline[i:i + EXPORT_CHUNK_CHARS])
+        for i in range(0, len(inline), EXPORT_CHUNK_CHARS)
+    ]
+    if truncated:
+        result.append(TextContent(
+            type="text",
+            text=f"-- truncated after {summary}: the result exceeds POLARDB_POSTGRESQL_EXPORT_INLINE_MAX_BYTES, "
+                 f"export it to a file instead",
+        ))
+    else:
+        result.append(TextContent(type="text", text=f"-- {rows} rows, {summary}"))
+    return result
+
+
+def _table_identifier(table):
+    """Identifier of table or schema.table."""
+    parts = table.split(".") if isinstance(table, str) else []
+    if not 1 <= len(parts) <= 2:
+        raise ValueError(f"Invalid table: {table!r}")
+    return psycopg_sql.Identifier(*(_validate_identifier(part, "table") for part in parts))
+
+
+def bulk_load(arguments):
+    """COPY a CSV or JSON lines file into a table. CSV files are streamed to
+    the server as they are, JSON lines are sent row by row with write_row."""
+    config = get_db_config()
+    path = arguments.get("file")
+    table = arguments.get("table")
+    if not path or not table:
+        raise ValueError("file and table are required for tool bulk_load")
+    if not enable_insert:
+        logger.info(f"INSERT operation is not enabled,please check POLARDB_POSTGRESQL_ENABLE_INSERT")
+        return [TextContent(type="text", text=f"INSERT operation is not enabled in current tool")]
+    path = import_path(get_bulk_load_settings()["directory"], path)
+    fmt = detect_format(path, arguments.get("format"))
+    if fmt == "csv":
+        columns, rows = read_csv_header(path), None
+    else:
+        columns, rows = read_jsonl_rows(path)
+    statement = psycopg_sql.SQL("COPY {} ({}) FROM STDIN{}").format(
+        _table_identifier(table),
+        psycopg_sql.SQL(", ").join(psycopg_sql.Identifier(_validate_identifier(c, "column")) for c in columns),
+        psycopg_sql.SQL(" WITH (FORMAT csv, HEADER true)" if fmt == "csv" else ""),
+    )
+    logger.info(f"will load {path} into {table} with COPY FROM STDIN")
+    started = time.perf_counter()
+    try:
+        with get_pool(config).connection() as conn, conn.cursor() as cursor:
+            # an exception inside the block aborts the COPY, nothing is loaded
+            with cursor.copy(statement) as copy:
+                if rows is None:
+                    with open(path, "rb") as f:
+                        while chunk := f.read(BULK_LOAD_CHUNK_BYTES):
+                            copy.write(chunk)
+                else:
+                    for row in rows:
+                        copy.write_row(row)
+            loaded = cursor.rowcount
+    except psycopg.Error as e:
+        logger.error(f"Error loading {path} into {table}: {e}")
+        return [TextContent(type="text", text=f"Error loading file, nothing was loaded: {str(e)}")]
+    return [TextContent(type="text", text=load_summary(loaded, table, time.perf_counter() - started, "COPY FROM STDIN"))]
+
+
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     logger.info(f"Calling tool: {name} with arguments: {arguments}")
     if name == "execute_sql":
+        if use_async_backend:
+            return await execute_sql_async(arguments)
         return await asyncio.to_thread(execute_sql, arguments)
+    elif name == "execute_sql_batch":
+        return await execute_sql_batch(arguments)
+    elif name == "open_cursor":
+        result = await asyncio.to_thread(open_cursor, arguments)
+        _start_cursor_reaper()
+        return result
+    elif name == "fetch_cursor":
+        return await asyncio.to_thread(fetch_cursor, arguments)
+    elif name == "close_cursor":
+        return await asyncio.to_thread(close_cursor, arguments)
+    elif name == "export_query":
+        return await asyncio.to_thread(export_query, arguments)
+    elif name == "bulk_load":
+        return await asyncio.to_thread(bulk_load, arguments)
     else:
         raise ValueError(f"Unknown tool: {name}")
    
@@ -347,8 +1179,14 @@ def create_starlette_app(app: Server, *, debug: bool = False) -> Starlette:
                 app.create_initialization_options(),
             )
 
+    @asynccontextmanager
+    async def lifespan(starlette_app: Starlette):
+        yield
+        await close_async_pools()
+
     return Starlette(
         debug=debug,
+        lifespan=lifespan,
         routes=[
             Route("/sse", endpoint=handle_sse),
             Mount("/messages/", app=sse.handle_post_message),
@@ -380,6 +1218,8 @@ async def stdio_main():
         except Exception as e:
             logger.error(f"Server error: {str(e)}", exc_info=True)
             raise
+        finally:
+            await close_async_pools()
 
 def get_bool_env(var_name: str, default: bool = False) -> bool:
     value = os.getenv(var_name)
@@ -395,12 +1235,18 @@ def main():
     enable_insert = get_bool_env("POLARDB_POSTGRESQL_ENABLE_INSERT")
     enable_ddl = get_bool_env("POLARDB_POSTGRESQL_ENABLE_DDL")
     logger.info(f"enable_delete: {enable_delete}, enable_update: {enable_update}, enable_insert: {enable_insert}, enable_ddl: {enable_ddl}")
-    if os.getenv("RUN_MODE")=="stdio":
-        asyncio.run(stdio_main())
-    else:
-        bind_host = os.getenv("SSE_BIND_HOST")
-        bind_port = int(os.getenv("SSE_BIND_PORT"))
-        sse_main(bind_host,bind_port)
+    global use_async_backend
+    use_async_backend = get_bool_env("POLARDB_POSTGRESQL_ASYNC")
+    logger.info(f"use_async_backend: {use_async_backend}")
+    try:
+        if os.getenv("RUN_MODE")=="stdio":
+            asyncio.run(stdio_main())
+        else:
+            bind_host = os.getenv("SSE_BIND_HOST")
+            bind_port = int(os.getenv("SSE_BIND_PORT"))
+            sse_main(bind_host,bind_port)
+    finally:
+        close_pools()
 
 if __name__ == "__main__":
     main()
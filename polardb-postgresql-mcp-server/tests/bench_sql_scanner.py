@@ -0,0 +1,68 @@
+"""Micro-benchmark for the dollar-quote scanner used by the SQL permission check.
+
+Compares _strip_dollar_quotes against the previous char-by-char
+implementation on large statements and checks both agree when the text has
+no quotes or comments. Run with: python tests/bench_sql_scanner.py
+"""
+import re
+import timeit
+
+from polardb_postgresql_mcp_server.server import _strip_dollar_quotes
+
+_DOLLAR_TAG_RE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+
+
+def legacy_strip_dollar_quotes(sql_text):
+    out = []
+    i = 0
+    n = len(sql_text)
+    while i < n:
+        m = _DOLLAR_TAG_RE.match(sql_text, i)
+        if not m:
+            out.append(sql_text[i])
+            i += 1
+            continue
+        tag = m.group(0)
+        end = sql_text.find(tag, m.end())
+        if end == -1:
+            out.append(sql_text[m.end():])
+            break
+        out.append(" ")
+        out.append(sql_text[m.end():end])
+        out.append(" ")
+        i = end + len(tag)
+    return "".join(out)
+
+
+def build_corpus():
+    values = ",\n".join(
+        f"({i}, 'name {i} costs $5', \"Col{i}\", now())" for i in range(5000)
+    )
+    functions = "\n".join(
+        f"CREATE FUNCTION f{i}() RETURNS int AS $body$ SELECT {i} $body$ LANGUAGE sql;"
+        for i in range(2000)
+    )
+    plain = "SELECT " + ", ".join(f"col_{i} + {i}" for i in range(20000)) + " FROM t"
+    return {
+        "insert with literals": f"INSERT INTO t (id, name, note, created) VALUES\n{values}",
+        "function definitions": functions,
+        "plain wide select": plain,
+    }
+
+
+def main():
+    corpus = build_corpus()
+    for name, sql in corpus.items():
+        if not any(marker in sql for marker in ("'", '"', "--", "/*")):
+            assert _strip_dollar_quotes(sql) == legacy_strip_dollar_quotes(sql)
+        number = 20
+        old = timeit.timeit(lambda: legacy_strip_dollar_quotes(sql), number=number) / number
+        new = timeit.timeit(lambda: _strip_dollar_quotes(sql), number=number) / number
+        print(
+            f"{name:<24} {len(sql) / 1024:8.1f} KiB  "
+            f"old {old * 1000:8.2f} ms  new {new * 1000:8.2f} ms  speedup {old / new:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
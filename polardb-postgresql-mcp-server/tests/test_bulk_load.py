@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+import pytest
+from polardb_postgresql_mcp_server import server
+from polardb_postgresql_mcp_server.bulk_load import (
+    detect_format, import_path, load_summary, read_csv_header, read_jsonl_rows,
+)
+
+CONFIG = {"host": "h", "port": 5432, "user": "u", "password": "p", "dbname": "db", "statement_timeout": 1}
+
+
+class FakeCopy:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, data):
+        self.cursor.data += data
+        self.cursor.rowcount = self.cursor.data.count(b"\n") - 1
+
+    def write_row(self, row):
+        self.cursor.rows.append(row)
+        self.cursor.rowcount = len(self.cursor.rows)
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+        self.data = b""
+        self.rows = []
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy(self, statement):
+        self.statements.append(statement.as_string(None))
+        return FakeCopy(self)
+
+
+class FakePool:
+    def __init__(self):
+        self.cursor = FakeCursor()
+
+    @contextmanager
+    def connection(self):
+        conn = self
+
+        class Connection:
+            def cursor(self):
+                return conn.cursor
+
+        yield Connection()
+
+
+def test_helpers(tmp_path):
+    assert detect_format("a.CSV") == "csv" and detect_format("a.ndjson") == "jsonl"
+    assert detect_format("a.txt", "csv") == "csv"
+    with pytest.raises(ValueError):
+        detect_format("a.txt")
+    with pytest.raises(ValueError):
+        detect_format("a.csv", "xml")
+    csv_file = tmp_path / "a.csv"
+    csv_file.write_text("﻿id,\"note, long\"\r\n1,a\r\n")
+    assert read_csv_header(str(csv_file)) == ["id", "note, long"]
+    jsonl_file = tmp_path / "a.jsonl"
+    jsonl_file.write_text('\n{"id": 1, "meta": {"k": [1]}}\n{"id": 2}\n')
+    columns, rows = read_jsonl_rows(str(jsonl_file))
+    assert columns == ["id", "meta"] and list(rows) == [(1, '{"k": [1]}'), (2, None)]
+    jsonl_file.write_text('{"id": 1}\n{"other": 2}\n')
+    with pytest.raises(ValueError, match="Line 2"):
+        list(read_jsonl_rows(str(jsonl_file))[1])
+    assert load_summary(10, "t", 2.0, "COPY FROM STDIN") == "Loaded 10 rows into t with COPY FROM STDIN in 2.00 s (5 rows/s)"
+
+
+def test_import_path_stays_inside_the_import_directory(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.csv").write_text("id\n1\n")
+    (tmp_path / "secret.csv").write_text("id\n1\n")
+    (tmp_path / "data" / "link.csv").symlink_to(tmp_path / "secret.csv")
+    directory = str(tmp_path / "data")
+    assert import_path(directory, "a.csv") == str(tmp_path / "data" / "a.csv")
+    for name in ("../secret.csv", str(tmp_path / "secret.csv"), "link.csv", ".", "missing.csv"):
+        with pytest.raises(ValueError):
+            import_path(directory, name)
+    with pytest.raises(ValueError, match="POLARDB_POSTGRESQL_IMPORT_DIR"):
+        import_path(None, "a.csv")
+
+
+def test_bulk_load_copies_csv_and_jsonl(tmp_path):
+    (tmp_path / "orders.csv").write_text('id,note\n1,a\n2,"b,c"\n')
+    (tmp_path / "orders.jsonl").write_text('{"id": 1, "meta": {"k": 1}}\n{"id": 2}\n')
+    pool = FakePool()
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=pool), \
+            patch.dict("os.environ", {"POLARDB_POSTGRESQL_IMPORT_DIR": str(tmp_path)}):
+        assert server.bulk_load({"file": "orders.csv", "table": "orders"})[0].text == \
+            "INSERT operation is not enabled in current tool"
+        with patch.object(server, "enable_insert", True):
+            result = server.bulk_load({"file": "orders.csv", "table": "public.orders"})[0].text
+            assert result.startswith("Loaded 2 rows into public.orders with COPY FROM STDIN in ")
+            server.bulk_load({"file": "orders.jsonl", "table": "orders"})
+            with pytest.raises(ValueError, match="outside of the import directory"):
+                server.bulk_load({"file": "/etc/hostname", "table": "orders"})
+    assert pool.cursor.statements == [
+        'COPY "public"."orders" ("id", "note") FROM STDIN WITH (FORMAT csv, HEADER true)',
+        'COPY "orders" ("id", "meta") FROM STDIN',
+    ]
+    assert pool.cursor.data == b'id,note\n1,a\n2,"b,c"\n'
+    assert pool.cursor.rows == [(1, '{"k": 1}'), (2, None)]
@@ -0,0 +1,30 @@
+from polardb_postgresql_mcp_server.cost_guard import CostEstimate, CostGuard, limit_query
+
+
+def test_limit_mode_adds_or_tightens_a_top_level_limit():
+    estimate = CostEstimate(rows=5000, cost=10)
+    guard = CostGuard("limit", max_rows=1000, limit=100)
+    join = "SELECT o.id, u.id FROM orders o JOIN users u ON u.id = o.user_id -- newest\n"
+    verdict = guard.decide(join, estimate)
+    assert verdict.action == "limit" and verdict.query == join.strip() + "\nLIMIT 100"
+    verdict = guard.decide("SELECT * FROM t ORDER BY id LIMIT 5000 OFFSET 20;", estimate)
+    assert verdict.query == "SELECT * FROM t ORDER BY id LIMIT 100 OFFSET 20"
+    assert limit_query("SELECT * FROM t LIMIT 10", 100) == "SELECT * FROM t LIMIT 10"
+    assert limit_query("SELECT * FROM t OFFSET 5 LIMIT ALL", 100) == "SELECT * FROM t OFFSET 5 LIMIT 100"
+    assert limit_query("SELECT $$ LIMIT 5 $$, 'it''s' FROM t", 100) == "SELECT $$ LIMIT 5 $$, 'it''s' FROM t\nLIMIT 100"
+    assert limit_query("SELECT * FROM t WHERE id IN (SELECT id FROM u LIMIT 5000)", 100).endswith(")\nLIMIT 100")
+
+
+def test_limit_mode_rejects_statements_it_cannot_limit():
+    estimate = CostEstimate(rows=5000, cost=10)
+    guard = CostGuard("limit", max_rows=1000, limit=100)
+    for query in (
+        "SELECT * FROM t LIMIT $1",
+        "SELECT * INTO new_table FROM t",
+        "SELECT * FROM t FOR UPDATE",
+        "SELECT * FROM t FETCH FIRST 5000 ROWS ONLY",
+        "WITH gone AS (DELETE FROM t RETURNING *) SELECT * FROM gone",
+    ):
+        assert limit_query(query, 100) is None, query
+        verdict = guard.decide(query, estimate)
+        assert verdict.action == "reject" and "a LIMIT cannot be added" in verdict.message()
@@ -0,0 +1,29 @@
+from polardb_postgresql_mcp_server.server import _table_data_steps
+from polardb_postgresql_mcp_server.data_query import parse_data_query
+
+
+def run_steps(steps, columns, rows):
+    statement, params = next(steps)
+    try:
+        steps.send((columns, rows))
+    except StopIteration as stop:
+        return statement.as_string(None), params, stop.value
+
+
+def test_sample_is_shuffled_before_the_limit():
+    sql, params, text = run_steps(
+        _table_data_steps("public", "orders", parse_data_query("sample=5&limit=2"), ["id"]),
+        ["id", "total"], [(9, 90), (3, 30)],
+    )
+    assert sql == 'SELECT * FROM "public"."orders" TABLESAMPLE BERNOULLI (%s) ORDER BY random() LIMIT 2'
+    assert params == [5.0] and text == "9,90\n3,30"
+
+
+def test_pages_on_the_primary_key():
+    sql, params, text = run_steps(
+        _table_data_steps("public", "orders", parse_data_query("columns=total&limit=2&after=4"), ["id"]),
+        ["total", "id"], [(50, 5), (60, 6)],
+    )
+    assert sql == 'SELECT "total", "id" FROM "public"."orders" WHERE ("id") > (%s) ORDER BY "id" LIMIT 2'
+    assert params == ["4"]
+    assert text == "50\n60\nnext: polardb-postgresql://public/orders/data?columns=total&limit=2&after=6"
@@ -0,0 +1,68 @@
+from contextlib import contextmanager
+from unittest.mock import patch
+import pytest
+from polardb_postgresql_mcp_server import server
+from polardb_postgresql_mcp_server.export import copy_statement, export_path
+
+CONFIG = {"host": "h", "port": 5432, "user": "u", "password": "p", "dbname": "db", "statement_timeout": 1}
+
+
+class FakeCursor:
+    rowcount = 2
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    @contextmanager
+    def copy(self, statement):
+        yield [b"id\n", b"1\n2\n"]
+
+
+class FakePool:
+    @contextmanager
+    def connection(self):
+        class Connection:
+            def cursor(self):
+                return FakeCursor()
+
+        yield Connection()
+
+
+def test_export_path_stays_inside_the_export_directory(tmp_path):
+    (tmp_path / "exports").mkdir()
+    (tmp_path / "exports" / "out").symlink_to(tmp_path)
+    directory = str(tmp_path / "exports")
+    assert export_path(directory, "a.csv") == str(tmp_path / "exports" / "a.csv")
+    assert export_path(directory, "sub/dir/a.csv") == str(tmp_path / "exports" / "sub" / "dir" / "a.csv")
+    for name in ("../a.csv", "sub/../../a.csv", str(tmp_path / "a.csv"), "/etc/passwd", "out/a.csv", ".", ""):
+        with pytest.raises(ValueError):
+            export_path(directory, name)
+    with pytest.raises(ValueError, match="POLARDB_POSTGRESQL_EXPORT_DIR"):
+        export_path(None, "a.csv")
+
+
+def test_copy_statement():
+    assert copy_statement("SELECT 1; ", "csv") == "COPY (\nSELECT 1\n) TO STDOUT WITH (FORMAT csv, HEADER)"
+    # a trailing comment stays on its own line
+    assert copy_statement("SELECT 1 -- one", "binary") == "COPY (\nSELECT 1 -- one\n) TO STDOUT WITH (FORMAT binary)"
+    with pytest.raises(ValueError, match="Invalid export format"):
+        copy_statement("SELECT 1", "parquet")
+
+
+def test_export_query_creates_subdirectories_and_keeps_existing_files(tmp_path):
+    (tmp_path / "taken.csv").write_text("keep")
+    (tmp_path / "plain").write_text("")
+    with patch.object(server, "get_db_config", return_value=CONFIG), \
+            patch.object(server, "get_pool", return_value=FakePool()), \
+            patch.dict("os.environ", {"POLARDB_POSTGRESQL_EXPORT_DIR": str(tmp_path)}):
+        result = server.export_query({"query": "SELECT id FROM t", "file": "sub/x.csv"})[0].text
+        assert result.startswith("Exported 2 rows, 7 bytes in ")
+        assert (tmp_path / "sub" / "x.csv").read_bytes() == b"id\n1\n2\n"
+        with pytest.raises(ValueError, match="already exists"):
+            server.export_query({"query": "SELECT id FROM t", "file": "taken.csv"})
+        with pytest.raises(ValueError, match="Cannot create the directory"):
+            server.export_query({"query": "SELECT id FROM t", "file": "plain/x.csv"})
+    assert (tmp_path / "taken.csv").read_text() == "keep"
@@ -0,0 +1,35 @@
+import asyncio
+from polardb_postgresql_mcp_server.pool import _callbacks
+
+CONFIG = {"host": "h", "port": 5432, "user": "u", "password": "p", "dbname": "db", "statement_timeout": 30}
+
+
+class FakeConnection:
+    def __init__(self):
+        self.autocommit = False
+        self.statements = []
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    async def set_autocommit(self, value):
+        self.autocommit = value
+
+
+class FakeAsyncConnection(FakeConnection):
+    async def execute(self, sql):
+        self.statements.append(sql)
+
+
+def test_reset_discards_the_session_and_applies_the_settings_again():
+    configure, reset, configure_async, reset_async = _callbacks(CONFIG)
+    conn = FakeConnection()
+    configure(conn)
+    reset(conn)
+    assert conn.autocommit
+    assert conn.statements == ["SET statement_timeout = 30000", "DISCARD ALL", "SET statement_timeout = 30000"]
+    conn = FakeAsyncConnection()
+    asyncio.run(configure_async(conn))
+    asyncio.run(reset_async(conn))
+    assert conn.autocommit
+    assert conn.statements == ["SET statement_timeout = 30000", "DISCARD ALL", "SET statement_timeout = 30000"]
@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import patch
+from polardb_postgresql_mcp_server.schema_catalog import SchemaCatalog
+
+
+class FakeCatalogDb:
+    def __init__(self):
+        self.probe = "hash-1"
+        self.columns = [
+            ("orders", "id", "integer", "order id"),
+            ("orders", "total", "numeric(10,2)", None),
+            ("users", "id", "integer", None),
+        ]
+        self.queries = []
+
+    async def fetch(self, sql, params=None):
+        self.queries.append(sql)
+        if "md5" in sql:
+            return ["md5"], [(self.probe,)]
+        if "information_schema.schemata" in sql:
+            return ["schema_name"], [("public",)]
+        if "pg_index" in sql:
+            return ["t", "i", "p", "u", "c"], [
+                ("orders", "orders_pkey", True, True, ["id"]),
+                ("orders", "orders_total_idx", False, False, ["total"]),
+            ]
+        if "format_type" in sql:
+            return ["t", "c", "ty", "co"], self.columns
+        return ["t", "k", "r", "c"], [(t, "r", 10, None) for t in sorted({row[0] for row in self.columns})]
+
+    def loads(self):
+        return sum("format_type" in sql for sql in self.queries)
+
+
+def test_catalog_serves_from_memory_until_probe_sees_a_change():
+    db = FakeCatalogDb()
+    catalog = SchemaCatalog("db", ttl=300, probe_interval=3600)
+
+    async def run():
+        snapshot = await catalog.snapshot(db.fetch, "public")
+        assert [table.name for table in snapshot.tables] == ["orders", "users"]
+        orders = await catalog.table(db.fetch, "public", "ORDERS")
+        assert orders.columns == [("id", "integer", "order id"), ("total", "numeric(10,2)", None)]
+        assert orders.primary_key == ["id"] and orders.indexes == [("orders_total_idx", False, ["total"])]
+        assert (await catalog.table(db.fetch, "public", "users")).columns == [("id", "integer", None)]
+        assert db.loads() == 1 and catalog.stats()["hits"] == 2
+        # an unknown table forces a probe; an unchanged hash keeps the snapshot
+        assert await catalog.table(db.fetch, "public", "items") is None
+        assert db.loads() == 1
+        # a renamed column changes the pg_attribute part of the hash
+        db.probe = "hash-2"
+        db.columns[2] = ("users", "user_id", "integer", None)
+        await catalog.table(db.fetch, "public", "items")
+        assert db.loads() == 2
+        assert (await catalog.table(db.fetch, "public", "users")).columns == [("user_id", "integer", None)]
+        assert await catalog.schemas(db.fetch) == ["public"]
+
+    asyncio.run(run())
+
+
+def test_catalog_reloads_after_invalidate_and_ttl():
+    db = FakeCatalogDb()
+    catalog = SchemaCatalog("db", ttl=300, probe_interval=3600)
+
+    async def run():
+        await catalog.snapshot(db.fetch, "public")
+        catalog.invalidate()
+        await catalog.snapshot(db.fetch, "public")
+        assert db.loads() == 2
+        with patch("polardb_postgresql_mcp_server.schema_catalog.time.monotonic", return_value=10 ** 9):
+            await catalog.snapshot(db.fetch, "public")
+        assert db.loads() == 3
+
+    asyncio.run(run())
+
+
+def test_ttl_of_zero_bypasses_the_catalog():
+    db = FakeCatalogDb()
+    catalog = SchemaCatalog("db", ttl=0)
+
+    async def run():
+        await catalog.snapshot(db.fetch, "public")
+        assert await catalog.table(db.fetch, "public", "missing") is None
+        assert await catalog.schemas(db.fetch) == ["public"]
+        assert await catalog.schemas(db.fetch) == ["public"]
+
+    asyncio.run(run())
+    assert db.loads() == 2
+    assert not any("md5" in sql for sql in db.queries)
+    assert catalog.stats() == {"database": "db", "loads": 4, "probes": 0, "hits": 0, "schemas": 0}
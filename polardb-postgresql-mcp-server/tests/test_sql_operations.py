@@ -0,0 +1,24 @@
+from unittest.mock import patch
+from polardb_postgresql_mcp_server import server
+from polardb_postgresql_mcp_server.server import _classify_sql, get_sql_operations
+
+
+def test_get_sql_operations_fast_path():
+    with patch.object(server, "_classify_sql", wraps=server._classify_sql) as classify:
+        assert get_sql_operations("SELECT updated_at FROM t WHERE id = 1") == (set(), 1)
+        classify.assert_not_called()
+    assert get_sql_operations("UPDATE t SET a = 1") == ({"UPDATE"}, 1)
+    assert get_sql_operations("  ") == (set(), 0)
+
+
+def test_get_sql_operations_fast_path_matches_sqlparse():
+    for sql in (
+        "select updated_at, last_update from t",
+        "select 1e5DELETE from t",
+        "select 1.5e3DROP from t",
+        "select 0xAUPDATE from t",
+        "select 1DELETE, x1DELETE from t",
+        "select a from t where b = 'UPDATE'",
+    ):
+        operations, statement_count = _classify_sql(sql)
+        assert get_sql_operations(sql) == (set(operations), statement_count), sql